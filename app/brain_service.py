@@ -4,41 +4,44 @@ BrainService — Ingestão e busca semântica de documentos (RAG)
 Responsável por:
   1. Extrair texto de PDFs (pypdf)
   2. Dividir em chunks (langchain-text-splitters)
-  3. Gerar embeddings (OpenAI text-embedding-3-small)
-  4. Persistir chunks + vetores no PostgreSQL/pgvector
-  5. Busca de similaridade por cosseno (operador <=>)
+  3. Gerar embeddings (OpenAI text-embedding-3-small ou backend local — ver embedding_provider)
+  4. Persistir chunks + vetores no PostgreSQL/pgvector (COPY binário)
+  5. Busca híbrida: cosseno (operador <=>) + full-text, fundidos por RRF
 """
 
 from __future__ import annotations
 
 import io
 import os
+import time
 from pathlib import Path
-from typing import List, Optional
-from uuid import uuid4
+from typing import Callable, List, Optional
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from pypdf import PdfReader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from app.models import DocumentChunk
+from app.modules.brain.chunk_writer import (
+    CHUNK_BULK_COPY, ChunkRow, add_chunks_orm, copy_chunks, delete_chunks,
+)
+from app.modules.brain.embedding_cache import content_hash, embedding_cache
+from app.modules.brain.embedding_provider import EMBEDDING_DIMENSIONS, get_embedding_provider
+from app.modules.brain.embedding_scheduler import EMBEDDING_BATCH_MAX_INPUTS, embedding_scheduler
+from app.modules.brain import document_sync, hybrid_search, pdf_extraction, rerank, vector_index
+from app.modules.brain.search_filters import SearchFilters
 
 load_dotenv()
 
-# ── OpenAI client ────────────────────────────────────────────────
-_api_key = os.getenv("OPENAI_API_KEY")
-_openai: Optional[AsyncOpenAI] = AsyncOpenAI(api_key=_api_key) if _api_key else None
+# Modo padrão de semantic_search: "hybrid" (RRF lexical + vetorial) ou "vector"
+SEARCH_MODES = ("hybrid", "vector")
+BRAIN_SEARCH_MODE = os.getenv("BRAIN_SEARCH_MODE", "hybrid")
 
-# ── Text Splitter ────────────────────────────────────────────────
-_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=150,
-    length_function=len,
-    separators=["\n\n", "\n", ". ", " ", ""],
-)
+# pypdf e langchain só são importados no primeiro uso — a maioria das
+# requisições (e o boot dos workers) não precisa deles. pypdf e o splitter
+# vivem em pdf_extraction (executados no pool de processos); o cliente da
+# OpenAI, em embedding_provider.
 
 
 class BrainService:
@@ -49,15 +52,44 @@ class BrainService:
     # ────────────────────────────────────────────────────────────
 
     @staticmethod
+    def _resolve_source(
+        source: str | Path | io.BytesIO,
+        filename: str | None,
+    ) -> tuple[str | io.BytesIO, str]:
+        """Valida o caminho e define o filename (BytesIO → 'upload.pdf')."""
+        if isinstance(source, (str, Path)):
+            path = Path(source)
+            if not path.exists():
+                raise FileNotFoundError(f"Arquivo não encontrado: {path}")
+            return str(path), filename or path.name
+        return source, filename or "upload.pdf"
+
+    @staticmethod
+    def _build_result(filename: str, full_text: str, chunks: list[str], total_pages: int) -> dict:
+        if not full_text.strip():
+            raise ValueError(
+                f"Nenhum texto extraído de {filename}. "
+                "O PDF pode conter apenas imagens (não suportado ainda)."
+            )
+        return {
+            "filename": filename,
+            "full_text": full_text,
+            "chunks": chunks,
+            "total_pages": total_pages,
+        }
+
+    @classmethod
     def process_pdf(
+        cls,
         source: str | Path | io.BytesIO,
         filename: str | None = None,
     ) -> dict:
         """
-        Extrai texto de um PDF e divide em chunks.
+        Extrai texto de um PDF e divide em chunks (síncrono, no processo atual).
 
         Aceita tanto um caminho de arquivo quanto bytes em memória
-        (útil para uploads via API/Streamlit).
+        (útil para uploads via API/Streamlit). Em código async use
+        ``process_pdf_async``.
 
         Args:
             source: Caminho do arquivo ou BytesIO com o conteúdo do PDF.
@@ -70,75 +102,62 @@ class BrainService:
             FileNotFoundError: Se o caminho não existir.
             ValueError: Se nenhum texto puder ser extraído.
         """
-        # Resolve reader e filename
-        if isinstance(source, (str, Path)):
-            path = Path(source)
-            if not path.exists():
-                raise FileNotFoundError(f"Arquivo não encontrado: {path}")
-            reader = PdfReader(str(path))
-            filename = filename or path.name
-        else:
-            # BytesIO (upload)
-            reader = PdfReader(source)
-            if not filename:
-                filename = "upload.pdf"
-
-        # Extrai texto de cada página
-        pages_text: list[str] = []
-        for page in reader.pages:
-            extracted = page.extract_text()
-            if extracted:
-                pages_text.append(extracted)
+        source, filename = cls._resolve_source(source, filename)
+        if isinstance(source, io.BytesIO):
+            source = source.getvalue()
 
+        pages_text = pdf_extraction.extract_pages(source)
         full_text = "\n\n".join(pages_text)
-        if not full_text.strip():
-            raise ValueError(
-                f"Nenhum texto extraído de {filename}. "
-                "O PDF pode conter apenas imagens (não suportado ainda)."
-            )
+        chunks = pdf_extraction.split_text(full_text) if full_text.strip() else []
+        return cls._build_result(filename, full_text, chunks, pdf_extraction.count_pages(source))
 
-        # Divide em chunks
-        chunks = _splitter.split_text(full_text)
-
-        return {
-            "filename": filename,
-            "full_text": full_text,
-            "chunks": chunks,
-            "total_pages": len(reader.pages),
-        }
+    @classmethod
+    async def process_pdf_async(
+        cls,
+        source: str | Path | io.BytesIO,
+        filename: str | None = None,
+        *,
+        on_pages: Callable[[int], None] | None = None,
+    ) -> dict:
+        """
+        Mesmo contrato de ``process_pdf``, executado no pool de processos:
+        shards de páginas extraídos em paralelo, event loop livre.
+        """
+        source, filename = cls._resolve_source(source, filename)
+        processed = await pdf_extraction.extract_and_chunk(source, on_pages=on_pages)
+        return cls._build_result(
+            filename, processed["full_text"], processed["chunks"], processed["total_pages"]
+        )
 
     # ────────────────────────────────────────────────────────────
     # 2. GENERATE_EMBEDDINGS — Vetorização em batch
     # ────────────────────────────────────────────────────────────
 
-    @staticmethod
-    async def generate_embeddings(texts: list[str]) -> list[list[float]]:
+    @classmethod
+    async def generate_embeddings(cls, texts: list[str]) -> list[list[float]]:
         """
-        Gera embeddings em batch usando OpenAI text-embedding-3-small.
+        Gera embeddings em batch com o backend configurado (ver
+        embedding_provider — OpenAI, local ou determinístico).
 
         Args:
             texts: Lista de strings para vetorizar.
 
         Returns:
-            Lista de vetores (1 536 dims cada).
+            Lista de vetores (EMBEDDING_DIMENSIONS dims cada).
+
+        Cache:
+            Textos repetidos (no lote ou já vistos) vêm do embedding_cache;
+            apenas os ausentes vão para o backend.
 
         Fallback:
-            Se não houver chave API ou ocorrer erro, retorna vetores zerados.
+            Se o backend falhar, retorna vetores zerados.
         """
-        if not _openai:
-            print("⚠️  OPENAI_API_KEY não configurada. Retornando vetores zerados.")
-            return [[0.0] * 1536 for _ in texts]
-
+        provider = get_embedding_provider()
         try:
-            response = await _openai.embeddings.create(
-                input=texts,
-                model="text-embedding-3-small",
-            )
-            sorted_data = sorted(response.data, key=lambda d: d.index)
-            return [item.embedding for item in sorted_data]
+            return await embedding_cache.get_or_compute(texts, provider.embed, model=provider.model)
         except Exception as exc:
-            print(f"⚠️  Erro ao gerar embeddings: {exc}")
-            return [[0.0] * 1536 for _ in texts]
+            print(f"⚠️  Erro ao gerar embeddings ({provider.name}): {exc}")
+            return [[0.0] * EMBEDDING_DIMENSIONS for _ in texts]
 
     # ────────────────────────────────────────────────────────────
     # 3. INGEST — Pipeline completo (process + embed + persist)
@@ -148,30 +167,67 @@ class BrainService:
     async def ingest_pdf(
         cls,
         file_path: str | Path | io.BytesIO,
-        db: Session,
+        db: AsyncSession,
         *,
         filename: str | None = None,
-        batch_size: int = 50,
+        batch_size: int = EMBEDDING_BATCH_MAX_INPUTS,
+        progress: Callable[..., None] | None = None,
     ) -> dict:
         """
         Pipeline completo de ingestão.
 
         Args:
             file_path: Caminho do PDF (str/Path) ou BytesIO para uploads.
-            db: Sessão SQLAlchemy.
+            db: Sessão SQLAlchemy assíncrona (documento, diff e remoção dos
+                chunks obsoletos; os chunks novos vão por COPY binário, ou
+                pela sessão com CHUNK_BULK_COPY=false).
             filename: Nome override (útil para uploads via BytesIO).
-            batch_size: Quantos chunks por batch na API de embeddings.
+            batch_size: Teto de chunks por requisição de embeddings (os lotes
+                são montados por tokens — ver embedding_scheduler).
+            progress: (Opcional) Recebe contadores absolutos como kwargs
+                (total_pages, pages_parsed, chunks_total, chunks_embedded,
+                chunks_persisted) — usado pela fila de ingestão. Deve ser
+                rápido e não bloquear.
 
         Returns:
-            Dicionário com estatísticas da ingestão.
+            Dicionário com estatísticas da ingestão. ``status`` é "unchanged"
+            quando o arquivo é idêntico ao já indexado (ver document_sync);
+            numa reingestão, só os chunks novos/alterados são vetorizados.
 
         Raises:
             FileNotFoundError: Se o caminho informado não existir.
             RuntimeError: Se a leitura do PDF ou a geração de embeddings falhar.
         """
+        report = progress or (lambda **_: None)
+        pages_parsed = 0
+
+        def _on_pages(count: int) -> None:
+            nonlocal pages_parsed
+            pages_parsed += count
+            report(pages_parsed=pages_parsed)
+
+        # ── 0. Arquivo idêntico ao já ingerido? ─────────────────
+        source, fname = cls._resolve_source(file_path, filename)
+        digest = await document_sync.file_hash(source)
+        document = await document_sync.get_or_create_document(db, fname)
+        if document.file_hash == digest:
+            report(
+                total_pages=document.total_pages or 0, pages_parsed=document.total_pages or 0,
+                chunks_total=document.total_chunks, chunks_embedded=document.total_chunks,
+                chunks_persisted=document.total_chunks,
+            )
+            summary = {
+                "filename": fname,
+                "total_pages": document.total_pages or 0,
+                "total_chunks": document.total_chunks,
+                "status": "unchanged",
+            }
+            print(f"⏭️  {fname}: arquivo idêntico ao já indexado — nada a fazer")
+            return summary
+
         # ── 1. Processar PDF (extrair + chunkar) ────────────────
         try:
-            processed = cls.process_pdf(file_path, filename=filename)
+            processed = await cls.process_pdf_async(source, filename=fname, on_pages=_on_pages)
         except FileNotFoundError:
             raise
         except Exception as exc:
@@ -180,58 +236,101 @@ class BrainService:
                 "Verifique se o arquivo é um PDF válido e não está corrompido."
             ) from exc
 
-        fname = processed["filename"]
         chunks = processed["chunks"]
         total_pages = processed["total_pages"]
         print(f"📄  {fname}: {len(chunks)} chunks de {total_pages} páginas")
+        report(total_pages=total_pages, pages_parsed=total_pages, chunks_total=len(chunks))
+
+        # ── 2. Diff com os chunks já gravados ───────────────────
+        hashes = [content_hash(c) for c in chunks]
+        plan = document_sync.plan_chunks(await document_sync.existing_chunks(db, document), hashes)
+        new_chunks = [chunks[i] for i in plan.new]
+        if plan.kept or plan.stale:
+            print(f"🔁  Reingestão: {len(plan.kept)} mantidos, {len(plan.new)} novos, {len(plan.stale)} removidos")
+
+        # ── 3. Gerar embeddings dos chunks novos (cache + lotes) ─
+        embedded = len(plan.kept)
+        report(chunks_embedded=embedded)
 
-        # ── 2. Gerar embeddings em batches ──────────────────────
-        all_embeddings: list[list[float]] = []
+        def _on_batch(count: int) -> None:
+            nonlocal embedded
+            embedded += count
+            report(chunks_embedded=min(embedded, len(chunks)))
+
+        provider = get_embedding_provider()
         try:
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i : i + batch_size]
-                batch_num = i // batch_size + 1
-                total_batches = (len(chunks) - 1) // batch_size + 1
-                print(f"🔢  Embeddings batch {batch_num}/{total_batches}...")
-                batch_emb = await cls.generate_embeddings(batch)
-                all_embeddings.extend(batch_emb)
+            if not new_chunks:
+                new_embeddings = []
+            else:
+                async def _scheduled(missing: list[str]) -> list[list[float]]:
+                    nonlocal embedded
+                    print(f"🔢  Embeddings ({provider.name}): {len(missing)} chunks fora do cache...")
+                    # Os demais vieram do cache
+                    embedded = len(chunks) - len(missing)
+                    report(chunks_embedded=embedded)
+                    if provider.rate_limited:
+                        return await embedding_scheduler.run(
+                            missing, provider.embed, max_inputs=batch_size, on_batch=_on_batch
+                        )
+                    # Backend local: lotes sequenciais (CPU), sem rate limit
+                    vectors: list[list[float]] = []
+                    for start in range(0, len(missing), batch_size):
+                        batch = missing[start:start + batch_size]
+                        vectors.extend(await provider.embed(batch))
+                        _on_batch(len(batch))
+                    return vectors
+
+                new_embeddings = await embedding_cache.get_or_compute(
+                    new_chunks, _scheduled, model=provider.model
+                )
         except Exception as exc:
             raise RuntimeError(
-                f"Falha ao gerar embeddings via OpenAI: {exc}. "
-                "Verifique sua OPENAI_API_KEY e conectividade."
+                f"Falha ao gerar embeddings ({provider.name}): {exc}. "
+                "Verifique o EMBEDDING_PROVIDER, a OPENAI_API_KEY e a conectividade."
             ) from exc
-
-        # ── 3. Persistir no banco ───────────────────────────────
-        print(f"💾  Salvando {len(chunks)} chunks...")
-        records: list[DocumentChunk] = []
-        for idx, (chunk_text, embedding) in enumerate(zip(chunks, all_embeddings)):
-            records.append(
-                DocumentChunk(
-                    id=uuid4(),
-                    filename=fname,
-                    chunk_index=idx,
-                    content=chunk_text,
-                    embedding=embedding,
-                    metadata_json={
-                        "total_pages": total_pages,
-                        "total_chunks": len(chunks),
-                        "chunk_size": len(chunk_text),
-                    },
-                )
+        report(chunks_embedded=len(chunks))
+
+        # ── 4. Persistir no banco ───────────────────────────────
+        print(f"💾  Salvando {len(new_chunks)} chunks...")
+        rows = [
+            ChunkRow(
+                document_id=document.id,
+                filename=fname,
+                chunk_index=idx,
+                content=chunks[idx],
+                content_hash=hashes[idx],
+                embedding=embedding,
+                metadata_json=document_sync.chunk_metadata(total_pages, len(chunks), chunks[idx]),
             )
+            for idx, embedding in zip(plan.new, new_embeddings)
+        ]
 
         try:
-            db.add_all(records)
-            db.commit()
+            if CHUNK_BULK_COPY:
+                # COPY binário em lotes (conexão dedicada) — ver chunk_writer
+                await copy_chunks(
+                    rows, on_batch=lambda done: report(chunks_persisted=len(plan.kept) + done)
+                )
+            else:
+                await add_chunks_orm(db, rows)
+            # Remove obsoletos, reindexa mantidos e grava o file_hash
+            await document_sync.finalize(
+                db, document, plan, file_hash=digest, total_pages=total_pages, chunks=chunks
+            )
         except Exception as exc:
-            db.rollback()
+            if rows:
+                await delete_chunks([row.id for row in rows])
             raise RuntimeError(f"Erro ao salvar chunks no banco: {exc}") from exc
+        report(chunks_persisted=len(chunks))
 
         summary = {
             "filename": fname,
             "total_pages": total_pages,
             "total_chunks": len(chunks),
             "status": "success",
+            "chunks_added": len(plan.new),
+            "chunks_reused": len(plan.kept),
+            "chunks_removed": len(plan.stale),
         }
         print(f"✅  Ingestão concluída: {summary}")
         return summary
@@ -244,56 +343,126 @@ class BrainService:
     async def semantic_search(
         cls,
         query: str,
-        db: Session,
+        db: AsyncSession,
         *,
         limit: int = 3,
         filename_filter: Optional[str] = None,
+        filters: Optional[SearchFilters] = None,
+        ef_search: Optional[int] = None,
+        mode: Optional[str] = None,
+        rerank_results: Optional[bool] = None,
+        timings: Optional[dict] = None,
     ) -> list[dict]:
         """
-        Busca os chunks mais relevantes usando distância de cosseno.
+        Busca os chunks mais relevantes para a pergunta.
+
+        Em dois estágios (padrão, BRAIN_RERANK): o índice devolve
+        BRAIN_RERANK_CANDIDATES candidatos e o rerank (CPU: cosseno +
+        BM25 + MMR por filename) escolhe os ``limit`` finais — ver rerank.
 
-        Usa o operador <=> do pgvector para calcular a distância.
+        mode="vector": só distância de cosseno (operador <=> do pgvector,
+        índice HNSW com ``hnsw.ef_search`` aplicado via SET LOCAL; com
+        VECTOR_INDEX_PRECISION reduzida, candidatos pelo índice quantizado
+        reordenados pelo vetor completo — ver vector_index.knn).
+        mode="hybrid": cosseno + full-text (content_tsv) fundidos por RRF
+        em uma única query — ver hybrid_search.
 
         Args:
             query: Texto da pergunta em linguagem natural.
-            db: Sessão SQLAlchemy.
+            db: Sessão SQLAlchemy assíncrona.
             limit: Quantidade máxima de resultados (default: 3).
             filename_filter: (Opcional) Filtrar por nome de arquivo.
+            filters: (Opcional) Filtros de metadados (source_type, lead_id,
+                traffic_tier, datas, contenção) aplicados no WHERE do
+                índice, com varredura iterativa do HNSW — ver search_filters.
+            ef_search: (Opcional) hnsw.ef_search desta busca (padrão:
+                HNSW_EF_SEARCH; nunca menor que o número de candidatos nem
+                acima de 1000, o máximo do pgvector).
+            mode: "hybrid" ou "vector" (padrão: BRAIN_SEARCH_MODE).
+            rerank_results: Segundo estágio ligado/desligado (padrão: BRAIN_RERANK).
+            timings: (Opcional) Dict preenchido com embedding_ms, search_ms,
+                rerank_ms (None sem rerank) e candidates.
 
         Returns:
-            Lista de dicts com: id, filename, chunk_index, content, score, metadata.
+            Lista de dicts com: id, filename, chunk_index, content, score
+            (similaridade de cosseno), metadata, rrf_score (só no híbrido)
+            e rerank_score (só com rerank).
         """
+        mode = mode or BRAIN_SEARCH_MODE
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode inválido: {mode!r} (use {', '.join(SEARCH_MODES)})")
+        use_rerank = rerank.BRAIN_RERANK if rerank_results is None else rerank_results
+        final_limit = limit
+        if use_rerank:
+            limit = max(rerank.BRAIN_RERANK_CANDIDATES, limit)
+
+        start = time.perf_counter()
         query_embedding = (await cls.generate_embeddings([query]))[0]
-
-        base_query = (
-            db.query(
-                DocumentChunk.id,
-                DocumentChunk.filename,
-                DocumentChunk.chunk_index,
-                DocumentChunk.content,
-                DocumentChunk.metadata_json,
-                DocumentChunk.embedding.cosine_distance(query_embedding).label("distance"),
+        embedded_at = time.perf_counter()
+
+        def _where(stmt):
+            if filename_filter:
+                stmt = stmt.where(DocumentChunk.filename == filename_filter)
+            if filters:
+                stmt = filters.apply(stmt)
+            return stmt
+
+        filtered = bool(filename_filter or filters)
+        if mode == "hybrid":
+            candidates = max(hybrid_search.HYBRID_CANDIDATES, limit)
+            await vector_index.set_search_params(db, limit=candidates, ef_search=ef_search, filtered=filtered)
+            stmt = hybrid_search.hybrid_select(
+                query, query_embedding, limit=limit, candidates=candidates, where=_where
+            )
+        else:
+            await vector_index.set_search_params(db, limit=limit, ef_search=ef_search, filtered=filtered)
+            distance = DocumentChunk.embedding.cosine_distance(query_embedding)
+            stmt = vector_index.knn(
+                _where(
+                    select(
+                        DocumentChunk.id,
+                        DocumentChunk.filename,
+                        DocumentChunk.chunk_index,
+                        DocumentChunk.content,
+                        DocumentChunk.metadata_json,
+                        distance.label("distance"),
+                    )
+                    .where(DocumentChunk.embedding.isnot(None))
+                ),
+                DocumentChunk.embedding, DocumentChunk.id, query_embedding, limit=limit,
             )
-            .filter(DocumentChunk.embedding.isnot(None))
-        )
-
-        if filename_filter:
-            base_query = base_query.filter(DocumentChunk.filename == filename_filter)
 
-        results = base_query.order_by("distance").limit(limit).all()
+        rows = (await db.execute(stmt)).all()
+        searched_at = time.perf_counter()
 
-        return [
+        results = [
             {
                 "id": str(row.id),
                 "filename": row.filename,
                 "chunk_index": row.chunk_index,
                 "content": row.content,
-                "score": round(1 - row.distance, 4),
+                # Chunk só lexical (sem embedding) não tem distância
+                "score": round(1 - row.distance, 4) if row.distance is not None else 0.0,
                 "metadata": row.metadata_json,
+                "rrf_score": round(float(row.rrf_score), 6) if mode == "hybrid" else None,
             }
-            for row in results
+            for row in rows
         ]
 
+        rerank_ms = None
+        if use_rerank:
+            reranked = rerank.rerank(query, results, limit=final_limit)
+            results, rerank_ms = reranked.items, round(reranked.ms, 1)
+
+        if timings is not None:
+            timings.update(
+                embedding_ms=round((embedded_at - start) * 1000, 1),
+                search_ms=round((searched_at - embedded_at) * 1000, 1),
+                rerank_ms=rerank_ms,
+                candidates=len(rows),
+            )
+        return results
+
     # ────────────────────────────────────────────────────────────
     # 5. CONTAGEM DE CHUNKS INDEXADOS
     # ────────────────────────────────────────────────────────────
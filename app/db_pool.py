@@ -0,0 +1,193 @@
+"""
+DB Pool — Dimensionamento por papel do processo e métricas do pool de conexões
+==============================================================================
+O tamanho do pool depende de quem usa o engine (``DB_POOL_ROLE``):
+
+  - api     → processo uvicorn atendendo requisições (padrão)
+  - worker  → processos em background (fila de ingestão, manutenção agendada)
+  - script  → comandos pontuais em scripts/ (1 conexão basta)
+
+Cada valor pode ser sobrescrito por env (``DB_POOL_SIZE``, ``DB_MAX_OVERFLOW``,
+``DB_POOL_TIMEOUT``, ``DB_POOL_RECYCLE``, ``DB_POOL_PRE_PING``). Em deploys
+com N workers uvicorn, o total de conexões é N × (pool_size + max_overflow)
+por engine — use as métricas abaixo para ajustar a partir de dados.
+
+Métricas por pool (expostas em /system/metrics → ``db_pool``):
+  - tempo de espera no checkout (total / máximo) e timeouts de exaustão
+  - custo do pre-ping (total / máximo)
+  - conexões em uso, overflow ativo, conexões criadas e invalidadas
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+log = logging.getLogger("vyron.db_pool")
+
+# ── Perfis de dimensionamento por papel ──────────────────────────
+_ROLE_DEFAULTS: Dict[str, Dict[str, int]] = {
+    "api": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30},
+    "worker": {"pool_size": 4, "max_overflow": 4, "pool_timeout": 60},
+    "script": {"pool_size": 2, "max_overflow": 0, "pool_timeout": 60},
+}
+
+DB_POOL_ROLE = os.getenv("DB_POOL_ROLE", "api").lower()
+if DB_POOL_ROLE not in _ROLE_DEFAULTS:
+    log.warning("DB_POOL_ROLE desconhecido (%r) — usando 'api'.", DB_POOL_ROLE)
+    DB_POOL_ROLE = "api"
+
+# Lag entre o fim da espera no pool e o evento "checkout" = custo do pre-ping
+_GOT_AT_KEY = "vyron_pool_got_at"
+
+
+def pool_settings(role: str | None = None) -> Dict[str, Any]:
+    """
+    Parâmetros de pool para ``create_engine`` / ``create_async_engine``.
+
+    Args:
+        role: Papel do processo; padrão ``DB_POOL_ROLE``.
+    """
+    defaults = _ROLE_DEFAULTS[role or DB_POOL_ROLE]
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", defaults["pool_size"])),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", defaults["max_overflow"])),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", defaults["pool_timeout"])),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+
+
+# ────────────────────────────────────────────────────────────
+# MÉTRICAS
+# ────────────────────────────────────────────────────────────
+
+class PoolMetrics:
+    """Contadores de um pool (thread-safe: psycopg2 faz checkout em threads)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.pre_ping_ms_total = 0.0
+        self.pre_ping_ms_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_wait(self, ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += ms
+            self.wait_ms_max = max(self.wait_ms_max, ms)
+
+    def record_pre_ping(self, ms: float) -> None:
+        with self._lock:
+            self.pre_ping_ms_total += ms
+            self.pre_ping_ms_max = max(self.pre_ping_ms_max, ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool: QueuePool) -> Dict[str, Any]:
+        checkouts = self.checkouts or 1
+        return {
+            "pool_size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "checkouts": self.checkouts,
+            "wait_ms_avg": round(self.wait_ms_total / checkouts, 2),
+            "wait_ms_max": round(self.wait_ms_max, 2),
+            "pre_ping_ms_avg": round(self.pre_ping_ms_total / checkouts, 2),
+            "pre_ping_ms_max": round(self.pre_ping_ms_max, 2),
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+        }
+
+
+class _InstrumentedPoolMixin:
+    """Mede a espera em ``_do_get`` e conta timeouts de exaustão."""
+
+    _metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            if self._metrics is not None:
+                self._metrics.record_timeout()
+                log.warning("Pool %s esgotado (timeout no checkout).", self._metrics.name)
+            raise
+        got_at = time.perf_counter()
+        if self._metrics is not None:
+            self._metrics.record_wait((got_at - start) * 1000)
+        record.info[_GOT_AT_KEY] = got_at
+        return record
+
+    def recreate(self):
+        # engine.dispose() recria o pool — as métricas sobrevivem
+        new_pool = super().recreate()
+        new_pool._metrics = self._metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool (psycopg2) com métricas de checkout."""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool (asyncpg) com métricas de checkout."""
+
+
+# Registro global: nome → pool instrumentado
+_pools: Dict[str, Any] = {}
+
+
+def instrument(engine, name: str) -> None:
+    """
+    Liga as métricas ao pool de um engine criado com ``poolclass`` instrumentado.
+
+    Aceita Engine ou AsyncEngine (usa o ``sync_engine`` subjacente).
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool = sync_engine.pool
+    metrics = PoolMetrics(name)
+    pool._metrics = metrics
+    _pools[name] = sync_engine
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        got_at = record.info.pop(_GOT_AT_KEY, None)
+        if got_at is not None:
+            metrics.record_pre_ping((time.perf_counter() - got_at) * 1000)
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_conn, record):
+        metrics.connects += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_conn, record, exception):
+        metrics.invalidations += 1
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Snapshot de todos os pools instrumentados."""
+    stats: Dict[str, Any] = {"role": DB_POOL_ROLE}
+    for name, sync_engine in _pools.items():
+        pool = sync_engine.pool
+        if pool._metrics is not None:
+            stats[name] = pool._metrics.snapshot(pool)
+    return stats
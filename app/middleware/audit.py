@@ -6,19 +6,23 @@ Intercepta requisições POST, PATCH, PUT e DELETE, armazenando:
 - O quê (método, path, body resumido)
 - Quando (timestamp)
 - Resultado (status code, duração)
+
+Implementado como middleware ASGI puro: o body NÃO é bufferizado. O stream
+``receive`` é repassado ao handler intacto e apenas os primeiros
+``_PREVIEW_LIMIT`` bytes são copiados para redação/preview. Uploads grandes
+(PDFs em /brain/upload, imagens Base64 em /ai/chat) não geram uma segunda
+cópia em memória.
 """
 
+import re
 import time
 import json
 from uuid import uuid4
 from datetime import datetime
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.database import SessionLocal
-from app.models import AuditLog
+from app.middleware.audit_writer import audit_writer
 
 
 # Métodos que representam alteração de dados
@@ -27,77 +31,114 @@ _WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
 # Paths que NÃO devem ser auditados (health-checks, GET-only, etc.)
 _SKIP_PATHS = {"/", "/docs", "/openapi.json", "/redoc", "/db-test"}
 
+# Quantos bytes do body são copiados para o registro de auditoria
+_PREVIEW_LIMIT = 4096
+
+# Campos sensíveis mascarados no registro
+_SENSITIVE_KEYS = ("password", "password_hash", "token", "secret", "image")
+
+# Mascara "chave": "valor" mesmo em JSON truncado (valor sem aspas de fechamento)
+_SENSITIVE_RE = re.compile(
+    r'("(?:%s)"\s*:\s*)"(?:[^"\\]|\\.)*"?' % "|".join(_SENSITIVE_KEYS)
+)
+
+
+def _summarize_body(preview: bytes, truncated: bool, total_size: int) -> dict | None:
+    """Monta o resumo do body a partir do preview capturado."""
+    if not preview:
+        return None
+
+    body_text = preview.decode("utf-8", errors="replace")
 
-class AuditMiddleware(BaseHTTPMiddleware):
+    if not truncated:
+        # Body completo: tenta parsear como JSON
+        try:
+            body_json = json.loads(body_text)
+            if isinstance(body_json, dict):
+                # Remove campos sensíveis
+                for sensitive_key in _SENSITIVE_KEYS:
+                    if sensitive_key in body_json:
+                        body_json[sensitive_key] = "***REDACTED***"
+            return body_json
+        except (json.JSONDecodeError, ValueError):
+            pass
+
+    # Não é JSON (multipart upload, etc.) ou foi truncado — guarda resumo
+    summary = {"_raw_preview": _SENSITIVE_RE.sub(r'\1"***REDACTED***"', body_text)[:200]}
+    if truncated:
+        summary["_truncated"] = True
+        summary["_size"] = total_size
+    return summary
+
+
+class AuditMiddleware:
     """
-    Middleware que intercepta requisições de escrita e grava um registro
-    na tabela audit_logs com detalhes da ação.
+    Middleware ASGI que intercepta requisições de escrita e enfileira um registro
+    para a tabela audit_logs (gravado em lote pelo AuditLogWriter).
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        # Só audita métodos de escrita
-        if request.method not in _WRITE_METHODS:
-            return await call_next(request)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Só audita requisições HTTP de escrita
+        if scope["type"] != "http" or scope["method"] not in _WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
 
         # Ignora paths de infraestrutura
-        if request.url.path in _SKIP_PATHS:
-            return await call_next(request)
+        path = scope["path"]
+        if path in _SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
 
         # Captura dados da request
-        client_ip = request.client.host if request.client else None
-        user_agent = request.headers.get("user-agent", "")[:500]
-        path = request.url.path
-
-        # Tenta ler o body (para POST/PUT/PATCH)
-        request_body = None
-        try:
-            body_bytes = await request.body()
-            if body_bytes:
-                body_text = body_bytes.decode("utf-8", errors="replace")
-                # Tenta parsear como JSON, limitando tamanho
-                try:
-                    body_json = json.loads(body_text)
-                    # Remove campos sensíveis
-                    for sensitive_key in ("password", "password_hash", "token", "secret", "image"):
-                        if sensitive_key in body_json:
-                            body_json[sensitive_key] = "***REDACTED***"
-                    request_body = body_json
-                except (json.JSONDecodeError, ValueError):
-                    # Não é JSON (multipart upload, etc.) — guarda resumo
-                    request_body = {"_raw_preview": body_text[:200]}
-        except Exception:
-            pass  # Se não conseguir ler, segue sem body
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        client = scope.get("client")
+        client_ip = client[0] if client else None
+        user_agent = headers.get("user-agent", "")[:500]
+
+        preview = bytearray()
+        body_size = 0
+        status_code = 500
+
+        async def receive_tee() -> Message:
+            # Repassa o chunk intacto; copia só o início para o preview
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                room = _PREVIEW_LIMIT - len(preview)
+                if room > 0 and chunk:
+                    preview.extend(chunk[:room])
+            return message
+
+        async def send_capture(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
         # Executa a requisição real
         start = time.perf_counter()
-        response = await call_next(request)
-        duration_ms = int((time.perf_counter() - start) * 1000)
-
-        # Grava no banco de forma assíncrona (em thread separada para não bloquear)
         try:
-            db = SessionLocal()
-            try:
-                log_entry = AuditLog(
-                    id=uuid4(),
-                    timestamp=datetime.utcnow(),
-                    method=request.method,
-                    path=path,
-                    status_code=response.status_code,
-                    user_agent=user_agent,
-                    client_ip=client_ip,
-                    request_body=request_body,
-                    response_summary=f"{response.status_code} in {duration_ms}ms",
-                    duration_ms=duration_ms,
-                )
-                db.add(log_entry)
-                db.commit()
-            except Exception as exc:
-                db.rollback()
-                # Log silencioso — middleware não deve derrubar a requisição
-                # print(f"[WARN] Audit log falhou: {exc}")
-            finally:
-                db.close()
-        except Exception:
-            pass  # Pool exausto ou DB offline — ignora silenciosamente
-
-        return response
+            await self.app(scope, receive_tee, send_capture)
+        finally:
+            duration_ms = int((time.perf_counter() - start) * 1000)
+
+            # Enfileira para o writer em lote (sem I/O no caminho da requisição)
+            audit_writer.enqueue({
+                "id": uuid4(),
+                "timestamp": datetime.utcnow(),
+                "method": scope["method"],
+                "path": path,
+                "status_code": status_code,
+                "user_agent": user_agent,
+                "client_ip": client_ip,
+                "request_body": _summarize_body(
+                    bytes(preview), body_size > len(preview), body_size
+                ),
+                "response_summary": f"{status_code} in {duration_ms}ms",
+                "duration_ms": duration_ms,
+            })
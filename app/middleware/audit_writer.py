@@ -0,0 +1,208 @@
+"""
+Audit Writer — Gravação assíncrona e em lote dos registros de auditoria.
+
+O middleware apenas enfileira o registro (sem I/O) e um worker em background
+drena a fila em lotes, gravando com um único INSERT multi-row:
+  - a cada AUDIT_FLUSH_INTERVAL_MS milissegundos, ou
+  - assim que AUDIT_BATCH_SIZE registros estiverem acumulados.
+
+A fila é limitada (AUDIT_QUEUE_MAXSIZE). Quando cheia, o registro é descartado
+e contabilizado em ``dropped`` — auditoria nunca deve derrubar a requisição.
+No shutdown, tudo que estiver na fila é gravado antes de encerrar.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import SessionLocal
+from app.models import AuditLog
+
+log = logging.getLogger("vyron.audit_writer")
+
+_QUEUE_MAXSIZE = int(os.getenv("AUDIT_QUEUE_MAXSIZE", "10000"))
+_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "500"))
+
+
+class AuditLogWriter:
+    """Fila limitada + worker que grava registros de auditoria em lote."""
+
+    def __init__(
+        self,
+        *,
+        maxsize: int = _QUEUE_MAXSIZE,
+        batch_size: int = _BATCH_SIZE,
+        flush_interval_ms: int = _FLUSH_INTERVAL_MS,
+    ) -> None:
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=maxsize)
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+
+        # Contadores expostos via stats()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.overflows = 0
+        self.failed_batches = 0
+        self.pool_timeouts = 0
+        self.batches = 0
+        self.last_flush_ms = 0
+        self._overflowing = False
+
+    # ────────────────────────────────────────────────────────────
+    # PRODUTOR (chamado pelo middleware)
+    # ────────────────────────────────────────────────────────────
+
+    def enqueue(self, record: Dict[str, Any]) -> bool:
+        """
+        Enfileira um registro sem bloquear.
+
+        Returns:
+            True se o registro entrou na fila, False se foi descartado.
+        """
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            # Conta cada episódio de overflow apenas uma vez
+            if not self._overflowing:
+                self._overflowing = True
+                self.overflows += 1
+                log.warning("Fila de auditoria cheia (%d) — descartando registros.", self.maxsize)
+            return False
+
+        self._overflowing = False
+        self.enqueued += 1
+        return True
+
+    # ────────────────────────────────────────────────────────────
+    # CICLO DE VIDA
+    # ────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Inicia o worker no event loop corrente (idempotente)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="audit-log-writer")
+
+    async def stop(self) -> None:
+        """Para o worker e grava tudo o que ainda estiver na fila."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._inflight is not None:
+            await self._inflight
+            self._inflight = None
+
+        while not self._queue.empty():
+            await self._flush(self._drain(self.batch_size))
+
+    # ────────────────────────────────────────────────────────────
+    # WORKER
+    # ────────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while True:
+            # Espera o primeiro registro do lote sem timeout (fila ociosa)
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            try:
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Shutdown no meio da coleta: o lote parcial não pode se perder
+                await self._flush(batch)
+                raise
+
+            # shield: um cancelamento durante a gravação não interrompe o INSERT;
+            # stop() aguarda este lote antes de drenar o restante da fila.
+            self._inflight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._inflight)
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            # I/O síncrono do psycopg2 fica fora do event loop
+            await asyncio.to_thread(self._write_batch, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except sa_exc.TimeoutError:
+            # Pool esgotado: o lote é perdido, mas o motivo fica visível
+            self.failed_batches += 1
+            self.pool_timeouts += 1
+            self.dropped += len(batch)
+            log.error("Pool de conexões esgotado — lote de auditoria descartado (%d registros).", len(batch))
+        except Exception as exc:
+            self.failed_batches += 1
+            self.dropped += len(batch)
+            log.warning("Falha ao gravar lote de auditoria (%d registros): %s", len(batch), exc)
+        finally:
+            self.last_flush_ms = int((time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def _write_batch(batch: List[Dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(pg_insert(AuditLog).values(batch))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # ────────────────────────────────────────────────────────────
+    # MÉTRICAS
+    # ────────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot dos contadores do writer."""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "queue_size": self._queue.qsize(),
+            "queue_maxsize": self.maxsize,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "overflows": self.overflows,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "pool_timeouts": self.pool_timeouts,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+# Instância única compartilhada pelo middleware e pelo ciclo de vida da app
+audit_writer = AuditLogWriter()
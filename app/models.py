@@ -8,11 +8,11 @@ from typing import List, Optional
 from uuid import uuid4
 
 from sqlalchemy import (
-    String, Integer, Numeric, Boolean, Date, DateTime, Text,
-    ForeignKey, CheckConstraint, Index
+    String, Integer, Numeric, Boolean, Date, DateTime, Text, LargeBinary,
+    ForeignKey, CheckConstraint, Index, Computed, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from pgvector.sqlalchemy import Vector
 
 from app.database import Base
@@ -150,7 +150,14 @@ class Interaction(Base):
     __table_args__ = (
         Index('idx_interactions_client', 'client_id'),
         Index('idx_interactions_date', 'interaction_date'),
-        Index('idx_interactions_embedding', 'content_embedding', postgresql_using='ivfflat', postgresql_ops={'content_embedding': 'vector_cosine_ops'}),
+        # HNSW: não depende de treino (ver app/modules/brain/vector_index.py)
+        Index(
+            'idx_interactions_embedding_hnsw',
+            'content_embedding',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'content_embedding': 'vector_cosine_ops'},
+        ),
     )
 
 
@@ -491,6 +498,26 @@ class MarketingMetric(Base):
 # MÓDULO: DOCUMENT RAG (Ingestão de Documentos)
 # ============================================
 
+class Document(Base):
+    """
+    Documento ingerido (um por filename).
+
+    ``file_hash`` (sha256 dos bytes do PDF) só é gravado quando a ingestão
+    termina: um reenvio idêntico é ignorado, e um arquivo editado passa
+    pelo diff de chunks (``DocumentChunk.content_hash``).
+    """
+    __tablename__ = "documents"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    filename: Mapped[str] = mapped_column(String(500), unique=True, nullable=False)
+    file_hash: Mapped[Optional[str]] = mapped_column(String(64))   # sha256 hex
+    total_pages: Mapped[Optional[int]] = mapped_column(Integer)
+    total_chunks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class DocumentChunk(Base):
     """
     Chunks de documentos processados para RAG.
@@ -501,29 +528,118 @@ class DocumentChunk(Base):
     __tablename__ = "document_chunks"
 
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    document_id: Mapped[Optional[UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE")
+    )
     filename: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), comment="sha256 hex do content (diff na reingestão)")
+    # Busca lexical da busca híbrida (gerada pelo banco — nunca gravada pela aplicação)
+    content_tsv: Mapped[Optional[str]] = mapped_column(TSVECTOR, Computed("to_tsvector('portuguese', content)", persisted=True))
     embedding: Mapped[list] = mapped_column(Vector(1536), nullable=True)
     metadata_json: Mapped[Optional[dict]] = mapped_column(
         JSONB,
         nullable=True,
         comment="Metadados extras: page_number, total_pages, chunk_size, source_type, etc."
     )
+    # Chaves do metadata_json promovidas para os filtros da busca (geradas pelo banco)
+    source_type: Mapped[Optional[str]] = mapped_column(
+        String(50), Computed("coalesce(metadata_json ->> 'source_type', 'document')", persisted=True)
+    )
+    lead_id: Mapped[Optional[UUID]] = mapped_column(
+        UUID(as_uuid=True), Computed("(metadata_json ->> 'lead_id')::uuid", persisted=True)
+    )
+    traffic_tier: Mapped[Optional[str]] = mapped_column(
+        String(20), Computed("metadata_json ->> 'traffic_tier'", persisted=True)
+    )
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     __table_args__ = (
         Index('idx_document_chunks_filename', 'filename'),
+        Index('idx_document_chunks_document', 'document_id'),
+        Index('idx_document_chunks_source_type', 'source_type'),
+        Index('idx_document_chunks_lead', 'lead_id', postgresql_where=text('lead_id IS NOT NULL')),
+        Index('idx_document_chunks_traffic_tier', 'traffic_tier', postgresql_where=text('traffic_tier IS NOT NULL')),
+        Index('idx_document_chunks_created_at', 'created_at'),
         Index(
-            'idx_document_chunks_embedding',
+            'idx_document_chunks_metadata',
+            'metadata_json',
+            postgresql_using='gin',
+            postgresql_ops={'metadata_json': 'jsonb_path_ops'},
+        ),
+        Index('idx_document_chunks_content_tsv', 'content_tsv', postgresql_using='gin'),
+        # HNSW: não depende de treino (ver app/modules/brain/vector_index.py)
+        Index(
+            'idx_document_chunks_embedding_hnsw',
             'embedding',
-            postgresql_using='ivfflat',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
             postgresql_ops={'embedding': 'vector_cosine_ops'},
         ),
     )
 
 
+class EmbeddingCacheEntry(Base):
+    """
+    Cache persistente de embeddings, chaveado por (modelo, sha256 do texto).
+
+    Segundo nível do cache de ``app/modules/brain/embedding_cache.py``
+    (o primeiro é um LRU em memória por processo).
+    """
+    __tablename__ = "embedding_cache"
+
+    model: Mapped[str] = mapped_column(String(100), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)   # sha256 hex
+    embedding: Mapped[list] = mapped_column(Vector(1536), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('idx_embedding_cache_created_at', 'created_at'),
+    )
+
+
+class IngestionJob(Base):
+    """
+    Fila de ingestão de PDFs (/brain/upload e /brain/ingest).
+
+    Os workers reservam jobs com ``FOR UPDATE SKIP LOCKED`` — ver
+    ``app/modules/brain/ingestion_jobs.py``. O PDF enviado por upload fica
+    em ``payload`` até a ingestão terminar com sucesso.
+    """
+    __tablename__ = "ingestion_jobs"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    filename: Mapped[str] = mapped_column(String(500), nullable=False)
+    source_path: Mapped[Optional[str]] = mapped_column(Text, comment="Caminho no servidor (/brain/ingest)")
+    payload: Mapped[Optional[bytes]] = mapped_column(LargeBinary, deferred=True, comment="Bytes do upload (limpo após sucesso)")
+
+    total_pages: Mapped[Optional[int]] = mapped_column(Integer)
+    pages_parsed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    chunks_total: Mapped[Optional[int]] = mapped_column(Integer)
+    chunks_embedded: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    chunks_persisted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(255))
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('queued', 'running', 'succeeded', 'failed')",
+            name='valid_ingestion_job_status',
+        ),
+        Index('idx_ingestion_jobs_status_created', 'status', 'created_at'),
+    )
+
+
 # ============================================
 # MÓDULO: LEAD DISCOVERY (Histórico do Lead Hunter)
 # ============================================
@@ -602,11 +718,17 @@ class CompetitorIntel(Base):
 # ============================================
 
 class AuditLog(Base):
-    """Registra toda ação de alteração de dados no sistema."""
+    """
+    Registra toda ação de alteração de dados no sistema.
+
+    Tabela particionada por RANGE mensal em ``timestamp`` (partições criadas
+    antecipadamente por ``scripts/audit_maintenance.py``). Por isso a PK é
+    composta (id, timestamp) — o Postgres exige a chave de partição na PK.
+    """
     __tablename__ = "audit_logs"
 
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow, index=True)
     method: Mapped[str] = mapped_column(String(50), nullable=False)           # POST, PATCH, PUT, DELETE, BATCH, SPY...
     path: Mapped[str] = mapped_column(String(500), nullable=False)            # /clients, /projects/...
     status_code: Mapped[int] = mapped_column(Integer, nullable=False)         # 200, 201, 400…
@@ -616,7 +738,37 @@ class AuditLog(Base):
     response_summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
+    # Um índice composto por filtro de /audit-logs/page, todos terminando em
+    # (timestamp, id) para servir a ordenação do keyset sem sort extra.
+    __table_args__ = (
+        Index('idx_audit_logs_ts_id', 'timestamp', 'id'),
+        Index('idx_audit_logs_path_ts', 'path', 'timestamp', postgresql_ops={'path': 'varchar_pattern_ops'}),
+        Index('idx_audit_logs_method_ts', 'method', 'timestamp', 'id'),
+        Index('idx_audit_logs_status_ts', 'status_code', 'timestamp'),
+        Index('idx_audit_logs_client_ip_ts', 'client_ip', 'timestamp', 'id'),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+
+class AuditLogRollup(Base):
+    """
+    Agregados horários por path dos registros de auditoria.
+
+    Pré-computados por ``scripts/audit_maintenance.py rollup`` para que
+    dashboards nunca varram as linhas brutas de audit_logs.
+    """
+    __tablename__ = "audit_log_rollups"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)      # início da hora (date_trunc)
+    path: Mapped[str] = mapped_column(String(500), primary_key=True)
+    request_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    client_error_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 4xx
+    error_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)         # 5xx
+    error_rate: Mapped[Decimal] = mapped_column(Numeric(5, 4), nullable=False, default=Decimal('0'))
+    p50_duration_ms: Mapped[Optional[int]] = mapped_column(Integer)
+    p95_duration_ms: Mapped[Optional[int]] = mapped_column(Integer)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     __table_args__ = (
-        Index('idx_audit_logs_timestamp', 'timestamp'),
-        Index('idx_audit_logs_path', 'path'),
+        Index('idx_audit_log_rollups_path_bucket', 'path', 'bucket'),
     )
@@ -0,0 +1,183 @@
+"""
+Chunk Writer — Gravação em massa de document_chunks via COPY binário
+====================================================================
+O caminho ORM (``db.add_all`` + commit) monta um objeto por chunk e envia
+cada vetor de 1 536 floats como parâmetro de texto de um INSERT. Aqui as
+linhas vão por ``COPY document_chunks (...) FROM STDIN (FORMAT binary)``
+(``copy_records_to_table`` do asyncpg), com os vetores no formato binário
+do pgvector:
+
+  - conexão asyncpg dedicada, fora do pool do ORM — o codec binário de
+    ``vector`` (pgvector.asyncpg.register_vector) só é registrado nela; as
+    conexões do async_engine continuam enviando vetores como texto
+  - transações limitadas a CHUNK_COPY_BATCH_ROWS linhas (o WAL e os locks
+    de um PDF enorme não ficam pendurados em uma única transação)
+  - se um lote falhar, os lotes já confirmados desta gravação são apagados
+    (o documento não fica pela metade)
+
+Benchmark contra o caminho ORM: scripts/benchmark_chunk_writer.py.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import ASYNC_DATABASE_URL, async_engine
+from app.models import DocumentChunk
+
+log = logging.getLogger("vyron.brain.chunk_writer")
+
+CHUNK_BULK_COPY = os.getenv("CHUNK_BULK_COPY", "true").lower() in ("1", "true", "yes")
+CHUNK_COPY_BATCH_ROWS = int(os.getenv("CHUNK_COPY_BATCH_ROWS", "5000"))
+
+COPY_COLUMNS = (
+    "id", "document_id", "filename", "chunk_index", "content", "content_hash",
+    "embedding", "metadata_json", "created_at",
+)
+
+
+@dataclass
+class ChunkRow:
+    """Uma linha de document_chunks pronta para gravação."""
+    filename: str
+    chunk_index: int
+    content: str
+    embedding: Optional[List[float]]
+    metadata_json: Optional[Dict[str, Any]] = None
+    document_id: Optional[UUID] = None
+    content_hash: Optional[str] = None
+    id: UUID = field(default_factory=uuid4)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def as_record(self) -> tuple:
+        """Tupla na ordem de COPY_COLUMNS (jsonb vai como texto)."""
+        metadata = json.dumps(self.metadata_json) if self.metadata_json is not None else None
+        return (self.id, self.document_id, self.filename, self.chunk_index, self.content,
+                self.content_hash, self.embedding, metadata, self.created_at)
+
+
+def _batched(rows: Iterable[ChunkRow], size: int) -> Iterator[List[ChunkRow]]:
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+# ────────────────────────────────────────────────────────────
+# COPY BINÁRIO (conexão dedicada)
+# ────────────────────────────────────────────────────────────
+
+async def _connect():
+    """Conexão asyncpg avulsa com o codec binário de vector registrado."""
+    import asyncpg
+    from pgvector.asyncpg import register_vector
+
+    url = make_url(ASYNC_DATABASE_URL)
+    conn = await asyncpg.connect(
+        user=url.username,
+        password=url.password,
+        host=url.host,
+        port=url.port,
+        database=url.database,
+        ssl=url.query.get("ssl"),
+    )
+    try:
+        await register_vector(conn)
+    except Exception:
+        await conn.close()
+        raise
+    return conn
+
+
+async def copy_chunks(
+    rows: Iterable[ChunkRow],
+    *,
+    batch_rows: int = CHUNK_COPY_BATCH_ROWS,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Grava ``rows`` em document_chunks com COPY binário, uma transação por
+    lote de ``batch_rows`` linhas. ``rows`` pode ser um gerador (consumido
+    lote a lote).
+
+    ``on_batch`` (opcional) recebe o total de linhas já confirmadas.
+
+    Returns:
+        Quantidade de linhas gravadas.
+
+    Raises:
+        Exception: O erro do lote que falhou (os lotes anteriores são desfeitos).
+    """
+    conn = await _connect()
+    written_ids: List[UUID] = []
+    try:
+        for batch in _batched(rows, batch_rows):
+            start = time.perf_counter()
+            async with conn.transaction():
+                await conn.copy_records_to_table(
+                    "document_chunks",
+                    records=[row.as_record() for row in batch],
+                    columns=COPY_COLUMNS,
+                )
+            written_ids.extend(row.id for row in batch)
+            log.debug("COPY: %d linhas em %.0f ms", len(batch), (time.perf_counter() - start) * 1000)
+            if on_batch is not None:
+                on_batch(len(written_ids))
+    except BaseException:
+        if written_ids:
+            try:
+                await conn.execute("DELETE FROM document_chunks WHERE id = ANY($1::uuid[])", written_ids)
+            except Exception as exc:
+                log.error("Falha ao desfazer %d chunks já gravados: %s", len(written_ids), exc)
+        raise
+    finally:
+        await conn.close()
+    return len(written_ids)
+
+
+async def delete_chunks(ids: Sequence[UUID]) -> None:
+    """Desfaz chunks já confirmados (falha em uma etapa posterior da ingestão)."""
+    try:
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(DocumentChunk).where(DocumentChunk.id.in_(list(ids))))
+    except Exception as exc:
+        log.error("Falha ao desfazer %d chunks gravados: %s", len(ids), exc)
+
+
+# ────────────────────────────────────────────────────────────
+# CAMINHO ORM (fallback com CHUNK_BULK_COPY=false e baseline do benchmark)
+# ────────────────────────────────────────────────────────────
+
+async def add_chunks_orm(db: AsyncSession, rows: Sequence[ChunkRow]) -> int:
+    """``db.add_all`` + commit em uma única transação."""
+    try:
+        db.add_all([
+            DocumentChunk(
+                id=row.id,
+                document_id=row.document_id,
+                filename=row.filename,
+                chunk_index=row.chunk_index,
+                content=row.content,
+                content_hash=row.content_hash,
+                embedding=row.embedding,
+                metadata_json=row.metadata_json,
+                created_at=row.created_at,
+            )
+            for row in rows
+        ])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return len(rows)
@@ -0,0 +1,160 @@
+"""
+Document Sync — Reingestão incremental (hash do arquivo + diff de chunks)
+=========================================================================
+Usado por ``BrainService.ingest_pdf`` para que reenviar um PDF não duplique
+os chunks do mesmo ``filename``:
+
+  1. sha256 dos bytes do arquivo igual ao ``documents.file_hash`` gravado
+     → nada a fazer (nem extração, nem embeddings)
+  2. arquivo diferente → os chunks novos são comparados por
+     ``content_hash`` com os já gravados:
+       - mesmo conteúdo  → o chunk existente é mantido (só índice/metadados
+                            são atualizados; o vetor não é recalculado)
+       - conteúdo novo   → embedding + COPY
+       - não aparece mais → DELETE
+
+O ``file_hash`` só é gravado no fim (``finalize``): uma ingestão que falhar
+no meio é refeita por completo no próximo envio.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Document, DocumentChunk
+
+_READ_BLOCK = 1024 * 1024
+
+
+def _hash_path(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(_READ_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def file_hash(source: str | Path | io.BytesIO) -> str:
+    """sha256 hex do PDF (arquivos são lidos fora do event loop)."""
+    if isinstance(source, io.BytesIO):
+        return hashlib.sha256(source.getbuffer()).hexdigest()
+    return await asyncio.to_thread(_hash_path, str(source))
+
+
+# ────────────────────────────────────────────────────────────
+# DIFF
+# ────────────────────────────────────────────────────────────
+
+@dataclass
+class ChunkPlan:
+    """Resultado do diff entre os chunks gravados e os da nova versão."""
+    new: List[int] = field(default_factory=list)                   # índices a vetorizar/gravar
+    kept: List[Tuple[UUID, int]] = field(default_factory=list)     # (id existente, novo índice)
+    stale: List[UUID] = field(default_factory=list)                # ids a apagar
+
+
+def plan_chunks(existing: Sequence[Tuple[UUID, Optional[str]]], hashes: Sequence[str]) -> ChunkPlan:
+    """
+    Casa os chunks novos (``hashes``, em ordem) com os existentes
+    (``(id, content_hash)``). Conteúdo repetido é casado um a um — cópias
+    a mais de um mesmo texto (reingestões antigas) viram ``stale``.
+    """
+    pool: Dict[str, List[UUID]] = defaultdict(list)
+    for chunk_id, h in existing:
+        pool[h or ""].append(chunk_id)
+
+    plan = ChunkPlan()
+    for idx, h in enumerate(hashes):
+        ids = pool.get(h)
+        if ids:
+            plan.kept.append((ids.pop(), idx))
+        else:
+            plan.new.append(idx)
+    plan.stale = [chunk_id for ids in pool.values() for chunk_id in ids]
+    return plan
+
+
+# ────────────────────────────────────────────────────────────
+# BANCO
+# ────────────────────────────────────────────────────────────
+
+async def get_or_create_document(db: AsyncSession, filename: str) -> Document:
+    """Registro do documento (criado e confirmado antes do COPY dos chunks — FK)."""
+    await db.execute(
+        pg_insert(Document)
+        .values(id=uuid4(), filename=filename, total_chunks=0, created_at=datetime.utcnow(),
+                updated_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["filename"])
+    )
+    await db.commit()
+    return (await db.scalars(select(Document).where(Document.filename == filename))).one()
+
+
+async def existing_chunks(db: AsyncSession, document: Document) -> List[Tuple[UUID, Optional[str]]]:
+    """(id, content_hash) dos chunks gravados do documento."""
+    rows = await db.execute(
+        select(DocumentChunk.id, DocumentChunk.content_hash)
+        .where(DocumentChunk.document_id == document.id)
+    )
+    return [(r.id, r.content_hash) for r in rows]
+
+
+async def finalize(
+    db: AsyncSession,
+    document: Document,
+    plan: ChunkPlan,
+    *,
+    file_hash: str,
+    total_pages: int,
+    chunks: Sequence[str],
+) -> None:
+    """
+    Em uma transação: apaga os chunks obsoletos, reindexa os mantidos e
+    grava o novo ``file_hash`` do documento.
+    """
+    try:
+        if plan.stale:
+            await db.execute(delete(DocumentChunk).where(DocumentChunk.id.in_(plan.stale)))
+        if plan.kept:
+            # UPDATE em massa por PK (sem tocar no embedding)
+            await db.execute(
+                update(DocumentChunk),
+                [
+                    {
+                        "id": chunk_id,
+                        "chunk_index": idx,
+                        "metadata_json": chunk_metadata(total_pages, len(chunks), chunks[idx]),
+                    }
+                    for chunk_id, idx in plan.kept
+                ],
+            )
+        await db.execute(
+            update(Document)
+            .where(Document.id == document.id)
+            .values(file_hash=file_hash, total_pages=total_pages, total_chunks=len(chunks),
+                    updated_at=datetime.utcnow())
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+
+def chunk_metadata(total_pages: int, total_chunks: int, content: str) -> dict:
+    return {
+        "total_pages": total_pages,
+        "total_chunks": total_chunks,
+        "chunk_size": len(content),
+    }
@@ -0,0 +1,254 @@
+"""
+Embedding Cache — Cache de embeddings em dois níveis, chaveado por conteúdo
+===========================================================================
+Evita chamar a API de embeddings para textos já vetorizados (queries de chat
+repetidas, PDFs reingeridos, resumos do Spy com force_refresh, templates
+fixos de RAG).
+
+  1. LRU em memória (por processo)  — EMBEDDING_CACHE_SIZE entradas,
+     expiração em EMBEDDING_CACHE_TTL_SECONDS. Vetores guardados como
+     ``array('f')`` (float32, ~6 KB para 1536 dims, contra ~49 KB de uma
+     lista de floats Python) e convertidos para lista na leitura
+  2. Tabela ``embedding_cache``     — chave (modelo, sha256(texto)),
+     expiração em EMBEDDING_CACHE_DB_TTL_DAYS e teto de linhas
+     EMBEDDING_CACHE_DB_MAX_ROWS (podado por scripts/prune_embedding_cache.py)
+
+Vetores zerados (fallback de erro da API) nunca são cacheados. Falhas no
+nível persistente são contabilizadas e ignoradas — o cache nunca derruba
+uma busca.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+
+from app.database import async_engine
+from app.models import EmbeddingCacheEntry
+
+log = logging.getLogger("vyron.brain.embedding_cache")
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "5000"))
+EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+EMBEDDING_CACHE_PERSIST = os.getenv("EMBEDDING_CACHE_PERSIST", "true").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_DB_TTL_DAYS = int(os.getenv("EMBEDDING_CACHE_DB_TTL_DAYS", "90"))
+EMBEDDING_CACHE_DB_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_DB_MAX_ROWS", "500000"))
+
+Vector = List[float]
+ComputeFn = Callable[[List[str]], Awaitable[List[Vector]]]
+
+_table = EmbeddingCacheEntry.__table__
+
+
+def content_hash(text_value: str) -> str:
+    """sha256 hex do texto (UTF-8) — chave do cache."""
+    return hashlib.sha256(text_value.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU com TTL em memória + tabela persistente."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = EMBEDDING_CACHE_SIZE,
+        ttl_seconds: int = EMBEDDING_CACHE_TTL_SECONDS,
+        persistent: bool = EMBEDDING_CACHE_PERSIST,
+        db_ttl_days: int = EMBEDDING_CACHE_DB_TTL_DAYS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.db_ttl_days = db_ttl_days
+        self._lru: "OrderedDict[Tuple[str, str], Tuple[float, array]]" = OrderedDict()
+
+        # Contadores expostos via stats()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.db_errors = 0
+
+    # ────────────────────────────────────────────────────────────
+    # API PÚBLICA
+    # ────────────────────────────────────────────────────────────
+
+    async def get_or_compute(
+        self,
+        texts: Sequence[str],
+        compute: ComputeFn,
+        *,
+        model: str = EMBEDDING_MODEL,
+    ) -> List[Vector]:
+        """
+        Retorna um embedding por texto (mesma ordem), chamando ``compute``
+        apenas para os textos ausentes nos dois níveis (deduplicados).
+        """
+        hashes = [content_hash(t) for t in texts]
+        found: Dict[str, Vector] = {}
+
+        # 1. Memória
+        for h in set(hashes):
+            vector = self._lru_get(model, h)
+            if vector is not None:
+                found[h] = vector
+        self.memory_hits += sum(1 for h in hashes if h in found)
+
+        # 2. Banco
+        pending = [h for h in dict.fromkeys(hashes) if h not in found]
+        if pending and self.persistent:
+            loaded = await self._db_load(model, pending)
+            for h, vector in loaded.items():
+                self._lru_put(model, h, vector)
+            found.update(loaded)
+            self.db_hits += sum(1 for h in hashes if h in loaded)
+
+        # 3. API (um texto por hash ausente)
+        missing: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in missing:
+                missing[h] = t
+        if missing:
+            self.misses += sum(1 for h in hashes if h in missing)
+            vectors = await compute(list(missing.values()))
+            fresh = {}
+            for h, vector in zip(missing.keys(), vectors):
+                found[h] = vector
+                if any(vector):  # zeros = fallback de erro, não cacheia
+                    fresh[h] = vector
+                    self._lru_put(model, h, vector)
+            if fresh and self.persistent:
+                await self._db_store(model, fresh)
+
+        return [found[h] for h in hashes]
+
+    def clear(self) -> None:
+        """Esvazia o nível em memória."""
+        self._lru.clear()
+
+    def stats(self) -> Dict[str, object]:
+        """Snapshot dos contadores do cache."""
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "memory_bytes": sum(v.itemsize * len(v) for _, v in self._lru.values()),
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self.persistent,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "db_errors": self.db_errors,
+        }
+
+    # ────────────────────────────────────────────────────────────
+    # NÍVEL 1 — LRU EM MEMÓRIA
+    # ────────────────────────────────────────────────────────────
+
+    def _lru_get(self, model: str, h: str) -> Vector | None:
+        key = (model, h)
+        entry = self._lru.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at < time.monotonic():
+            del self._lru[key]
+            self.expirations += 1
+            return None
+        self._lru.move_to_end(key)
+        return vector.tolist()
+
+    def _lru_put(self, model: str, h: str, vector: Vector) -> None:
+        key = (model, h)
+        # float32 compacto (o pgvector também armazena float32)
+        self._lru[key] = (time.monotonic() + self.ttl_seconds, array("f", vector))
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    # ────────────────────────────────────────────────────────────
+    # NÍVEL 2 — TABELA embedding_cache
+    # ────────────────────────────────────────────────────────────
+
+    async def _db_load(self, model: str, hashes: List[str]) -> Dict[str, Vector]:
+        cutoff = datetime.utcnow() - timedelta(days=self.db_ttl_days)
+        try:
+            async with async_engine.connect() as conn:
+                rows = (await conn.execute(
+                    select(_table.c.content_hash, _table.c.embedding)
+                    .where(_table.c.model == model)
+                    .where(_table.c.content_hash.in_(hashes))
+                    .where(_table.c.created_at >= cutoff)
+                )).all()
+        except Exception as exc:
+            self.db_errors += 1
+            log.warning("Falha ao ler embedding_cache: %s", exc)
+            return {}
+        return {r.content_hash: [float(x) for x in r.embedding] for r in rows}
+
+    async def _db_store(self, model: str, vectors: Dict[str, Vector]) -> None:
+        now = datetime.utcnow()
+        rows = [
+            {"model": model, "content_hash": h, "embedding": v, "created_at": now}
+            for h, v in vectors.items()
+        ]
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(pg_insert(_table).values(rows).on_conflict_do_nothing())
+        except Exception as exc:
+            self.db_errors += 1
+            log.warning("Falha ao gravar embedding_cache (%d vetores): %s", len(rows), exc)
+
+
+# ────────────────────────────────────────────────────────────
+# MANUTENÇÃO (scripts/prune_embedding_cache.py)
+# ────────────────────────────────────────────────────────────
+
+def prune_persistent(
+    conn: Connection,
+    *,
+    ttl_days: int = EMBEDDING_CACHE_DB_TTL_DAYS,
+    max_rows: int = EMBEDDING_CACHE_DB_MAX_ROWS,
+) -> Tuple[int, int]:
+    """
+    Remove entradas expiradas e, acima de ``max_rows``, as mais antigas.
+
+    Returns:
+        (expiradas, excedentes) removidas.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=ttl_days)
+    expired = conn.execute(delete(_table).where(_table.c.created_at < cutoff)).rowcount
+
+    overflow = conn.execute(text("""
+        DELETE FROM embedding_cache
+        WHERE (model, content_hash) IN (
+            SELECT model, content_hash FROM embedding_cache
+            ORDER BY created_at DESC
+            OFFSET :max_rows
+        )
+    """), {"max_rows": max_rows}).rowcount
+
+    if expired or overflow:
+        log.info("embedding_cache podado: %s expiradas, %s excedentes", expired, overflow)
+    return expired, overflow
+
+
+# Instância única compartilhada por services.generate_embedding e BrainService
+embedding_cache = EmbeddingCache()
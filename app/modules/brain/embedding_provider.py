@@ -0,0 +1,257 @@
+"""
+Embedding Provider — Backends de embeddings plugáveis
+=====================================================
+Sem OPENAI_API_KEY, ``generate_embedding`` e ``BrainService`` devolviam
+vetores zerados: toda busca vetorial virava ordem arbitrária e não havia
+como medir a recuperação offline. Os backends abaixo têm a mesma interface
+(``embed`` em lote, ``dimensions``, ``model``) e são escolhidos por
+EMBEDDING_PROVIDER:
+
+  - ``openai``        → text-embedding-3-small (API; lotes pelo
+                        embedding_scheduler, com rate limit)
+  - ``local``         → feature hashing de palavras + trigramas de
+                        caracteres (CPU, sem rede, sem modelo para baixar).
+                        Textos com vocabulário parecido ficam próximos —
+                        serve para desenvolvimento e benchmarks offline
+  - ``deterministic`` → vetor pseudoaleatório derivado do sha256 do texto
+                        (mesmo texto → mesmo vetor). Para testes e medição
+                        de throughput; não tem semântica nenhuma
+  - ``auto`` (padrão) → openai se houver chave, senão local (com aviso)
+
+Os vetores de backends diferentes NÃO são comparáveis entre si: o
+embedding_cache é chaveado por ``model`` e um banco indexado com um backend
+deve ser reingerido ao trocar de backend.
+
+Todos devolvem vetores normalizados com EMBEDDING_DIMENSIONS (1536)
+posições — a dimensão fixa das colunas ``vector(1536)`` (models, migration
+006, vector_index.VECTOR_DIMENSIONS); não é configurável sem migrar as
+colunas e reindexar. Vetores maiores são truncados e renormalizados (os
+embeddings v3 da OpenAI suportam isso); menores são completados com zeros.
+Outras dimensões só fazem sentido fora do banco
+(scripts/benchmark_embeddings.py --dims).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import random
+import re
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+from app.modules.brain.embedding_cache import EMBEDDING_MODEL
+
+log = logging.getLogger("vyron.brain.embedding_provider")
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "auto").lower()
+# Dimensão das colunas vector(1536) — fixa (ver docstring)
+EMBEDDING_DIMENSIONS = 1536
+# Lotes maiores que isso vão para uma thread (hashing é CPU puro)
+LOCAL_EMBEDDING_THREAD_MIN = int(os.getenv("LOCAL_EMBEDDING_THREAD_MIN", "16"))
+
+PROVIDERS = ("auto", "openai", "local", "deterministic")
+
+Vector = List[float]
+
+
+def fit_dimensions(vector: Sequence[float], dimensions: int) -> Vector:
+    """Trunca (e renormaliza) ou completa com zeros até ``dimensions``."""
+    if len(vector) == dimensions:
+        return list(vector)
+    if len(vector) < dimensions:
+        return list(vector) + [0.0] * (dimensions - len(vector))
+    head = vector[:dimensions]
+    norm = math.sqrt(sum(x * x for x in head)) or 1.0
+    return [x / norm for x in head]
+
+
+class EmbeddingProvider(ABC):
+    """Interface comum: ``embed`` recebe um lote e devolve um vetor por texto."""
+
+    name = "base"
+    model = "base"
+    # True → a ingestão passa pelo embedding_scheduler (RPM/TPM, retries)
+    rate_limited = False
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS) -> None:
+        self.dimensions = dimensions
+        if dimensions != EMBEDDING_DIMENSIONS:
+            # Chave própria no embedding_cache para outra dimensão
+            self.model = f"{type(self).model}@{dimensions}"
+        # Contadores expostos via stats()
+        self.calls = 0
+        self.texts = 0
+        self.seconds = 0.0
+
+    async def embed(self, texts: List[str]) -> List[Vector]:
+        start = time.perf_counter()
+        vectors = await self._embed(texts)
+        self.calls += 1
+        self.texts += len(texts)
+        self.seconds += time.perf_counter() - start
+        return [fit_dimensions(v, self.dimensions) for v in vectors]
+
+    @abstractmethod
+    async def _embed(self, texts: List[str]) -> List[Vector]:
+        """Vetores do backend para o lote (antes do ajuste de dimensão)."""
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "provider": self.name,
+            "model": self.model,
+            "dimensions": self.dimensions,
+            "calls": self.calls,
+            "texts": self.texts,
+            "texts_per_second": round(self.texts / self.seconds, 1) if self.seconds else None,
+        }
+
+
+# ────────────────────────────────────────────────────────────
+# OPENAI
+# ────────────────────────────────────────────────────────────
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+    model = EMBEDDING_MODEL
+    rate_limited = True
+
+    def __init__(self, api_key: str, dimensions: int = EMBEDDING_DIMENSIONS) -> None:
+        super().__init__(dimensions)
+        from openai import AsyncOpenAI
+        self._client = AsyncOpenAI(api_key=api_key)
+
+    async def _embed(self, texts: List[str]) -> List[Vector]:
+        """Uma chamada à API de embeddings. Erros da API são propagados."""
+        # Dimensão reduzida na própria API (text-embedding-3-*)
+        kwargs = {"dimensions": self.dimensions} if self.dimensions != EMBEDDING_DIMENSIONS else {}
+        response = await self._client.embeddings.create(input=texts, model=EMBEDDING_MODEL, **kwargs)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+# ────────────────────────────────────────────────────────────
+# LOCAL (feature hashing)
+# ────────────────────────────────────────────────────────────
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas e sem acentos ("Promoção" e "promocao" viram o mesmo termo)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _features(text: str) -> Counter:
+    words = _WORD_RE.findall(normalize_text(text))
+    features: Counter = Counter(f"w:{w}" for w in words)
+    # Trigramas de caracteres: toleram flexões e erros de digitação
+    for w in words:
+        padded = f"#{w}#"
+        features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Feature hashing com sinal (blake2b) de palavras e trigramas, peso
+    1 + log(tf), vetor normalizado. Determinístico entre processos.
+    """
+
+    name = "local"
+    model = "local-hashing-v1"
+
+    def _vector(self, text: str) -> Vector:
+        vector = [0.0] * self.dimensions
+        for feature, count in _features(text).items():
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            index = digest % self.dimensions
+            sign = 1.0 if (digest >> 63) & 1 else -1.0
+            weight = 1.0 + math.log(count)
+            if feature.startswith("c:"):
+                weight *= 0.5
+            vector[index] += sign * weight
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+    def _embed_sync(self, texts: List[str]) -> List[Vector]:
+        return [self._vector(t) for t in texts]
+
+    async def _embed(self, texts: List[str]) -> List[Vector]:
+        if len(texts) >= LOCAL_EMBEDDING_THREAD_MIN:
+            return await asyncio.to_thread(self._embed_sync, texts)
+        return self._embed_sync(texts)
+
+
+# ────────────────────────────────────────────────────────────
+# DETERMINÍSTICO (testes / throughput)
+# ────────────────────────────────────────────────────────────
+
+class DeterministicEmbeddingProvider(EmbeddingProvider):
+    """Vetor gaussiano normalizado com semente = sha256(texto)."""
+
+    name = "deterministic"
+    model = "deterministic-sha256-v1"
+
+    def _vector(self, text: str) -> Vector:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector]
+
+    async def _embed(self, texts: List[str]) -> List[Vector]:
+        return [self._vector(t) for t in texts]
+
+
+# ────────────────────────────────────────────────────────────
+# SELEÇÃO
+# ────────────────────────────────────────────────────────────
+
+def create_provider(kind: str = EMBEDDING_PROVIDER, *, dimensions: int = EMBEDDING_DIMENSIONS) -> EmbeddingProvider:
+    """
+    Instancia o backend ``kind`` (ver PROVIDERS).
+
+    Raises:
+        ValueError: Backend desconhecido, ou ``openai`` sem OPENAI_API_KEY.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if kind == "auto":
+        if api_key:
+            kind = "openai"
+        else:
+            log.warning(
+                "OPENAI_API_KEY não configurada: usando embeddings locais (hashing). "
+                "Os vetores não são comparáveis com os da OpenAI — defina EMBEDDING_PROVIDER explicitamente."
+            )
+            kind = "local"
+    if kind == "openai":
+        if not api_key:
+            raise ValueError("EMBEDDING_PROVIDER=openai exige OPENAI_API_KEY")
+        return OpenAIEmbeddingProvider(api_key, dimensions)
+    if kind == "local":
+        return HashingEmbeddingProvider(dimensions)
+    if kind == "deterministic":
+        return DeterministicEmbeddingProvider(dimensions)
+    raise ValueError(f"EMBEDDING_PROVIDER inválido: {kind!r} (use um de {', '.join(PROVIDERS)})")
+
+
+@lru_cache(maxsize=1)
+def get_embedding_provider() -> EmbeddingProvider:
+    """Backend do processo (criado no primeiro uso)."""
+    provider = create_provider()
+    log.info("Embeddings: %s (%s, %d dims)", provider.name, provider.model, provider.dimensions)
+    return provider
+
+
+def provider_stats() -> Dict[str, object] | None:
+    """Contadores do backend (None se ainda não foi usado neste processo)."""
+    if not get_embedding_provider.cache_info().currsize:
+        return None
+    return get_embedding_provider().stats()
@@ -0,0 +1,270 @@
+"""
+Embedding Scheduler — Lotes concorrentes de embeddings respeitando rate limits
+==============================================================================
+Usado por ``BrainService.ingest_pdf``: em vez de aguardar um lote por vez,
+mantém até EMBEDDING_MAX_CONCURRENCY requisições em voo, dentro dos limites
+da conta na API:
+
+  - EMBEDDING_RPM  → requisições por minuto  (token bucket)
+  - EMBEDDING_TPM  → tokens por minuto       (token bucket)
+
+Os lotes são montados por contagem de tokens (EMBEDDING_BATCH_MAX_TOKENS,
+no máximo EMBEDDING_BATCH_MAX_INPUTS textos), não por quantidade fixa de
+chunks. Respostas 429/5xx são repetidas com backoff exponencial + jitter
+(respeitando ``Retry-After`` quando a API envia).
+
+Os buckets são do processo: ingestões simultâneas dividem o mesmo orçamento.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import random
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+log = logging.getLogger("vyron.brain.embedding_scheduler")
+
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+EMBEDDING_RPM = int(os.getenv("EMBEDDING_RPM", "3000"))
+EMBEDDING_TPM = int(os.getenv("EMBEDDING_TPM", "1000000"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "50000"))
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "2048"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+
+Vector = List[float]
+EmbedFn = Callable[[List[str]], Awaitable[List[Vector]]]
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+# ────────────────────────────────────────────────────────────
+# TOKENS
+# ────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    """Encoder do tiktoken, se instalado (opcional)."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens do texto (tiktoken) ou estimativa conservadora (~3 chars/token)."""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return max(1, math.ceil(len(text) / 3))
+
+
+def split_batches(
+    texts: Sequence[str],
+    *,
+    max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+    max_inputs: int = EMBEDDING_BATCH_MAX_INPUTS,
+) -> List[List[int]]:
+    """Agrupa índices de ``texts`` em lotes limitados por tokens e por quantidade."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for idx, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+# ────────────────────────────────────────────────────────────
+# RATE LIMIT
+# ────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """Bucket com reposição contínua de ``per_minute`` unidades por minuto."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Aguarda até haver ``amount`` unidades e as consome.
+
+        Returns:
+            Segundos esperados.
+        """
+        amount = min(amount, self.capacity)  # um lote maior que o bucket ainda passa
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    return getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after")) if headers.get("retry-after") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    status = _status_code(exc)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    # Sem status HTTP: timeout / conexão (APIConnectionError, APITimeoutError)
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "TimeoutError")
+
+
+# ────────────────────────────────────────────────────────────
+# SCHEDULER
+# ────────────────────────────────────────────────────────────
+
+class EmbeddingScheduler:
+    """Executa lotes de embeddings em paralelo sob limites de RPM/TPM."""
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        rpm: int = EMBEDDING_RPM,
+        tpm: int = EMBEDDING_TPM,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+
+        # Contadores expostos via stats()
+        self.in_flight = 0
+        self.batches = 0
+        self.tokens_sent = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.throttle_wait_ms = 0
+
+    async def run(
+        self,
+        texts: Sequence[str],
+        embed: EmbedFn,
+        *,
+        max_inputs: int = EMBEDDING_BATCH_MAX_INPUTS,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ) -> List[Vector]:
+        """
+        Vetoriza ``texts`` (mesma ordem) chamando ``embed`` por lote.
+
+        ``embed`` deve levantar a exceção original da API em caso de erro —
+        é ela que decide o retry (429/5xx) ou a falha imediata.
+        ``on_batch`` (opcional) recebe a quantidade de textos de cada lote
+        concluído (progresso da ingestão).
+
+        Raises:
+            Exception: O erro do último retry, se um lote esgotar as tentativas.
+        """
+        if not texts:
+            return []
+
+        batches = split_batches(texts, max_inputs=max_inputs)
+        results: Dict[int, Vector] = {}
+
+        async def _run_batch(number: int, indices: List[int]) -> None:
+            batch = [texts[i] for i in indices]
+            tokens = sum(estimate_tokens(t) for t in batch)
+            async with self._semaphore:
+                vectors = await self._call_with_retry(embed, batch, tokens)
+            results.update(zip(indices, vectors))
+            if on_batch is not None:
+                on_batch(len(batch))
+            log.debug("Lote %d/%d concluído (%d textos, ~%d tokens)", number, len(batches), len(batch), tokens)
+
+        tasks = [asyncio.create_task(_run_batch(n, idx)) for n, idx in enumerate(batches, 1)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return [results[i] for i in range(len(texts))]
+
+    async def _call_with_retry(self, embed: EmbedFn, batch: List[str], tokens: int) -> List[Vector]:
+        attempt = 0
+        while True:
+            waited = await self._requests.acquire(1)
+            waited += await self._tokens.acquire(tokens)
+            self.throttle_wait_ms += int(waited * 1000)
+
+            self.in_flight += 1
+            try:
+                vectors = await embed(batch)
+                self.batches += 1
+                self.tokens_sent += tokens
+                return vectors
+            except Exception as exc:
+                if _status_code(exc) == 429:
+                    self.rate_limited += 1
+                if attempt >= self.max_retries or not _is_retryable(exc):
+                    self.failures += 1
+                    raise
+                delay = _retry_after(exc) or min(60.0, 2 ** attempt) * (0.5 + random.random())
+                attempt += 1
+                self.retries += 1
+                log.warning(
+                    "Embeddings: %s (tentativa %d/%d) — novo envio em %.1fs",
+                    _status_code(exc) or type(exc).__name__, attempt, self.max_retries, delay,
+                )
+                await asyncio.sleep(delay)
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, object]:
+        """Snapshot dos contadores do scheduler."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rpm": int(self._requests.capacity),
+            "tpm": int(self._tokens.capacity),
+            "in_flight": self.in_flight,
+            "batches": self.batches,
+            "tokens_sent": self.tokens_sent,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "throttle_wait_ms": self.throttle_wait_ms,
+        }
+
+
+# Instância única: todas as ingestões do processo dividem o orçamento da conta
+embedding_scheduler = EmbeddingScheduler()
@@ -0,0 +1,105 @@
+"""
+Hybrid Search — Busca lexical + vetorial fundida por RRF
+========================================================
+Cosseno sozinho erra termos exatos (números de contrato ``VY-202601-…``,
+CNPJs, nomes de produto). A busca híbrida combina, em uma única query:
+
+  1. candidatos vetoriais — top HYBRID_CANDIDATES por ``embedding <=> q``
+     (índice HNSW)
+  2. candidatos lexicais  — top HYBRID_CANDIDATES por ``ts_rank_cd`` sobre
+     ``content_tsv`` (tsvector gerado, config portuguese, índice GIN) com
+     ``websearch_to_tsquery`` — o ranking estilo BM25 disponível no Postgres
+  3. Reciprocal Rank Fusion — score = Σ 1 / (RRF_K + posição) nas duas
+     listas; um chunk bem colocado nas duas sobe para o topo
+
+Só o ranking final (LIMIT) sai do banco: uma ida e volta, sem ampliar o
+``limit`` (e o contexto enviado ao LLM) para compensar a busca vetorial.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Callable, List, Optional
+
+from sqlalchemy import Select, func, literal, literal_column, select, union_all
+
+from app.models import DocumentChunk
+from app.modules.brain import vector_index
+
+TS_CONFIG = "portuguese"
+HYBRID_CANDIDATES = int(os.getenv("BRAIN_HYBRID_CANDIDATES", "40"))
+RRF_K = int(os.getenv("BRAIN_RRF_K", "60"))
+
+# Filtro aplicado aos dois conjuntos de candidatos (ex.: filename)
+Filter = Callable[[Select], Select]
+
+
+def ts_query(query: str):
+    """``websearch_to_tsquery`` na config do content_tsv (aspas, OR e -termo)."""
+    return func.websearch_to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), query)
+
+
+def hybrid_select(
+    query: str,
+    query_embedding: List[float],
+    *,
+    limit: int,
+    candidates: int = HYBRID_CANDIDATES,
+    rrf_k: int = RRF_K,
+    where: Optional[Filter] = None,
+) -> Select:
+    """
+    SELECT dos chunks ordenados por RRF, com as colunas: id, filename,
+    chunk_index, content, metadata_json, distance (cosseno) e rrf_score.
+    """
+    where = where or (lambda stmt: stmt)
+    candidates = max(candidates, limit)
+    distance = DocumentChunk.embedding.cosine_distance(query_embedding)
+    tsq = ts_query(query)
+    lex_rank = func.ts_rank_cd(DocumentChunk.content_tsv, tsq)
+
+    # 1. Vetorial (com precisão reduzida: quantizado + reordenação — ver vector_index.knn)
+    vec = vector_index.knn(
+        where(
+            select(DocumentChunk.id, distance.label("distance"))
+            .where(DocumentChunk.embedding.isnot(None))
+        ),
+        DocumentChunk.embedding, DocumentChunk.id, query_embedding, limit=candidates,
+    ).subquery("vec")
+    vec_ranked = select(
+        vec.c.id,
+        func.row_number().over(order_by=vec.c.distance).label("rank"),
+    )
+
+    # 2. Lexical
+    lex = where(
+        select(DocumentChunk.id, lex_rank.label("lex_score"))
+        .where(DocumentChunk.content_tsv.bool_op("@@")(tsq))
+    ).order_by(lex_rank.desc()).limit(candidates).subquery("lex")
+    lex_ranked = select(
+        lex.c.id,
+        func.row_number().over(order_by=lex.c.lex_score.desc()).label("rank"),
+    )
+
+    # 3. RRF
+    ranked = union_all(vec_ranked, lex_ranked).subquery("ranked")
+    fused = (
+        select(ranked.c.id, func.sum(literal(1.0) / (rrf_k + ranked.c.rank)).label("rrf_score"))
+        .group_by(ranked.c.id)
+        .subquery("fused")
+    )
+
+    return (
+        select(
+            DocumentChunk.id,
+            DocumentChunk.filename,
+            DocumentChunk.chunk_index,
+            DocumentChunk.content,
+            DocumentChunk.metadata_json,
+            distance.label("distance"),
+            fused.c.rrf_score,
+        )
+        .join(fused, fused.c.id == DocumentChunk.id)
+        .order_by(fused.c.rrf_score.desc())
+        .limit(limit)
+    )
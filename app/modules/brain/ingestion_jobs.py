@@ -0,0 +1,342 @@
+"""
+Ingestion Jobs — Fila durável de ingestão de PDFs no próprio PostgreSQL
+=======================================================================
+/brain/upload e /brain/ingest apenas gravam um registro em ``ingestion_jobs``
+e respondem 202 com o id do job; o pipeline extração → embeddings →
+persistência roda em um worker em background (na API ou em
+scripts/ingestion_worker.py), sem broker externo:
+
+  1. claim    — ``UPDATE … WHERE id = (SELECT … FOR UPDATE SKIP LOCKED LIMIT 1)``:
+                vários workers (processos/hosts) disputam a fila sem bloqueio
+                e sem pegar o mesmo job
+  2. progresso — os contadores do BrainService.ingest_pdf ficam em memória e
+                são gravados a cada INGESTION_HEARTBEAT_INTERVAL segundos,
+                junto com o heartbeat (transações curtas)
+  3. fim      — status succeeded/failed; o payload do upload é apagado nos
+                dois casos (failed é final — não há reprocessamento)
+
+Um job ``running`` sem heartbeat há INGESTION_JOB_STALE_SECONDS (worker
+morto) volta a ser reservado, até INGESTION_MAX_ATTEMPTS tentativas. Erros
+da ingestão em si (PDF inválido, API fora) marcam o job como failed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.brain_service import BrainService
+from app.database import AsyncSessionLocal, async_engine
+from app.models import IngestionJob
+
+log = logging.getLogger("vyron.brain.ingestion_jobs")
+
+INGESTION_WORKER_ENABLED = os.getenv("INGESTION_WORKER_ENABLED", "true").lower() in ("1", "true", "yes")
+INGESTION_WORKER_CONCURRENCY = int(os.getenv("INGESTION_WORKER_CONCURRENCY", "1"))
+INGESTION_POLL_INTERVAL = float(os.getenv("INGESTION_POLL_INTERVAL", "2"))
+INGESTION_HEARTBEAT_INTERVAL = float(os.getenv("INGESTION_HEARTBEAT_INTERVAL", "5"))
+INGESTION_JOB_STALE_SECONDS = int(os.getenv("INGESTION_JOB_STALE_SECONDS", "120"))
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+
+_table = IngestionJob.__table__
+
+# Contadores de progresso gravados pelo heartbeat
+_PROGRESS_FIELDS = ("total_pages", "pages_parsed", "chunks_total", "chunks_embedded", "chunks_persisted")
+
+
+# ────────────────────────────────────────────────────────────
+# PRODUTOR (routers)
+# ────────────────────────────────────────────────────────────
+
+async def enqueue(
+    db: AsyncSession,
+    *,
+    filename: str,
+    source_path: Optional[str] = None,
+    payload: Optional[bytes] = None,
+) -> IngestionJob:
+    """Grava um job ``queued`` e acorda o worker local."""
+    job = IngestionJob(
+        id=uuid4(),
+        status="queued",
+        filename=filename,
+        source_path=source_path,
+        payload=payload,
+        created_at=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.commit()
+    ingestion_worker.notify()
+    return job
+
+
+# ────────────────────────────────────────────────────────────
+# FILA (transações curtas via async_engine)
+# ────────────────────────────────────────────────────────────
+
+_FAIL_EXHAUSTED_SQL = text("""
+    UPDATE ingestion_jobs
+    SET status = 'failed',
+        error = 'Worker interrompido ' || attempts || ' vez(es) — tentativas esgotadas',
+        locked_by = NULL,
+        payload = NULL,
+        finished_at = :now
+    WHERE status = 'running'
+      AND heartbeat_at < :stale_before
+      AND attempts >= :max_attempts
+""")
+
+_CLAIM_SQL = text("""
+    UPDATE ingestion_jobs
+    SET status = 'running',
+        attempts = attempts + 1,
+        locked_by = :worker_id,
+        started_at = :now,
+        heartbeat_at = :now,
+        pages_parsed = 0,
+        chunks_embedded = 0,
+        chunks_persisted = 0,
+        error = NULL
+    WHERE id = (
+        SELECT id FROM ingestion_jobs
+        WHERE status = 'queued'
+           OR (status = 'running' AND heartbeat_at < :stale_before)
+        ORDER BY created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, filename, source_path, payload, attempts
+""")
+
+
+async def claim_next(worker_id: str, *, stale_seconds: int = INGESTION_JOB_STALE_SECONDS) -> Optional[Any]:
+    """
+    Reserva o job mais antigo disponível (ou abandonado) para ``worker_id``.
+
+    Returns:
+        Row (id, filename, source_path, payload, attempts) ou None se a fila
+        estiver vazia.
+    """
+    now = datetime.utcnow()
+    params = {
+        "now": now,
+        "stale_before": now - timedelta(seconds=stale_seconds),
+        "max_attempts": INGESTION_MAX_ATTEMPTS,
+        "worker_id": worker_id,
+    }
+    async with async_engine.begin() as conn:
+        exhausted = (await conn.execute(_FAIL_EXHAUSTED_SQL, params)).rowcount
+        if exhausted:
+            log.warning("%d job(s) de ingestão abandonados marcados como failed.", exhausted)
+        return (await conn.execute(_CLAIM_SQL, params)).first()
+
+
+async def _update_job(job_id: UUID, worker_id: str, **values: Any) -> bool:
+    """UPDATE condicionado ao dono atual do job (um job reservado por outro worker não é tocado)."""
+    async with async_engine.begin() as conn:
+        result = await conn.execute(
+            update(_table)
+            .where(_table.c.id == job_id)
+            .where(_table.c.locked_by == worker_id)
+            .values(**values)
+        )
+    return result.rowcount > 0
+
+
+class _JobProgress:
+    """Contadores do job em memória, gravados pelo heartbeat."""
+
+    def __init__(self, job_id: UUID, worker_id: str) -> None:
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.values: Dict[str, int] = {}
+        self._dirty = False
+
+    def update(self, **fields: int) -> None:
+        """Callback do ``BrainService.ingest_pdf`` — só memória, sem I/O."""
+        for name, value in fields.items():
+            if name in _PROGRESS_FIELDS:
+                self.values[name] = value
+                self._dirty = True
+
+    async def flush(self) -> None:
+        values: Dict[str, Any] = {"heartbeat_at": datetime.utcnow()}
+        if self._dirty:
+            values.update(self.values)
+            self._dirty = False
+        await _update_job(self.job_id, self.worker_id, **values)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as exc:
+                # Heartbeat perdido não interrompe a ingestão (o próximo tenta de novo)
+                log.warning("Falha ao gravar progresso do job %s: %s", self.job_id, exc)
+
+
+# ────────────────────────────────────────────────────────────
+# WORKER
+# ────────────────────────────────────────────────────────────
+
+class IngestionWorker:
+    """Loop(s) de polling que reservam e executam jobs de ingestão."""
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = INGESTION_WORKER_CONCURRENCY,
+        poll_interval: float = INGESTION_POLL_INTERVAL,
+        heartbeat_interval: float = INGESTION_HEARTBEAT_INTERVAL,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._wake = asyncio.Event()
+
+        # Contadores expostos via stats()
+        self.active: Dict[str, str] = {}   # job_id → filename
+        self.claimed = 0
+        self.reclaimed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.requeued = 0
+        self.poll_errors = 0
+        self.last_job_ms = 0
+
+    # ────────────────────────────────────────────────────────────
+    # CICLO DE VIDA
+    # ────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Inicia os loops no event loop corrente (idempotente)."""
+        self._tasks = [t for t in self._tasks if not t.done()]
+        for n in range(len(self._tasks), self.concurrency):
+            self._tasks.append(asyncio.create_task(self._run(), name=f"ingestion-worker-{n}"))
+
+    async def stop(self) -> None:
+        """Cancela os loops; jobs em andamento voltam para a fila."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Acorda os loops deste processo (job recém-enfileirado)."""
+        self._wake.set()
+
+    async def run_forever(self) -> None:
+        """Execução dedicada (scripts/ingestion_worker.py)."""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    # ────────────────────────────────────────────────────────────
+    # LOOP
+    # ────────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                job = await claim_next(self.worker_id)
+            except Exception as exc:
+                self.poll_errors += 1
+                log.warning("Falha ao consultar a fila de ingestão: %s", exc)
+                job = None
+
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(job)
+
+    async def _process(self, job: Any) -> None:
+        self.claimed += 1
+        if job.attempts > 1:
+            self.reclaimed += 1
+        key = str(job.id)
+        self.active[key] = job.filename
+        log.info("Job de ingestão %s (%s) — tentativa %d", key, job.filename, job.attempts)
+
+        progress = _JobProgress(job.id, self.worker_id)
+        heartbeat = asyncio.create_task(progress.run(self.heartbeat_interval))
+        source = job.source_path if job.source_path else io.BytesIO(job.payload or b"")
+        start = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                await BrainService.ingest_pdf(
+                    source, db, filename=job.filename, progress=progress.update
+                )
+        except asyncio.CancelledError:
+            # Shutdown: devolve o job à fila em vez de esperar o timeout de heartbeat
+            heartbeat.cancel()
+            self.requeued += 1
+            await asyncio.shield(self._finish(progress, status="queued", locked_by=None))
+            raise
+        except Exception as exc:
+            self.failed += 1
+            log.warning("Job de ingestão %s falhou: %s", key, exc)
+            await self._finish(
+                progress, status="failed", error=str(exc), payload=None, finished_at=datetime.utcnow()
+            )
+        else:
+            self.succeeded += 1
+            await self._finish(progress, status="succeeded", payload=None, finished_at=datetime.utcnow())
+        finally:
+            heartbeat.cancel()
+            self.active.pop(key, None)
+            self.last_job_ms = int((time.perf_counter() - start) * 1000)
+
+    async def _finish(self, progress: _JobProgress, **values: Any) -> None:
+        values = {**progress.values, "heartbeat_at": datetime.utcnow(), **values}
+        if values.get("status") in ("succeeded", "failed"):
+            values.setdefault("locked_by", None)
+        try:
+            # locked_by ainda é o deste worker no WHERE; o SET pode limpá-lo
+            if not await _update_job(progress.job_id, self.worker_id, **values):
+                log.warning("Job %s foi reservado por outro worker — resultado descartado.", progress.job_id)
+        except Exception as exc:
+            log.error("Falha ao gravar o resultado do job %s: %s", progress.job_id, exc)
+
+    # ────────────────────────────────────────────────────────────
+    # MÉTRICAS
+    # ────────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot dos contadores do worker."""
+        return {
+            "running": any(not t.done() for t in self._tasks),
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "active_jobs": dict(self.active),
+            "claimed": self.claimed,
+            "reclaimed": self.reclaimed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "poll_errors": self.poll_errors,
+            "last_job_ms": self.last_job_ms,
+        }
+
+
+# Instância única: iniciada no lifespan da API (ou pelo script dedicado)
+ingestion_worker = IngestionWorker()
@@ -0,0 +1,151 @@
+"""
+PDF Extraction — Extração de texto e chunking em pool de processos
+==================================================================
+A extração (pypdf) e o chunking (langchain) são CPU-bound. Rodando no
+event loop, um PDF grande trava todas as outras requisições do worker.
+
+Aqui o trabalho vai para um ProcessPoolExecutor:
+  1. as páginas são divididas em shards de PDF_PAGES_PER_SHARD páginas,
+     extraídos em paralelo (um processo por shard, até PDF_WORKERS)
+  2. o texto completo é dividido em chunks em um processo do pool
+
+Este módulo não importa nada do app (banco, OpenAI) — os processos filhos
+(start method ``spawn``) só carregam pypdf e o splitter.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+log = logging.getLogger("vyron.brain.pdf_extraction")
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_SHARD = int(os.getenv("PDF_PAGES_PER_SHARD", "20"))
+
+# Caminho (lido pelo filho) ou bytes (upload em memória)
+PdfSource = Union[str, bytes]
+
+
+# ────────────────────────────────────────────────────────────
+# FUNÇÕES EXECUTADAS NOS PROCESSOS FILHOS
+# ────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=1)
+def get_splitter():
+    """Text splitter (um por processo)."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=150,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+
+
+def _reader(source: PdfSource):
+    from pypdf import PdfReader
+    return PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def count_pages(source: PdfSource) -> int:
+    return len(_reader(source).pages)
+
+
+def extract_pages(source: PdfSource, start: int = 0, end: Optional[int] = None) -> List[str]:
+    """Texto das páginas [start, end) — páginas sem texto são omitidas."""
+    reader = _reader(source)
+    pages = reader.pages[start:end]
+    return [text for text in (page.extract_text() for page in pages) if text]
+
+
+def split_text(text: str) -> List[str]:
+    return get_splitter().split_text(text)
+
+
+# ────────────────────────────────────────────────────────────
+# POOL
+# ────────────────────────────────────────────────────────────
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: o filho não herda o event loop nem as conexões do pai
+        _pool = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Encerra o pool (chamado no shutdown da aplicação)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _submit(fn, *args):
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+    except BrokenProcessPool:
+        # Um filho morreu (OOM, segfault no parser) — recria o pool na próxima
+        shutdown_pool()
+        raise
+
+
+# ────────────────────────────────────────────────────────────
+# API
+# ────────────────────────────────────────────────────────────
+
+async def extract_and_chunk(
+    source: Union[str, Path, io.BytesIO, bytes],
+    *,
+    pages_per_shard: int = PDF_PAGES_PER_SHARD,
+    on_pages: Optional[Callable[[int], None]] = None,
+) -> dict:
+    """
+    Extrai o texto (shards de páginas em paralelo) e gera os chunks,
+    sem bloquear o event loop. ``on_pages`` (opcional) recebe o número de
+    páginas de cada shard concluído.
+
+    Returns:
+        dict com keys: full_text, chunks (list[str]), total_pages.
+    """
+    if isinstance(source, io.BytesIO):
+        source = source.getvalue()
+    elif isinstance(source, Path):
+        source = str(source)
+
+    total_pages = await _submit(count_pages, source)
+
+    async def _shard(start: int, end: int) -> List[str]:
+        texts = await _submit(extract_pages, source, start, end)
+        if on_pages is not None:
+            on_pages(end - start)
+        return texts
+
+    shards = [
+        _shard(start, min(start + pages_per_shard, total_pages))
+        for start in range(0, total_pages, pages_per_shard)
+    ]
+    pages_text = [text for shard in await asyncio.gather(*shards) for text in shard]
+
+    full_text = "\n\n".join(pages_text)
+    chunks = await _submit(split_text, full_text) if full_text.strip() else []
+    log.debug("PDF: %d páginas em %d shard(s), %d chunks", total_pages, len(shards), len(chunks))
+
+    return {"full_text": full_text, "chunks": chunks, "total_pages": total_pages}
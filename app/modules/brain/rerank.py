@@ -0,0 +1,151 @@
+"""
+Rerank — Segundo estágio da busca em documentos (CPU, sem LLM)
+==============================================================
+O top-``limit`` (3) por cosseno costuma trazer três trechos vizinhos do
+mesmo PDF quando a pergunta envolve vários documentos. ``semantic_search``
+passa a buscar BRAIN_RERANK_CANDIDATES candidatos pelo índice (vetorial ou
+híbrido) e este módulo escolhe os ``limit`` finais:
+
+  1. relevância = BRAIN_RERANK_VECTOR_WEIGHT × similaridade de cosseno
+                + (1 − peso) × sobreposição lexical (BM25 com IDF calculado
+                  sobre os próprios candidatos, termos sem acento e sem
+                  stopwords), ambas normalizadas para 0..1 nos candidatos
+  2. MMR (Maximal Marginal Relevance) — a cada passo entra o candidato com
+     maior  λ × relevância − (1 − λ) × redundância, onde redundância é o
+     máximo, entre os já escolhidos, de Jaccard dos termos ou
+     BRAIN_RERANK_FILENAME_REDUNDANCY se for do mesmo ``filename``
+
+Tudo em memória sobre ~50 textos: poucos milissegundos, e o prompt do LLM
+continua com ``limit`` trechos.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Sequence
+
+from app.modules.brain.embedding_provider import normalize_text
+
+BRAIN_RERANK = os.getenv("BRAIN_RERANK", "true").lower() in ("1", "true", "yes")
+BRAIN_RERANK_CANDIDATES = int(os.getenv("BRAIN_RERANK_CANDIDATES", "50"))
+BRAIN_RERANK_VECTOR_WEIGHT = float(os.getenv("BRAIN_RERANK_VECTOR_WEIGHT", "0.6"))
+BRAIN_RERANK_MMR_LAMBDA = float(os.getenv("BRAIN_RERANK_MMR_LAMBDA", "0.7"))
+BRAIN_RERANK_FILENAME_REDUNDANCY = float(os.getenv("BRAIN_RERANK_FILENAME_REDUNDANCY", "0.5"))
+
+# BM25
+_K1 = 1.2
+_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a o as os um uma uns umas de da do das dos em na no nas nos por para pra com sem sob "
+    "e ou que se ao aos à às pelo pela pelos pelas este esta isto esse essa isso aquele aquela "
+    "como mais menos muito ja nao sim ser ter foi sao esta estao sua seu suas seus qual quais "
+    "quem onde quando entre sobre ate tambem mas the of and to in for on is".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Termos sem acento, minúsculos, sem stopwords e sem tokens de 1 caractere."""
+    return [t for t in _TOKEN_RE.findall(normalize_text(text)) if len(t) > 1 and t not in _STOPWORDS]
+
+
+@dataclass
+class RerankResult:
+    """Candidatos escolhidos (na ordem final) e o tempo do rerank."""
+    items: List[dict] = field(default_factory=list)
+    candidates: int = 0
+    ms: float = 0.0
+
+
+def _minmax(values: Sequence[float]) -> List[float]:
+    low, high = min(values), max(values)
+    if high - low < 1e-12:
+        return [1.0 if high > 0 else 0.0 for _ in values]
+    return [(v - low) / (high - low) for v in values]
+
+
+def _bm25(query_terms: List[str], docs: List[List[str]]) -> List[float]:
+    n = len(docs)
+    avg_len = sum(len(d) for d in docs) / n or 1.0
+    df = Counter(t for d in docs for t in set(d))
+    scores = []
+    for doc in docs:
+        tf = Counter(doc)
+        score = 0.0
+        for term in set(query_terms):
+            if term not in tf:
+                continue
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            freq = tf[term]
+            score += idf * freq * (_K1 + 1) / (freq + _K1 * (1 - _B + _B * len(doc) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def rerank(
+    query: str,
+    candidates: List[dict],
+    *,
+    limit: int,
+    vector_weight: float = BRAIN_RERANK_VECTOR_WEIGHT,
+    mmr_lambda: float = BRAIN_RERANK_MMR_LAMBDA,
+    filename_redundancy: float = BRAIN_RERANK_FILENAME_REDUNDANCY,
+) -> RerankResult:
+    """
+    Escolhe ``limit`` candidatos por relevância + diversidade (MMR).
+
+    Args:
+        query: Pergunta original.
+        candidates: Dicts de ``semantic_search`` (usa ``content``,
+            ``filename`` e ``score`` — similaridade de cosseno).
+
+    Returns:
+        RerankResult; cada item ganha ``rerank_score`` (relevância 0..1).
+    """
+    start = time.perf_counter()
+    result = RerankResult(candidates=len(candidates))
+    if not candidates:
+        return result
+
+    docs = [tokenize(c["content"]) for c in candidates]
+    vector = _minmax([float(c.get("score") or 0.0) for c in candidates])
+    lexical = _minmax(_bm25(tokenize(query), docs))
+    relevance = [vector_weight * v + (1 - vector_weight) * lx for v, lx in zip(vector, lexical)]
+    term_sets = [frozenset(d) for d in docs]
+
+    chosen: List[int] = []
+    remaining = set(range(len(candidates)))
+    while remaining and len(chosen) < limit:
+        def _mmr(i: int) -> float:
+            redundancy = max(
+                (
+                    max(
+                        _jaccard(term_sets[i], term_sets[j]),
+                        filename_redundancy if candidates[i]["filename"] == candidates[j]["filename"] else 0.0,
+                    )
+                    for j in chosen
+                ),
+                default=0.0,
+            )
+            return mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy
+
+        best = max(remaining, key=lambda i: (_mmr(i), relevance[i]))
+        chosen.append(best)
+        remaining.discard(best)
+
+    result.items = [{**candidates[i], "rerank_score": round(relevance[i], 4)} for i in chosen]
+    result.ms = (time.perf_counter() - start) * 1000
+    return result
+
@@ -0,0 +1,181 @@
+"""
+Response Cache — Cache semântico de respostas do /ai/chat
+=========================================================
+Perguntas quase idênticas ("quais concorrentes anunciam no Meta Ads em
+pizzaria Passos?") chegam várias vezes ao dia. Uma resposta é reaproveitada
+quando, ao mesmo tempo:
+
+  1. o contexto recuperado é o mesmo — ``fingerprint`` = sha256 de
+     (fonte, id, sha256(texto)) de cada trecho. Chunk reingerido com outro
+     conteúdo, interação editada ou trecho novo mais relevante mudam o
+     fingerprint: a entrada antiga simplesmente deixa de casar (e expira)
+  2. a pergunta é parecida — similaridade de cosseno entre os embeddings
+     >= RESPONSE_CACHE_THRESHOLD (comparada só com as entradas do mesmo
+     fingerprint)
+  3. a entrada tem menos de RESPONSE_CACHE_TTL_SECONDS
+
+Não são cacheadas: respostas que executaram qualquer tool (a saída da
+tool não entra no fingerprint — ``list_projects`` lê dados que mudam pelas
+rotas REST e por outros workers, e tools de escrita alteram dados),
+perguntas com imagem, vetores zerados (fallback sem API) e respostas de
+erro.
+
+Cache em memória, por processo (LRU com RESPONSE_CACHE_SIZE entradas).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from app.modules.brain.retrieval import RetrievalResult
+
+log = logging.getLogger("vyron.brain.response_cache")
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "900"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    """Chave de uma pergunta: embedding normalizado + fingerprint do contexto."""
+    vector: Tuple[float, ...]
+    fingerprint: str
+
+
+@dataclass
+class _Entry:
+    key: CacheKey
+    answer: str
+    expires_at: float
+
+
+def _normalize(vector: Sequence[float]) -> Optional[Tuple[float, ...]]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    if not norm:
+        return None
+    return tuple(x / norm for x in vector)
+
+
+def context_fingerprint(context: "RetrievalResult") -> str:
+    """sha256 dos trechos recuperados (ordem irrelevante, conteúdo incluído)."""
+    parts = sorted(
+        f"{item.source}:{item.id}:{hashlib.sha256(item.text.encode('utf-8')).hexdigest()}"
+        for item in context.items
+    )
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU com TTL de respostas, casadas por similaridade dentro do mesmo contexto."""
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = RESPONSE_CACHE_ENABLED,
+        threshold: float = RESPONSE_CACHE_THRESHOLD,
+        ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS,
+        max_entries: int = RESPONSE_CACHE_SIZE,
+    ) -> None:
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._seq = 0
+
+        # Contadores expostos via stats()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    # ────────────────────────────────────────────────────────────
+    # API PÚBLICA
+    # ────────────────────────────────────────────────────────────
+
+    def key(self, query_embedding: Sequence[float], context: "RetrievalResult") -> Optional[CacheKey]:
+        """Chave da pergunta (None se o cache estiver desligado ou o vetor for zerado)."""
+        if not self.enabled:
+            return None
+        vector = _normalize(query_embedding)
+        if vector is None:
+            return None
+        return CacheKey(vector=vector, fingerprint=context_fingerprint(context))
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        """Resposta da entrada mais parecida acima do limiar, se houver."""
+        now = time.monotonic()
+        best_id, best_score = None, self.threshold
+        for entry_id, entry in list(self._entries.items()):
+            if entry.expires_at < now:
+                del self._entries[entry_id]
+                self.expirations += 1
+                continue
+            if entry.key.fingerprint != key.fingerprint:
+                continue
+            score = sum(a * b for a, b in zip(entry.key.vector, key.vector))
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id].answer
+
+    def put(self, key: CacheKey, answer: str) -> None:
+        self._seq += 1
+        self._entries[self._seq] = _Entry(
+            key=key,
+            answer=answer,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        self.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def skip(self) -> None:
+        """Resposta não cacheável (tools, imagem, erro)."""
+        self.skipped += 1
+
+    def clear(self) -> None:
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, object]:
+        """Snapshot dos contadores do cache."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "stores": self.stores,
+            "skipped": self.skipped,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+# Instância única usada por services.stream_answer
+response_cache = ResponseCache()
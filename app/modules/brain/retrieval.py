@@ -0,0 +1,182 @@
+"""
+Retrieval — Recuperação de contexto multi-fonte para o /ai/chat
+===============================================================
+O chat buscava as fontes em sequência (interações, depois inteligência
+competitiva do Spy) na mesma sessão. Aqui cada fonte roda em paralelo, em
+sua própria sessão de leitura (réplica, com fallback), e o resultado é:
+
+  - uma lista única de trechos ordenada por distância de cosseno
+    (cada fonte com seu próprio limite)
+  - o tempo e a quantidade de resultados de cada fonte (exposto na
+    resposta do chat em ``retrieval``)
+
+A latência total é a da fonte mais lenta, não a soma. Uma fonte que
+falhar é registrada no timing e ignorada — o chat responde com as demais.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncReadSessionLocal
+from app.models import DocumentChunk, Interaction
+from app.modules.brain import vector_index
+
+log = logging.getLogger("vyron.brain.retrieval")
+
+RETRIEVAL_INTERACTIONS_LIMIT = int(os.getenv("RETRIEVAL_INTERACTIONS_LIMIT", "3"))
+RETRIEVAL_INTEL_LIMIT = int(os.getenv("RETRIEVAL_INTEL_LIMIT", "3"))
+
+NO_CONTEXT = "Nenhuma informação de interações disponível."
+
+
+@dataclass
+class ContextItem:
+    """Um trecho recuperado (já formatado para o prompt)."""
+    source: str
+    id: str
+    text: str
+    distance: float
+
+
+@dataclass
+class SourceTiming:
+    source: str
+    hits: int = 0
+    ms: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class RetrievalResult:
+    items: List[ContextItem] = field(default_factory=list)
+    sources: List[SourceTiming] = field(default_factory=list)
+    total_ms: float = 0.0
+
+    def context_text(self) -> str:
+        """Trechos em ordem de relevância, separados como no prompt original."""
+        if not self.items:
+            return NO_CONTEXT
+        return "\n\n---\n\n".join(item.text for item in self.items)
+
+    def timings(self) -> Dict[str, object]:
+        return {
+            "total_ms": round(self.total_ms, 1),
+            "sources": [
+                {"source": t.source, "hits": t.hits, "ms": round(t.ms, 1), "error": t.error}
+                for t in self.sources
+            ],
+        }
+
+
+# ────────────────────────────────────────────────────────────
+# FONTES
+# ────────────────────────────────────────────────────────────
+
+async def _interactions(db: AsyncSession, embedding: List[float], limit: int) -> List[ContextItem]:
+    distance = Interaction.content_embedding.cosine_distance(embedding)
+    rows = (await db.execute(vector_index.knn(
+        select(Interaction.id, Interaction.type, Interaction.interaction_date, Interaction.content,
+               distance.label("distance"))
+        .where(Interaction.content_embedding.isnot(None)),
+        Interaction.content_embedding, Interaction.id, embedding, limit=limit,
+    ))).all()
+    return [
+        ContextItem(
+            source="interactions",
+            id=str(r.id),
+            text=f"Interação ({r.type}) em {r.interaction_date}:\n{r.content}",
+            distance=float(r.distance),
+        )
+        for r in rows
+    ]
+
+
+async def _competitor_intel(db: AsyncSession, embedding: List[float], limit: int) -> List[ContextItem]:
+    distance = DocumentChunk.embedding.cosine_distance(embedding)
+    rows = (await db.execute(vector_index.knn(
+        select(DocumentChunk.id, DocumentChunk.filename, DocumentChunk.content, distance.label("distance"))
+        .where(DocumentChunk.embedding.isnot(None))
+        .where(DocumentChunk.source_type == "competitor_intel"),
+        DocumentChunk.embedding, DocumentChunk.id, embedding, limit=limit,
+    ))).all()
+    return [
+        ContextItem(
+            source="competitor_intel",
+            id=str(r.id),
+            text=f"[Inteligência Competitiva — {r.filename}]:\n{r.content}",
+            distance=float(r.distance),
+        )
+        for r in rows
+    ]
+
+
+SourceFn = Callable[[AsyncSession, List[float], int], Awaitable[List[ContextItem]]]
+
+SOURCES: Dict[str, SourceFn] = {
+    "interactions": _interactions,
+    "competitor_intel": _competitor_intel,
+}
+FILTERED_SOURCES = frozenset({"competitor_intel"})
+
+
+# ────────────────────────────────────────────────────────────
+# API
+# ────────────────────────────────────────────────────────────
+
+async def _run_source(name: str, fn: SourceFn, embedding: List[float], limit: int) -> tuple:
+    timing = SourceTiming(source=name)
+    start = time.perf_counter()
+    items: List[ContextItem] = []
+    try:
+        async with await AsyncReadSessionLocal() as db:
+            # Filtradas por WHERE seletivo → varredura iterativa do HNSW
+            await vector_index.set_search_params(db, limit=limit, filtered=name in FILTERED_SOURCES)
+            items = await fn(db, embedding, limit)
+    except Exception as exc:
+        timing.error = str(exc).split("\n")[0][:200]
+        log.warning("Fonte de contexto '%s' falhou: %s", name, exc)
+    timing.ms = (time.perf_counter() - start) * 1000
+    timing.hits = len(items)
+    return items, timing
+
+
+async def retrieve_context(
+    query_embedding: List[float],
+    *,
+    limits: Optional[Dict[str, int]] = None,
+) -> RetrievalResult:
+    """
+    Busca em todas as fontes em paralelo e junta os trechos por distância.
+
+    Args:
+        query_embedding: Vetor da pergunta.
+        limits: Limite por fonte (padrão: RETRIEVAL_*_LIMIT).
+    """
+    limits = {
+        "interactions": RETRIEVAL_INTERACTIONS_LIMIT,
+        "competitor_intel": RETRIEVAL_INTEL_LIMIT,
+        **(limits or {}),
+    }
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        _run_source(name, fn, query_embedding, limits[name])
+        for name, fn in SOURCES.items()
+        if limits.get(name, 0) > 0
+    ))
+
+    result = RetrievalResult()
+    for items, timing in outcomes:
+        result.items.extend(items)
+        result.sources.append(timing)
+    result.items.sort(key=lambda item: item.distance)
+    result.total_ms = (time.perf_counter() - start) * 1000
+    return result
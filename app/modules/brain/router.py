@@ -1,14 +1,28 @@
 """
 Brain Router — RAG Documental, Busca Semântica e Chat com IA (ponto único de inteligência)
 """
+import json
+import logging
+import time
+
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from pathlib import Path
 from typing import List
+from uuid import UUID
 
-from app.database import get_db
+from app.database import SessionLocal, get_read_db, get_async_db, get_async_read_db
 from app import models, schemas
-from app.services import generate_embedding, generate_answer
+from app.services import generate_embedding, stream_answer
 from app.brain_service import BrainService
+from app.modules.brain import ingestion_jobs, retrieval, vector_index
+from app.modules.brain.response_cache import response_cache
+from app.modules.brain.search_filters import SearchFilters
+
+log = logging.getLogger("vyron.brain.router")
 
 router = APIRouter(tags=["Brain"])
 
@@ -18,21 +32,22 @@ router = APIRouter(tags=["Brain"])
 # ══════════════════════════════════════════════
 
 @router.post("/ai/search", response_model=schemas.SearchResponse)
-async def semantic_search(request: schemas.SearchRequest, db: Session = Depends(get_db)):
+async def semantic_search(request: schemas.SearchRequest, db: AsyncSession = Depends(get_async_read_db)):
     """
     Busca semântica de interações usando embeddings vetoriais.
 
     Utiliza pgvector para encontrar as interações mais similares à query.
     """
     query_embedding = await generate_embedding(request.query)
+    await vector_index.set_search_params(db, limit=request.limit)
 
     similar = (
-        db.query(models.Interaction)
-        .filter(models.Interaction.content_embedding.isnot(None))
-        .order_by(models.Interaction.content_embedding.cosine_distance(query_embedding))
-        .limit(request.limit)
-        .all()
-    )
+        await db.scalars(vector_index.knn(
+            select(models.Interaction).where(models.Interaction.content_embedding.isnot(None)),
+            models.Interaction.content_embedding, models.Interaction.id, query_embedding,
+            limit=request.limit,
+        ))
+    ).all()
 
     results = [
         schemas.InteractionResponse(
@@ -54,56 +69,115 @@ async def semantic_search(request: schemas.SearchRequest, db: Session = Depends(
 # ══════════════════════════════════════════════
 
 @router.post("/ai/chat", response_model=schemas.ChatResponse)
-async def chat_with_rag(request: schemas.ChatRequest, db: Session = Depends(get_db)):
+async def chat_with_rag(request: schemas.ChatRequest):
     """
     Chat com IA usando RAG (Retrieval-Augmented Generation) e Visão Multimodal.
 
     O sistema:
-    1. Busca interações relevantes no banco usando embeddings
-    2. Busca chunks de inteligência competitiva (competitor_intel) indexados pelo Spy Module
-    3. Usa esse contexto combinado para responder via GPT
+    1. Busca, em paralelo, interações relevantes e chunks de inteligência
+       competitiva (competitor_intel) indexados pelo Spy Module
+    2. Junta os trechos das duas fontes em um único contexto, por relevância
+    3. Usa esse contexto para responder via GPT
     4. Suporta imagens (Base64) para análise visual (recibos, notas etc.)
+
+    A recuperação de contexto lê da réplica (uma sessão por fonte — ver
+    retrieval). Tool calls (Function Calling) usam o primário: as de
+    escrita rodam em sequência numa única sessão/transação (commit só se
+    todas derem certo, embeddings gerados antes em paralelo) e as de
+    leitura em paralelo, cada uma na sua sessão — ver
+    services._run_tool_calls. O tempo de cada etapa vai em ``retrieval`` e
+    o de cada tool em ``tools``.
+
+    Perguntas parecidas com o mesmo contexto recuperado reaproveitam a
+    resposta do response_cache (sem chamar a OpenAI) — nunca respostas
+    que executaram tools.
     """
+    start = time.perf_counter()
     query_embedding = await generate_embedding(request.query)
+    embedding_ms = (time.perf_counter() - start) * 1000
 
-    relevant = (
-        db.query(models.Interaction)
-        .filter(models.Interaction.content_embedding.isnot(None))
-        .order_by(models.Interaction.content_embedding.cosine_distance(query_embedding))
-        .limit(3)
-        .all()
-    )
-
-    if relevant:
-        context_text = "\n\n---\n\n".join(
-            [f"Interação ({i.type}) em {i.interaction_date}:\n{i.content}" for i in relevant]
-        )
-    else:
-        context_text = "Nenhuma informação de interações disponível."
-
-    # ── Busca chunks de competitor_intel (RAG do Spy Module) ──
-    intel_chunks = (
-        db.query(models.DocumentChunk)
-        .filter(models.DocumentChunk.embedding.isnot(None))
-        .filter(models.DocumentChunk.filename.like("spy_intel/%"))
-        .order_by(models.DocumentChunk.embedding.cosine_distance(query_embedding))
-        .limit(3)
-        .all()
-    )
-    if intel_chunks:
-        intel_context = "\n\n---\n\n".join(
-            [f"[Inteligência Competitiva — {c.filename}]:\n{c.content}" for c in intel_chunks]
-        )
-        context_text = f"{context_text}\n\n=== INTELIGÊNCIA COMPETITIVA (Spy Module) ===\n\n{intel_context}"
+    context = await retrieval.retrieve_context(query_embedding)
 
-    answer = await generate_answer(
+    answer, tool_timings = "", []
+    async for event in stream_answer(
         query=request.query,
-        context=context_text,
-        db=db,
+        context=context.context_text(),
+        session_factory=SessionLocal,
         image_data=request.image,
+        cache_key=response_cache.key(query_embedding, context),
+    ):
+        if event["event"] == "tool_result":
+            tool_timings.append(schemas.ToolCallTiming(**event["data"]))
+        elif event["event"] == "done":
+            answer = event["data"]["answer"]
+        elif event["event"] == "error":
+            answer = event["data"]["message"]
+
+    return schemas.ChatResponse(
+        answer=answer,
+        retrieval=schemas.RetrievalTimings(embedding_ms=round(embedding_ms, 1), **context.timings()),
+        tools=tool_timings,
     )
 
-    return schemas.ChatResponse(answer=answer)
+
+def _sse(event: str, data: dict) -> str:
+    """Um evento Server-Sent Events (``event:`` + ``data:`` JSON)."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/ai/chat/stream")
+async def chat_with_rag_stream(request: schemas.ChatRequest):
+    """
+    Versão em streaming do /ai/chat (Server-Sent Events).
+
+    Mesmo fluxo (embedding → recuperação paralela → GPT), mas os tokens são
+    enviados à medida que a OpenAI os gera. Eventos, em ordem:
+
+      - ``retrieval``   → tempos da recuperação (mesmo formato de ``retrieval`` do /ai/chat)
+      - ``token``       → ``{"text"}`` pedaço da resposta (vários)
+      - ``tool_call``   → ``{"name", "arguments"}`` quando a IA aciona uma função
+      - ``tool_result`` → ``{"name", "status", "ms"}`` após executá-la
+      - ``done``        → ``{"answer"}`` resposta completa
+      - ``error``       → ``{"message"}`` falha (encerra o stream)
+
+    Respostas do response_cache chegam como um único ``token`` (``done``
+    com ``cached: true``). As sessões das tools são abertas dentro do
+    stream, só se a IA disparar Function Calling: uma única sessão/transação
+    para as escritas (em sequência) e uma por leitura (em paralelo) — ver
+    services._run_tool_calls.
+    """
+    async def events():
+        start = time.perf_counter()
+        try:
+            query_embedding = await generate_embedding(request.query)
+            embedding_ms = (time.perf_counter() - start) * 1000
+            context = await retrieval.retrieve_context(query_embedding)
+        except Exception as exc:
+            log.warning("Falha na recuperação de contexto do chat (stream): %s", exc, exc_info=True)
+            yield _sse("error", {"message": "Falha ao recuperar o contexto da pergunta."})
+            return
+
+        yield _sse("retrieval", schemas.RetrievalTimings(
+            embedding_ms=round(embedding_ms, 1), **context.timings()
+        ).model_dump())
+
+        async for event in stream_answer(
+            query=request.query,
+            context=context.context_text(),
+            session_factory=SessionLocal,
+            image_data=request.image,
+            cache_key=response_cache.key(query_embedding, context),
+        ):
+            yield _sse(event["event"], event["data"])
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx: não bufferizar o stream
+        },
+    )
 
 
 # ══════════════════════════════════════════════
@@ -111,74 +185,102 @@ async def chat_with_rag(request: schemas.ChatRequest, db: Session = Depends(get_
 # ══════════════════════════════════════════════
 
 @router.post("/brain/search", response_model=schemas.DocumentSearchResponse)
-async def brain_search(request: schemas.DocumentSearchRequest, db: Session = Depends(get_db)):
+async def brain_search(request: schemas.DocumentSearchRequest, db: AsyncSession = Depends(get_async_read_db)):
     """
     Busca semântica em documentos ingeridos (PDFs).
 
-    Retorna os 3 fragmentos mais relevantes.
+    Retorna os fragmentos mais relevantes (padrão: busca híbrida
+    lexical + vetorial, top-50 reordenado com diversidade entre arquivos —
+    ver BrainService.semantic_search). ``filters`` restringe por metadados
+    (source_type, lead_id, traffic_tier, datas) dentro da própria busca
+    indexada. O tempo de cada estágio vai em ``timings``.
     """
     try:
+        timings: dict = {}
         results = await BrainService.semantic_search(
             query=request.query,
             db=db,
             limit=request.limit,
             filename_filter=request.filename,
+            filters=SearchFilters.from_dict(request.filters.model_dump() if request.filters else None),
+            ef_search=request.ef_search,
+            mode=request.mode,
+            rerank_results=request.rerank,
+            timings=timings,
         )
 
         return schemas.DocumentSearchResponse(
             query=request.query,
             results=[schemas.DocumentChunkResult(**r) for r in results],
             total=len(results),
+            timings=schemas.SearchTimings(**timings),
         )
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Erro na busca semântica: {str(exc)}")
 
 
-@router.post("/brain/upload", response_model=schemas.DocumentIngestResponse)
-async def brain_upload(file: UploadFile = File(...), db: Session = Depends(get_db)):
+@router.post("/brain/upload", response_model=schemas.IngestionJobResponse, status_code=202)
+async def brain_upload(file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
     """
-    Recebe um PDF via upload, processa e indexa no banco.
+    Recebe um PDF via upload e enfileira a ingestão.
 
-    Pipeline: Upload → extração de texto → chunking → embeddings → pgvector
+    Pipeline (em background): extração de texto → chunking → embeddings → pgvector.
+    Acompanhe o progresso em GET /brain/jobs/{job_id}.
     """
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Apenas arquivos PDF são aceitos.")
 
-    try:
-        import io
+    contents = await file.read()
+    if not contents:
+        raise HTTPException(status_code=422, detail="Arquivo vazio.")
 
-        contents = await file.read()
-        pdf_stream = io.BytesIO(contents)
-        result = await BrainService.ingest_pdf(
-            file_path=pdf_stream,
-            db=db,
-            filename=file.filename,
-        )
-        return schemas.DocumentIngestResponse(**result)
-    except ValueError as exc:
-        raise HTTPException(status_code=422, detail=str(exc))
+    try:
+        job = await ingestion_jobs.enqueue(db, filename=file.filename, payload=contents)
     except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Erro na ingestão: {str(exc)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao enfileirar a ingestão: {str(exc)}")
+    return _job_accepted(job)
 
 
-@router.post("/brain/ingest", response_model=schemas.DocumentIngestResponse)
-async def brain_ingest(file_path: str, db: Session = Depends(get_db)):
+@router.post("/brain/ingest", response_model=schemas.IngestionJobResponse, status_code=202)
+async def brain_ingest(file_path: str, db: AsyncSession = Depends(get_async_db)):
     """
-    Ingere um PDF local (caminho no servidor) no banco de dados.
+    Enfileira a ingestão de um PDF local (caminho no servidor).
     """
+    path = Path(file_path)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Arquivo não encontrado: {path}")
+
     try:
-        result = await BrainService.ingest_pdf(file_path=file_path, db=db)
-        return schemas.DocumentIngestResponse(**result)
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=404, detail=str(exc))
-    except ValueError as exc:
-        raise HTTPException(status_code=422, detail=str(exc))
+        job = await ingestion_jobs.enqueue(db, filename=path.name, source_path=str(path.resolve()))
     except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Erro na ingestão: {str(exc)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao enfileirar a ingestão: {str(exc)}")
+    return _job_accepted(job)
+
+
+@router.get("/brain/jobs/{job_id}", response_model=schemas.IngestionJobStatusResponse)
+async def brain_job_status(job_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    """
+    Estado de um job de ingestão: páginas lidas, chunks vetorizados/gravados e erro.
+
+    Lido do primário (não da réplica) para o progresso não voltar no tempo.
+    """
+    job = await db.get(models.IngestionJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de ingestão não encontrado.")
+    return job
+
+
+def _job_accepted(job: models.IngestionJob) -> schemas.IngestionJobResponse:
+    return schemas.IngestionJobResponse(
+        job_id=job.id,
+        filename=job.filename,
+        status=job.status,
+        status_url=f"/brain/jobs/{job.id}",
+    )
 
 
 @router.get("/brain/status")
-def brain_status(db: Session = Depends(get_db)):
+def brain_status(db: Session = Depends(get_read_db)):
     """
     Retorna estatísticas da base de conhecimento documental.
     """
@@ -0,0 +1,71 @@
+"""
+Search Filters — Filtros de metadados da busca em documentos
+============================================================
+``/brain/search`` aceita ``filters`` (source_type, lead_id, traffic_tier,
+intervalo de created_at e contenção em metadata). Cada filtro vira um
+predicado indexado (migration 011):
+
+  - source_type / lead_id / traffic_tier → colunas geradas a partir do
+    metadata_json, com btree (PDFs têm source_type ``document``)
+  - created_from / created_to            → btree em created_at
+  - metadata                              → ``metadata_json @> {...}``
+                                            (GIN jsonb_path_ops)
+
+Os predicados entram no WHERE da busca vetorial (e da lexical, no
+híbrido) — não são aplicados depois do top-K. Para que o HNSW não devolva
+menos que ``limit`` linhas quando o filtro é seletivo, ``semantic_search``
+liga a varredura iterativa do índice (vector_index.set_search_params
+``filtered=True``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Select
+
+from app.models import DocumentChunk
+
+
+@dataclass
+class SearchFilters:
+    """Filtros combinados com AND; listas viram IN."""
+    source_type: Optional[List[str]] = None
+    lead_id: Optional[UUID] = None
+    traffic_tier: Optional[List[str]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["SearchFilters"]:
+        """None (ou sem nenhum filtro preenchido) → None."""
+        if not data:
+            return None
+        filters = cls(**data)
+        return None if filters.is_empty() else filters
+
+    def is_empty(self) -> bool:
+        return not any((
+            self.source_type, self.lead_id, self.traffic_tier,
+            self.created_from, self.created_to, self.metadata,
+        ))
+
+    def apply(self, stmt: Select) -> Select:
+        """Acrescenta os predicados ao WHERE de ``stmt`` (que lê document_chunks)."""
+        if self.source_type:
+            stmt = stmt.where(DocumentChunk.source_type.in_(self.source_type))
+        if self.lead_id:
+            stmt = stmt.where(DocumentChunk.lead_id == self.lead_id)
+        if self.traffic_tier:
+            stmt = stmt.where(DocumentChunk.traffic_tier.in_(self.traffic_tier))
+        if self.created_from:
+            stmt = stmt.where(DocumentChunk.created_at >= self.created_from)
+        if self.created_to:
+            stmt = stmt.where(DocumentChunk.created_at < self.created_to)
+        if self.metadata:
+            stmt = stmt.where(DocumentChunk.metadata_json.contains(self.metadata))
+        return stmt
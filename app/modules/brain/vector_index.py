@@ -0,0 +1,189 @@
+"""
+Vector Index — Parâmetros dos índices vetoriais (pgvector HNSW)
+===============================================================
+``document_chunks.embedding`` e ``interactions.content_embedding`` usam
+índices HNSW (migration 009). Diferente do IVFFlat, o HNSW não depende de
+treino: pode ser criado com a tabela vazia e continua bom conforme ela
+cresce.
+
+  - construção: HNSW_M (vizinhos por nó) e HNSW_EF_CONSTRUCTION — usados
+    pela migration/modelos (16/64) e por scripts/rebuild_vector_indexes.py
+  - busca: ``hnsw.ef_search`` por transação (``SET LOCAL``), nunca menor
+    que o LIMIT da query — com ef_search < LIMIT o índice devolve menos
+    linhas que o pedido
+
+Precisão do índice (VECTOR_INDEX_PRECISION — a memória do índice é o que
+pesa na instância): a coluna continua ``vector`` (float32, usada para
+reordenar), mas o HNSW pode indexar uma expressão reduzida:
+
+  - ``full``    → ``embedding vector_cosine_ops`` (4 bytes/dim)
+  - ``halfvec`` → ``(embedding::halfvec(1536)) halfvec_cosine_ops`` (2 bytes/dim)
+  - ``binary``  → ``(binary_quantize(embedding)::bit(1536)) bit_hamming_ops``
+    (1 bit/dim) — pré-filtro por Hamming
+
+Com precisão reduzida, ``knn`` busca ``limit × fator`` candidatos pelo
+índice e reordena só esses pela distância de cosseno exata. O índice é
+trocado por scripts/rebuild_vector_indexes.py --precision; a variável deve
+acompanhar o índice existente (senão a busca cai em varredura sequencial).
+
+Buscas com filtro (WHERE seletivo — ``source_type``, ``lead_id``, ver
+search_filters): o HNSW lê ef_search vizinhos e só então aplica o filtro,
+podendo devolver menos linhas que o LIMIT (ou nenhuma). Com
+``filtered=True``, ``set_search_params`` liga a varredura iterativa do
+pgvector >= 0.8 (``hnsw.iterative_scan``): o índice continua varrendo até
+preencher o LIMIT ou ler HNSW_MAX_SCAN_TUPLES tuplas. HNSW_ITERATIVE_SCAN:
+
+  - ``strict_order`` (padrão) → resultados na ordem exata de distância
+  - ``relaxed_order``         → mais rápido; a ordem final vem do ORDER BY
+                                externo de ``knn``/rerank
+  - ``off``                   → pgvector < 0.8 (o parâmetro não existe)
+
+Recall × latência × memória: scripts/benchmark_vector_index.py.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional, Tuple
+
+from pgvector.sqlalchemy import BIT, HALFVEC, VECTOR
+from sqlalchemy import Select, cast, func, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+# Máximo aceito pelo pgvector para hnsw.ef_search (acima disso o SET falha)
+HNSW_EF_SEARCH_MAX = 1000
+# Só para índices IVFFlat recriados pelo script de rebuild
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+
+# Índices vetoriais por tabela: (coluna, nome do índice)
+VECTOR_INDEXES = {
+    "document_chunks": ("embedding", "idx_document_chunks_embedding_hnsw"),
+    "interactions": ("content_embedding", "idx_interactions_embedding_hnsw"),
+}
+
+VECTOR_DIMENSIONS = 1536
+PRECISIONS = ("full", "halfvec", "binary")
+VECTOR_INDEX_PRECISION = os.getenv("VECTOR_INDEX_PRECISION", "full").lower()
+# Candidatos por resultado final, reordenados com o vetor completo
+HALFVEC_RERANK_FACTOR = int(os.getenv("HALFVEC_RERANK_FACTOR", "2"))
+BINARY_RERANK_FACTOR = int(os.getenv("BINARY_RERANK_FACTOR", "10"))
+
+# Varredura iterativa em buscas filtradas (pgvector >= 0.8)
+ITERATIVE_SCAN_MODES = ("off", "strict_order", "relaxed_order")
+HNSW_ITERATIVE_SCAN = os.getenv("HNSW_ITERATIVE_SCAN", "strict_order").lower()
+HNSW_MAX_SCAN_TUPLES = int(os.getenv("HNSW_MAX_SCAN_TUPLES", "20000"))
+
+
+def _precision(precision: Optional[str]) -> str:
+    precision = (precision or VECTOR_INDEX_PRECISION).lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precisão inválida: {precision!r} (use {', '.join(PRECISIONS)})")
+    return precision
+
+
+def index_expression(
+    column: str,
+    precision: Optional[str] = None,
+    dimensions: int = VECTOR_DIMENSIONS,
+) -> Tuple[str, str]:
+    """(expressão indexada, operator class) do HNSW para a precisão."""
+    precision = _precision(precision)
+    if precision == "halfvec":
+        return f"({column}::halfvec({dimensions}))", "halfvec_cosine_ops"
+    if precision == "binary":
+        return f"(binary_quantize({column})::bit({dimensions}))", "bit_hamming_ops"
+    return column, "vector_cosine_ops"
+
+
+def candidates_for(limit: int, precision: Optional[str] = None) -> int:
+    """Linhas lidas do índice para devolver ``limit`` (antes da reordenação)."""
+    precision = _precision(precision)
+    if precision == "halfvec":
+        return limit * HALFVEC_RERANK_FACTOR
+    if precision == "binary":
+        return limit * BINARY_RERANK_FACTOR
+    return limit
+
+
+def _approx_distance(column, query_embedding, precision: str):
+    """Distância na mesma expressão do índice (para o planner usá-lo)."""
+    if precision == "halfvec":
+        return cast(column, HALFVEC(VECTOR_DIMENSIONS)).cosine_distance(query_embedding)
+    quantized = cast(func.binary_quantize(column), BIT(VECTOR_DIMENSIONS))
+    # CAST explícito: binary_quantize tem sobrecargas (vector e halfvec)
+    query_vector = cast(literal(query_embedding, VECTOR(VECTOR_DIMENSIONS)), VECTOR(VECTOR_DIMENSIONS))
+    query_bits = cast(func.binary_quantize(query_vector), BIT(VECTOR_DIMENSIONS))
+    return quantized.hamming_distance(query_bits)
+
+
+def knn(
+    stmt: Select,
+    column,
+    pk,
+    query_embedding,
+    *,
+    limit: int,
+    precision: Optional[str] = None,
+) -> Select:
+    """
+    Ordena ``stmt`` pela distância de cosseno a ``query_embedding`` com
+    LIMIT ``limit``.
+
+    Com precisão reduzida, as linhas são restritas aos
+    ``candidates_for(limit)`` vizinhos pelo índice quantizado (com os
+    mesmos filtros WHERE de ``stmt``) e reordenadas pelo vetor completo.
+    ``stmt`` deve selecionar de uma única tabela (a de ``column``/``pk``).
+    """
+    precision = _precision(precision)
+    distance = column.cosine_distance(query_embedding)
+    if precision != "full":
+        candidates = select(pk).where(column.isnot(None))
+        if stmt.whereclause is not None:
+            candidates = candidates.where(stmt.whereclause)
+        candidates = (
+            candidates
+            .order_by(_approx_distance(column, query_embedding, precision))
+            .limit(candidates_for(limit, precision))
+        )
+        stmt = stmt.where(pk.in_(candidates.correlate(None).scalar_subquery()))
+    return stmt.order_by(distance).limit(limit)
+
+
+def ef_search_for(limit: int, ef_search: Optional[int] = None) -> int:
+    """ef_search efetivo: o configurado, nunca abaixo do LIMIT nem acima de HNSW_EF_SEARCH_MAX."""
+    return min(max(int(ef_search or HNSW_EF_SEARCH), int(limit)), HNSW_EF_SEARCH_MAX)
+
+
+def iterative_scan_mode(mode: Optional[str] = None) -> str:
+    mode = (mode or HNSW_ITERATIVE_SCAN).lower()
+    if mode not in ITERATIVE_SCAN_MODES:
+        raise ValueError(f"HNSW_ITERATIVE_SCAN inválido: {mode!r} (use {', '.join(ITERATIVE_SCAN_MODES)})")
+    return mode
+
+
+async def set_search_params(
+    db: AsyncSession,
+    *,
+    limit: int,
+    ef_search: Optional[int] = None,
+    filtered: bool = False,
+) -> None:
+    """
+    ``SET LOCAL hnsw.ef_search`` (e ``ivfflat.probes``) na transação corrente
+    da sessão — vale para as buscas seguintes até o commit/rollback.
+    ``limit`` é o LIMIT final; com precisão reduzida o ef_search cobre os
+    candidatos da reordenação. ``filtered=True`` (WHERE seletivo) liga a
+    varredura iterativa do índice (HNSW_ITERATIVE_SCAN).
+    """
+    limit = candidates_for(limit)
+    await db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search_for(limit, ef_search)}"))
+    await db.execute(text(f"SET LOCAL ivfflat.probes = {int(IVFFLAT_PROBES)}"))
+    mode = iterative_scan_mode()
+    if filtered and mode != "off":
+        await db.execute(text(f"SET LOCAL hnsw.iterative_scan = {mode}"))
+        await db.execute(text(f"SET LOCAL hnsw.max_scan_tuples = {int(HNSW_MAX_SCAN_TUPLES)}"))
+        # IVFFlat (índices recriados pelo rebuild) só tem relaxed_order
+        await db.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
@@ -0,0 +1,339 @@
+"""
+Audit Maintenance — Particionamento, retenção e rollups de audit_logs
+======================================================================
+Rotinas de manutenção da tabela audit_logs (particionada por mês em
+``timestamp``). Executadas pelo comando ``scripts/audit_maintenance.py``
+(cron/agendador), nunca no caminho de uma requisição.
+
+  1. convert_to_partitioned — migra uma audit_logs legada (não particionada)
+  2. ensure_partitions      — cria partições mensais antecipadamente
+  3. enforce_retention      — descarta ou arquiva partições antigas
+  4. refresh_rollups        — recalcula agregados horários por path
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app import models
+
+log = logging.getLogger("vyron.core.audit_maintenance")
+
+# ── Política padrão (sobrescrevível por env) ──────────────────────
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "12"))
+AUDIT_RETENTION_MODE = os.getenv("AUDIT_RETENTION_MODE", "drop")  # drop | archive
+AUDIT_PARTITIONS_AHEAD = int(os.getenv("AUDIT_PARTITIONS_AHEAD", "3"))
+AUDIT_ARCHIVE_SCHEMA = os.getenv("AUDIT_ARCHIVE_SCHEMA", "audit_archive")
+
+_PARENT = "audit_logs"
+_DEFAULT_PARTITION = "audit_logs_default"
+_PARTITION_RE = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+
+
+# ────────────────────────────────────────────────────────────
+# HELPERS
+# ────────────────────────────────────────────────────────────
+
+def _utc_today() -> date:
+    """Data corrente em UTC (os timestamps gravados são UTC — ver models.AuditLog)."""
+    return datetime.utcnow().date()
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Nome da partição mensal (ex.: audit_logs_y2026m01)."""
+    return f"{_PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """Indica se audit_logs já é uma tabela particionada."""
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": _PARENT}).scalar())
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    """Lista as partições anexadas a audit_logs."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :name AND pg_table_is_visible(p.oid) "
+        "ORDER BY c.relname"
+    ), {"name": _PARENT}).all()
+    return [r.relname for r in rows]
+
+
+# ────────────────────────────────────────────────────────────
+# 1. CONVERSÃO DA TABELA LEGADA
+# ────────────────────────────────────────────────────────────
+
+def convert_to_partitioned(conn: Connection, months_ahead: int = AUDIT_PARTITIONS_AHEAD) -> bool:
+    """
+    Converte uma audit_logs não particionada na versão particionada.
+
+    Idempotente: não faz nada se a tabela já for particionada ou não existir.
+    A tabela antiga é renomeada, os dados são copiados para as novas partições
+    e a legada é removida — tudo na transação corrente.
+
+    Returns:
+        True se a conversão foi realizada.
+    """
+    exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": _PARENT}).scalar()
+    if not exists or is_partitioned(conn):
+        return False
+
+    legacy = f"{_PARENT}_legacy"
+    conn.execute(text(f"ALTER TABLE {_PARENT} RENAME TO {legacy}"))
+
+    # Nomes de índice são globais no schema — libera-os para a nova tabela
+    for (index_name,) in conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :t"
+    ), {"t": legacy}).all():
+        conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"'))
+
+    models.AuditLog.__table__.create(conn)
+
+    # timestamp faz parte da PK: linhas legadas sem timestamp abortariam a cópia
+    backfilled = conn.execute(text(
+        f"UPDATE {legacy} SET timestamp = now() AT TIME ZONE 'utc' WHERE timestamp IS NULL"
+    )).rowcount
+    if backfilled:
+        log.warning("audit_logs legada: %s linhas sem timestamp receberam o horário atual (UTC).", backfilled)
+
+    oldest = conn.execute(text(f"SELECT min(timestamp) FROM {legacy}")).scalar()
+    start = _month_start(oldest.date()) if oldest else _month_start(_utc_today())
+    _create_month_range(conn, start, _add_months(_month_start(_utc_today()), months_ahead))
+    # Timestamps além da faixa gerada (datas futuras) caem na DEFAULT
+    _ensure_default_partition(conn)
+
+    moved = conn.execute(text(f"INSERT INTO {_PARENT} SELECT * FROM {legacy}")).rowcount
+    conn.execute(text(f"DROP TABLE {legacy}"))
+    log.info("audit_logs convertida para particionada (%s linhas migradas).", moved)
+    return True
+
+
+# ────────────────────────────────────────────────────────────
+# 2. PARTIÇÕES ANTECIPADAS
+# ────────────────────────────────────────────────────────────
+
+def _create_month_range(conn: Connection, first: date, last: date) -> List[str]:
+    created: List[str] = []
+    has_default = bool(conn.execute(text("SELECT to_regclass(:name)"), {"name": _DEFAULT_PARTITION}).scalar())
+    month = first
+    while month <= last:
+        name = partition_name(month)
+        exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if not exists:
+            _create_month_partition(conn, name, month, _add_months(month, 1), has_default)
+            created.append(name)
+        month = _add_months(month, 1)
+    return created
+
+
+def _create_month_partition(conn: Connection, name: str, start: date, end: date, has_default: bool) -> None:
+    """
+    Cria a partição [start, end). Linhas desse intervalo que caíram na
+    DEFAULT (timestamps futuros) impediriam o CREATE … PARTITION OF: são
+    retiradas da DEFAULT (travada contra novas inserções), a partição é
+    criada e elas são reinseridas pela tabela mãe — tudo na transação
+    corrente.
+    """
+    bounds = {"start": start, "end": end}
+    moved = 0
+    if has_default:
+        conn.execute(text(f"LOCK TABLE {_DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(text(
+            f"CREATE TEMP TABLE _audit_default_moved (LIKE {_DEFAULT_PARTITION}) ON COMMIT DROP"
+        ))
+        moved = conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {_DEFAULT_PARTITION}
+                WHERE timestamp >= :start AND timestamp < :end
+                RETURNING *
+            )
+            INSERT INTO _audit_default_moved SELECT * FROM moved
+        """), bounds).rowcount
+
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {_PARENT} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+    if has_default:
+        if moved:
+            conn.execute(text(f"INSERT INTO {_PARENT} SELECT * FROM _audit_default_moved"))
+            log.info("%s: %s linhas movidas da partição DEFAULT.", name, moved)
+        conn.execute(text("DROP TABLE _audit_default_moved"))
+
+
+def _ensure_default_partition(conn: Connection) -> bool:
+    """Cria a partição DEFAULT se não existir (True se criou)."""
+    exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": _DEFAULT_PARTITION}).scalar()
+    if exists:
+        return False
+    conn.execute(text(f"CREATE TABLE {_DEFAULT_PARTITION} PARTITION OF {_PARENT} DEFAULT"))
+    return True
+
+
+def ensure_partitions(conn: Connection, months_ahead: int = AUDIT_PARTITIONS_AHEAD) -> List[str]:
+    """
+    Garante partições do mês corrente até ``months_ahead`` meses à frente,
+    além da partição DEFAULT (rede de segurança para timestamps fora da faixa).
+
+    Returns:
+        Nomes das partições criadas nesta execução.
+    """
+    current = _month_start(_utc_today())
+    created = _create_month_range(conn, current, _add_months(current, months_ahead))
+    if _ensure_default_partition(conn):
+        created.append(_DEFAULT_PARTITION)
+
+    if created:
+        log.info("Partições criadas: %s", ", ".join(created))
+    return created
+
+
+# ────────────────────────────────────────────────────────────
+# 3. RETENÇÃO
+# ────────────────────────────────────────────────────────────
+
+def enforce_retention(
+    conn: Connection,
+    retention_months: int = AUDIT_RETENTION_MONTHS,
+    mode: str = AUDIT_RETENTION_MODE,
+) -> List[str]:
+    """
+    Remove (``drop``) ou move para o schema de arquivo (``archive``) as
+    partições cujo mês inteiro é anterior à janela de retenção. Linhas da
+    partição DEFAULT anteriores ao corte são apagadas (ou copiadas para
+    ``<AUDIT_ARCHIVE_SCHEMA>.audit_logs_default`` e apagadas, em
+    ``archive``).
+
+    Returns:
+        Nomes das partições descartadas/arquivadas.
+    """
+    if mode not in ("drop", "archive"):
+        raise ValueError(f"Modo de retenção inválido: {mode!r} (use 'drop' ou 'archive')")
+
+    cutoff = _add_months(_month_start(_utc_today()), -retention_months)
+    expired: List[str] = []
+    _expire_default_rows(conn, cutoff, mode)
+
+    for name in list_partitions(conn):
+        match = _PARTITION_RE.match(name)
+        if not match:
+            continue  # partição DEFAULT ou nome fora do padrão
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if _add_months(month, 1) > cutoff:
+            continue
+
+        conn.execute(text(f"ALTER TABLE {_PARENT} DETACH PARTITION {name}"))
+        if mode == "archive":
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {AUDIT_ARCHIVE_SCHEMA}"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {AUDIT_ARCHIVE_SCHEMA}"))
+        else:
+            conn.execute(text(f"DROP TABLE {name}"))
+        expired.append(name)
+
+    if expired:
+        log.info("Retenção (%s, %d meses): %s", mode, retention_months, ", ".join(expired))
+    return expired
+
+
+def _expire_default_rows(conn: Connection, cutoff: date, mode: str) -> int:
+    exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": _DEFAULT_PARTITION}).scalar()
+    if not exists:
+        return 0
+    params = {"cutoff": cutoff}
+    if mode == "archive":
+        archive = f"{AUDIT_ARCHIVE_SCHEMA}.{_DEFAULT_PARTITION}"
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {AUDIT_ARCHIVE_SCHEMA}"))
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {archive} (LIKE {_DEFAULT_PARTITION})"))
+        removed = conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {_DEFAULT_PARTITION} WHERE timestamp < :cutoff RETURNING *
+            )
+            INSERT INTO {archive} SELECT * FROM moved
+        """), params).rowcount
+    else:
+        removed = conn.execute(text(
+            f"DELETE FROM {_DEFAULT_PARTITION} WHERE timestamp < :cutoff"
+        ), params).rowcount
+    if removed:
+        log.info("Retenção (%s): %s linhas antigas removidas da partição DEFAULT.", mode, removed)
+    return removed
+
+
+# ────────────────────────────────────────────────────────────
+# 4. ROLLUPS HORÁRIOS
+# ────────────────────────────────────────────────────────────
+
+_ROLLUP_SQL = text("""
+    INSERT INTO audit_log_rollups (
+        bucket, path, request_count, client_error_count, error_count,
+        error_rate, p50_duration_ms, p95_duration_ms, updated_at
+    )
+    SELECT
+        date_trunc('hour', timestamp) AS bucket,
+        path,
+        count(*),
+        count(*) FILTER (WHERE status_code BETWEEN 400 AND 499),
+        count(*) FILTER (WHERE status_code >= 500),
+        round(count(*) FILTER (WHERE status_code >= 500)::numeric / count(*), 4),
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms),
+        percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms),
+        now() AT TIME ZONE 'utc'
+    FROM audit_logs
+    WHERE timestamp >= :since AND timestamp < :until
+    GROUP BY 1, 2
+    ON CONFLICT (bucket, path) DO UPDATE SET
+        request_count = EXCLUDED.request_count,
+        client_error_count = EXCLUDED.client_error_count,
+        error_count = EXCLUDED.error_count,
+        error_rate = EXCLUDED.error_rate,
+        p50_duration_ms = EXCLUDED.p50_duration_ms,
+        p95_duration_ms = EXCLUDED.p95_duration_ms,
+        updated_at = EXCLUDED.updated_at
+""")
+
+
+def refresh_rollups(
+    conn: Connection,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> int:
+    """
+    Recalcula os rollups horários no intervalo [since, until).
+
+    Por padrão reprocessa as 2 últimas horas (a hora corrente ainda está
+    incompleta e é sobrescrita na próxima execução).
+
+    Returns:
+        Quantidade de buckets (hora × path) gravados.
+    """
+    now = datetime.utcnow()
+    until = until or now
+    since = since or (now - timedelta(hours=2))
+    since = since.replace(minute=0, second=0, microsecond=0)
+
+    written = conn.execute(_ROLLUP_SQL, {"since": since, "until": until}).rowcount
+    log.info("Rollups de auditoria: %s buckets (%s → %s)", written, since, until)
+    return written
@@ -0,0 +1,126 @@
+"""
+Audit Repository — Consultas paginadas e filtradas de audit_logs
+================================================================
+Paginação por keyset em (timestamp, id): o cursor carrega a última posição
+lida, então cada página é uma busca de índice — sem OFFSET, com custo
+constante mesmo no fim de um mês de logs.
+
+Cada filtro tem um índice composto correspondente em ``models.AuditLog``.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+
+from app import models
+
+
+@dataclass
+class AuditLogFilters:
+    """Filtros aceitos pelas rotas de consulta de auditoria."""
+    method: Optional[str] = None
+    path_prefix: Optional[str] = None
+    status_min: Optional[int] = None
+    status_max: Optional[int] = None
+    client_ip: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+
+def encode_cursor(timestamp: datetime, log_id: UUID) -> str:
+    """Serializa a posição (timestamp, id) em um cursor opaco."""
+    raw = f"{timestamp.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Desserializa um cursor gerado por ``encode_cursor``.
+
+    Raises:
+        ValueError: Se o cursor estiver malformado.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts_raw, id_raw = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(ts_raw), UUID(id_raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from exc
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def filtered_query(db: Session, filters: AuditLogFilters) -> Query:
+    """Aplica os filtros sobre audit_logs (sem ordenação/limite)."""
+    log = models.AuditLog
+    query = db.query(log)
+
+    if filters.method:
+        query = query.filter(log.method == filters.method.upper())
+    if filters.path_prefix:
+        # LIKE 'prefixo%' usa o índice varchar_pattern_ops em path
+        query = query.filter(log.path.like(f"{_escape_like(filters.path_prefix)}%", escape="\\"))
+    if filters.status_min is not None:
+        query = query.filter(log.status_code >= filters.status_min)
+    if filters.status_max is not None:
+        query = query.filter(log.status_code <= filters.status_max)
+    if filters.client_ip:
+        query = query.filter(log.client_ip == filters.client_ip)
+    if filters.since:
+        query = query.filter(log.timestamp >= filters.since)
+    if filters.until:
+        query = query.filter(log.timestamp < filters.until)
+    return query
+
+
+def fetch_page(
+    db: Session,
+    filters: AuditLogFilters,
+    *,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Retorna uma página (mais recentes primeiro) e o cursor da próxima.
+
+    Returns:
+        (registros, next_cursor) — next_cursor é None na última página.
+    """
+    log = models.AuditLog
+    query = filtered_query(db, filters)
+    if cursor:
+        ts, log_id = decode_cursor(cursor)
+        query = query.filter(tuple_(log.timestamp, log.id) < tuple_(ts, log_id))
+
+    # Busca limit+1 para saber se existe próxima página sem um COUNT
+    rows = query.order_by(log.timestamp.desc(), log.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.timestamp, last.id)
+
+
+def iter_export(db: Session, filters: AuditLogFilters, *, batch_size: int = 1000) -> Iterator[models.AuditLog]:
+    """
+    Itera todos os registros filtrados em ordem cronológica usando cursor
+    server-side (stream_results) — memória constante independente do volume.
+    """
+    log = models.AuditLog
+    query = (
+        filtered_query(db, filters)
+        .order_by(log.timestamp.asc(), log.id.asc())
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    yield from query
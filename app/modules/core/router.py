@@ -2,30 +2,143 @@
 Core Router — System Core
 ==========================
 Endpoints administrativos do Vyron System:
-  - GET /audit-logs  →  Consulta os logs de auditoria (últimos N registros)
+  - GET /audit-logs          →  Consulta os logs de auditoria (últimos N registros)
+  - GET /audit-logs/page     →  Paginação por cursor (timestamp, id) + filtros
+  - GET /audit-logs/export   →  Exportação NDJSON em streaming
+  - GET /audit-logs/rollups  →  Agregados horários por path (dashboards)
+  - GET /system/metrics      →  Métricas operacionais internas (auditoria, pools, réplica, schema, embeddings, ingestão)
 """
 
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_read_db, ReadSessionLocal, replica_guard
+from app.db_pool import pool_stats
+from app.modules.brain.embedding_cache import embedding_cache
+from app.modules.brain.embedding_provider import provider_stats
+from app.modules.brain.response_cache import response_cache
+from app.modules.brain.embedding_scheduler import embedding_scheduler
+from app.modules.brain.ingestion_jobs import ingestion_worker
+from app.schema import last_status as schema_status
 from app import models, schemas
+from app.middleware.audit_writer import audit_writer
+from app.modules.core.audit_repository import AuditLogFilters, fetch_page, iter_export
 
 router = APIRouter(tags=["Core"])
 
 
+def _audit_filters(
+    method: Optional[str] = Query(default=None, description="POST, PATCH, PUT, DELETE, BATCH, SPY…"),
+    path_prefix: Optional[str] = Query(default=None, description="Prefixo do path (ex.: /brain/)"),
+    status_min: Optional[int] = Query(default=None, ge=100, le=599, description="Status mínimo"),
+    status_max: Optional[int] = Query(default=None, ge=100, le=599, description="Status máximo"),
+    client_ip: Optional[str] = Query(default=None, description="IP de origem"),
+    since: Optional[datetime] = Query(default=None, description="Início da janela (UTC, inclusive)"),
+    until: Optional[datetime] = Query(default=None, description="Fim da janela (UTC, exclusivo)"),
+) -> AuditLogFilters:
+    """Dependency com os filtros comuns às rotas de auditoria."""
+    return AuditLogFilters(
+        method=method,
+        path_prefix=path_prefix,
+        status_min=status_min,
+        status_max=status_max,
+        client_ip=client_ip,
+        since=since,
+        until=until,
+    )
+
+
 @router.get("/audit-logs", response_model=List[schemas.AuditLogResponse])
 def list_audit_logs(
     limit: int = Query(default=50, ge=1, le=500, description="Quantidade de registros"),
-    db: Session = Depends(get_db),
+    filters: AuditLogFilters = Depends(_audit_filters),
+    db: Session = Depends(get_read_db),
 ):
     """Retorna os últimos registros de auditoria ordenados por timestamp DESC."""
-    logs = (
-        db.query(models.AuditLog)
-        .order_by(models.AuditLog.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
+    logs, _ = fetch_page(db, filters, limit=limit)
     return logs
+
+
+@router.get("/audit-logs/page", response_model=schemas.AuditLogPage)
+def page_audit_logs(
+    limit: int = Query(default=100, ge=1, le=1000, description="Registros por página"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor da página anterior"),
+    filters: AuditLogFilters = Depends(_audit_filters),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Paginação por keyset em (timestamp, id), mais recentes primeiro.
+
+    Passe o ``next_cursor`` retornado para obter a página seguinte;
+    ``next_cursor`` nulo indica a última página.
+    """
+    try:
+        logs, next_cursor = fetch_page(db, filters, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return schemas.AuditLogPage(items=logs, next_cursor=next_cursor)
+
+
+@router.get("/audit-logs/export")
+def export_audit_logs(filters: AuditLogFilters = Depends(_audit_filters)):
+    """
+    Exporta os registros filtrados como NDJSON (um JSON por linha), em ordem
+    cronológica. O resultado é transmitido em streaming a partir de um cursor
+    server-side — um mês inteiro de logs não é carregado em memória.
+    """
+    def _stream():
+        # Sessão própria: vive enquanto o corpo da resposta é transmitido
+        db = ReadSessionLocal()
+        try:
+            for log in iter_export(db, filters):
+                yield schemas.AuditLogDetailResponse.model_validate(log).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        _stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=audit_logs.ndjson"},
+    )
+
+
+@router.get("/audit-logs/rollups", response_model=List[schemas.AuditLogRollupResponse])
+def list_audit_rollups(
+    path: Optional[str] = Query(default=None, description="Filtra por path exato"),
+    since: Optional[datetime] = Query(default=None, description="Início da janela (UTC)"),
+    until: Optional[datetime] = Query(default=None, description="Fim da janela (UTC)"),
+    limit: int = Query(default=168, ge=1, le=5000, description="Quantidade de buckets"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Retorna os rollups horários (contagem, p50/p95 de duração, taxa de erro)
+    pré-computados por scripts/audit_maintenance.py — nunca varre audit_logs.
+    """
+    query = db.query(models.AuditLogRollup)
+    if path:
+        query = query.filter(models.AuditLogRollup.path == path)
+    if since:
+        query = query.filter(models.AuditLogRollup.bucket >= since)
+    if until:
+        query = query.filter(models.AuditLogRollup.bucket < until)
+    return query.order_by(models.AuditLogRollup.bucket.desc()).limit(limit).all()
+
+
+@router.get("/system/metrics")
+def system_metrics():
+    """Métricas operacionais do processo (auditoria, pools, réplica, schema, embeddings, worker de ingestão, cache de respostas)."""
+    return {
+        "audit_writer": audit_writer.stats(),
+        "db_pool": pool_stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_provider": provider_stats(),
+        "embedding_scheduler": embedding_scheduler.stats(),
+        "ingestion_worker": ingestion_worker.stats(),
+        "read_replica": replica_guard.stats(),
+        "response_cache": response_cache.stats(),
+        "schema": schema_status,
+    }
@@ -12,7 +12,7 @@ from pydantic import BaseModel
 from uuid import uuid4
 import json
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app import models, schemas
 from app.services import (
     generate_embedding,
@@ -21,12 +21,21 @@ from app.services import (
     _execute_add_expense,
     _execute_add_marketing_stats,
 )
-from app.modules.finance.report_service import FinanceReportService
-from app.modules.finance.contract_service import ContractService
 
 router = APIRouter(tags=["Finance"])
 
 
+# Os serviços de PDF importam fpdf2 — carregados só na primeira geração
+def _report_service():
+    from app.modules.finance.report_service import FinanceReportService
+    return FinanceReportService
+
+
+def _contract_service():
+    from app.modules.finance.contract_service import ContractService
+    return ContractService
+
+
 # ══════════════════════════════════════════════
 # PROJETOS
 # ══════════════════════════════════════════════
@@ -462,7 +471,7 @@ def get_expense(expense_id: str, db: Session = Depends(get_db)):
 # ══════════════════════════════════════════════
 
 @router.get("/projects/{project_id}/financial-dashboard", response_model=schemas.FinancialSummary)
-def get_project_financial_dashboard(project_id: str, db: Session = Depends(get_db)):
+def get_project_financial_dashboard(project_id: str, db: Session = Depends(get_read_db)):
     """Retorna um resumo financeiro consolidado do projeto."""
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
@@ -494,7 +503,7 @@ def get_project_financial_dashboard(project_id: str, db: Session = Depends(get_d
 
 
 @router.get("/projects/{project_id}/marketing-kpis", response_model=schemas.MarketingKPIs)
-def get_project_marketing_kpis(project_id: str, db: Session = Depends(get_db)):
+def get_project_marketing_kpis(project_id: str, db: Session = Depends(get_read_db)):
     """Retorna KPIs de marketing calculados para um projeto."""
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
@@ -544,7 +553,7 @@ def export_project_pdf_v2(project_id: str, request: Request, db: Session = Depen
     na tabela audit_logs para rastreabilidade.
     """
     try:
-        pdf_bytes = FinanceReportService.generate(db, project_id)
+        pdf_bytes = _report_service().generate(db, project_id)
 
         # -- Audit: registrar geracao do relatorio --
         try:
@@ -614,7 +623,7 @@ def generate_contract(project_id: str, request: Request, db: Session = Depends(g
     Persiste o registro na tabela `contracts` com status `draft`.
     """
     try:
-        pdf_bytes, contract_number = ContractService.generate(db, project_id)
+        pdf_bytes, contract_number = _contract_service().generate(db, project_id)
 
         # Audit log
         try:
@@ -660,7 +669,7 @@ def contract_info(project_id: str, db: Session = Depends(get_db)):
 
     client = project.client
     client_name = client.name if client else "N/A"
-    contract_number = ContractService.generate_contract_number(project_id)
+    contract_number = _contract_service().generate_contract_number(project_id)
 
     return schemas.ContractGenerateResponse(
         success=True,
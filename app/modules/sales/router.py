@@ -6,6 +6,7 @@ import threading
 
 from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, date
@@ -13,7 +14,7 @@ from decimal import Decimal
 from pydantic import BaseModel
 from uuid import UUID, uuid4
 
-from app.database import get_db, SessionLocal
+from app.database import get_db, get_read_db, get_async_db, SessionLocal
 from app import models, schemas
 from app.services import (
     generate_embedding,
@@ -145,14 +146,14 @@ def delete_client(client_id: str, db: Session = Depends(get_db)):
 # ══════════════════════════════════════════════
 
 @router.post("/interactions/", response_model=schemas.InteractionResponse, status_code=201)
-async def create_interaction(interaction: schemas.InteractionCreate, db: Session = Depends(get_db)):
+async def create_interaction(interaction: schemas.InteractionCreate, db: AsyncSession = Depends(get_async_db)):
     """Cria uma nova interação com o cliente e gera embedding vetorial."""
-    client = db.query(models.Client).filter(models.Client.id == interaction.client_id).first()
+    client = await db.get(models.Client, interaction.client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
 
     if interaction.project_id:
-        project = db.query(models.Project).filter(models.Project.id == interaction.project_id).first()
+        project = await db.get(models.Project, interaction.project_id)
         if not project:
             raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
@@ -166,8 +167,8 @@ async def create_interaction(interaction: schemas.InteractionCreate, db: Session
         interaction_date=datetime.utcnow(),
     )
     db.add(db_interaction)
-    db.commit()
-    db.refresh(db_interaction)
+    await db.commit()
+    await db.refresh(db_interaction)
 
     return schemas.InteractionResponse(
         id=db_interaction.id,
@@ -343,7 +344,7 @@ def search_businesses_endpoint(query: str, location: str, limit: int = 20):
 
 
 @router.get("/radar/history")
-def get_radar_history(limit: int = 30, db: Session = Depends(get_db)):
+def get_radar_history(limit: int = 30, db: Session = Depends(get_read_db)):
     """
     Retorna histórico de buscas agrupado por source_query,
     lido diretamente da tabela lead_discoveries.
@@ -380,7 +381,7 @@ def get_radar_history(limit: int = 30, db: Session = Depends(get_db)):
 def list_radar_leads(
     source_query: str | None = None,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Lista leads persistidos na tabela lead_discoveries.
@@ -536,7 +537,7 @@ def convert_business_to_project(request: RadarConvertRequest, db: Session = Depe
 async def spy_lead(
     lead_id: UUID,
     payload: schemas.SpyRequest = schemas.SpyRequest(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(_require_spy_access),
 ):
     """
@@ -550,7 +551,7 @@ async def spy_lead(
     **Feature Flag**: Apenas usuários com role `admin` ou `power_user`.
     """
     # 1. Busca o lead
-    lead = db.query(models.LeadDiscovery).filter(models.LeadDiscovery.id == lead_id).first()
+    lead = await db.get(models.LeadDiscovery, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail=f"Lead {lead_id} não encontrado.")
 
@@ -586,7 +587,7 @@ async def spy_lead(
         duration_ms=0,
     )
     db.add(audit)
-    db.commit()
+    await db.commit()
 
     return schemas.SpyAnalysisResponse(
         success=True,
@@ -608,7 +609,7 @@ async def spy_lead(
 )
 def predict_market_lead(
     lead_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     📊 **Market Predictor** — Índice de Viabilidade do Nicho.
@@ -648,7 +649,7 @@ def predict_market_lead(
 )
 def predict_market_query(
     query: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     📊 **Market Predictor (Nicho)** — Predição agregada por source_query.
@@ -13,7 +13,8 @@ from decimal import Decimal
 from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models
 from app.services import generate_embedding
@@ -62,7 +63,7 @@ class SpyService:
 
     @staticmethod
     async def analyze_competitor_presence(
-        db: Session,
+        db: AsyncSession,
         lead: models.LeadDiscovery,
         website_url: Optional[str] = None,
         force_refresh: bool = False,
@@ -71,7 +72,7 @@ class SpyService:
         Analisa presença digital do concorrente associado a um lead.
 
         Args:
-            db: Sessão SQLAlchemy.
+            db: Sessão SQLAlchemy assíncrona.
             lead: Registro LeadDiscovery alvo.
             website_url: URL opcional para análise (sobrescreve derivação).
             force_refresh: Se True, refaz análise mesmo se já existir.
@@ -82,11 +83,13 @@ class SpyService:
         # 1. Verifica análise existente (skip se force_refresh)
         if not force_refresh:
             existing = (
-                db.query(models.CompetitorIntel)
-                .filter(models.CompetitorIntel.lead_id == lead.id)
-                .order_by(models.CompetitorIntel.last_spy_at.desc())
-                .first()
-            )
+                await db.scalars(
+                    select(models.CompetitorIntel)
+                    .where(models.CompetitorIntel.lead_id == lead.id)
+                    .order_by(models.CompetitorIntel.last_spy_at.desc())
+                    .limit(1)
+                )
+            ).first()
             if existing:
                 log.info("Intel existente para lead '%s' — retornando cache.", lead.name)
                 return existing
@@ -152,13 +155,13 @@ class SpyService:
             created_at=datetime.utcnow(),
         )
         db.add(intel)
-        db.flush()
+        await db.flush()
 
         # 6. Indexa no RAG (DocumentChunk) para Agency Brain
         rag_indexed = await SpyService._index_intel_rag(db, lead, intel, analysis_summary)
 
-        db.commit()
-        db.refresh(intel)
+        await db.commit()
+        await db.refresh(intel)
 
         log.info(
             "Intel criada para '%s' — tráfego=%s, ads=%s, rag=%s",
@@ -168,7 +171,7 @@ class SpyService:
 
     @staticmethod
     async def _index_intel_rag(
-        db: Session,
+        db: AsyncSession,
         lead: models.LeadDiscovery,
         intel: models.CompetitorIntel,
         content: str,
@@ -0,0 +1,165 @@
+"""
+Schema Version — Migrations versionadas e verificação de versão no startup
+==========================================================================
+Cada arquivo ``migrations/NNN_descricao.sql`` é uma versão do schema (NNN).
+``scripts/run_migrations.py`` aplica as pendentes e registra cada uma na
+tabela ``schema_migrations`` (versão, nome, checksum, data).
+
+A API nunca cria/altera tabelas ao subir: o lifespan apenas compara a versão
+gravada no banco com a última migration do código (uma única query).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+log = logging.getLogger("vyron.schema")
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+SCHEMA_TABLE = "schema_migrations"
+
+_MIGRATION_RE = re.compile(r"^(\d+)_([\w\-]+)\.sql$")
+
+# Falha o boot se o banco estiver atrás do código (padrão: apenas avisa)
+SCHEMA_CHECK_STRICT = os.getenv("SCHEMA_CHECK_STRICT", "false").lower() in ("1", "true", "yes")
+SCHEMA_CHECK_TIMEOUT = float(os.getenv("SCHEMA_CHECK_TIMEOUT", "5"))
+
+
+class SchemaOutdatedError(RuntimeError):
+    """O banco está em uma versão anterior à esperada pelo código."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+
+def list_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migrations do código, em ordem de versão."""
+    migrations = []
+    for path in directory.glob("*.sql"):
+        match = _MIGRATION_RE.match(path.name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), path))
+    return sorted(migrations, key=lambda m: m.version)
+
+
+def expected_version() -> int:
+    """Última versão conhecida pelo código (0 = apenas o schema base)."""
+    migrations = list_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+def ensure_version_table(conn: Connection) -> None:
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+        )
+    """))
+
+
+def applied_migrations(conn: Connection) -> Dict[int, str]:
+    """Versões já aplicadas → checksum gravado."""
+    rows = conn.execute(text(f"SELECT version, checksum FROM {SCHEMA_TABLE}")).all()
+    return {r.version: r.checksum for r in rows}
+
+
+def current_version(conn: Connection) -> Optional[int]:
+    """
+    Versão gravada no banco.
+
+    Returns:
+        None se ``schema_migrations`` não existir (banco nunca migrado).
+    """
+    if not conn.execute(text("SELECT to_regclass(:t)"), {"t": SCHEMA_TABLE}).scalar():
+        return None
+    return conn.execute(text(f"SELECT COALESCE(max(version), 0) FROM {SCHEMA_TABLE}")).scalar()
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Divide o arquivo em comandos (``;`` no fim da linha), sem comentários.
+
+    Usado pelas migrations ``-- migrate:no-transaction``: vários comandos em
+    uma única query formam um bloco de transação implícito, onde
+    CREATE/DROP INDEX CONCURRENTLY não é permitido.
+    """
+    statements: List[str] = []
+    current: List[str] = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--"):
+            continue
+        current.append(line)
+        if stripped.endswith(";"):
+            statements.append("\n".join(current))
+            current = []
+    if current:
+        statements.append("\n".join(current))
+    return statements
+
+
+def record_migration(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        text(f"INSERT INTO {SCHEMA_TABLE} (version, name, checksum) VALUES (:v, :n, :c)"),
+        {"v": migration.version, "n": migration.name, "c": migration.checksum},
+    )
+
+
+# ────────────────────────────────────────────────────────────
+# VERIFICAÇÃO NO STARTUP
+# ────────────────────────────────────────────────────────────
+
+# Último resultado de check_schema (exposto em /system/metrics)
+last_status: Dict[str, Any] = {"checked": False}
+
+
+def check_schema(conn: Connection) -> Dict[str, Any]:
+    """
+    Compara a versão do banco com a do código e atualiza ``last_status``.
+
+    Raises:
+        SchemaOutdatedError: Se o banco estiver atrás e SCHEMA_CHECK_STRICT=true.
+    """
+    current = current_version(conn)
+    expected = expected_version()
+    status = {
+        "checked": True,
+        "current": current,
+        "expected": expected,
+        "up_to_date": current is not None and current >= expected,
+    }
+    last_status.clear()
+    last_status.update(status)
+
+    if not status["up_to_date"]:
+        message = (
+            f"Schema desatualizado (banco={current}, código={expected}) — "
+            "execute: python scripts/run_migrations.py"
+        )
+        if SCHEMA_CHECK_STRICT:
+            raise SchemaOutdatedError(message)
+        log.warning(message)
+    return status
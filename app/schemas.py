@@ -4,7 +4,7 @@ Modelos de entrada/saída da API FastAPI
 """
 from datetime import datetime, date
 from decimal import Decimal
-from typing import List, Optional
+from typing import Any, List, Literal, Optional
 from uuid import UUID
 from enum import Enum
 
@@ -227,7 +227,7 @@ class FinancialSummary(BaseModel):
 class SearchRequest(BaseModel):
     """Schema para requisição de busca semântica"""
     query: str
-    limit: int = 5
+    limit: int = Field(default=5, ge=1, le=100)
 
 
 class SearchResponse(BaseModel):
@@ -241,20 +241,58 @@ class ChatRequest(BaseModel):
     image: Optional[str] = None  # Imagem em Base64 (opcional para visão multimodal)
 
 
+class RetrievalSourceTiming(BaseModel):
+    """Tempo e resultados de uma fonte de contexto do chat"""
+    source: str
+    hits: int
+    ms: float
+    error: Optional[str] = None
+
+
+class RetrievalTimings(BaseModel):
+    """Tempos da recuperação de contexto (fontes em paralelo)"""
+    embedding_ms: float
+    total_ms: float
+    sources: List[RetrievalSourceTiming]
+
+
+class ToolCallTiming(BaseModel):
+    """Resultado e tempo de uma tool call (Function Calling) do chat"""
+    name: str
+    status: Optional[str] = None  # success | error | rolled_back
+    ms: float
+
+
 class ChatResponse(BaseModel):
     """Schema para resposta do chat com IA"""
     answer: str
+    retrieval: Optional[RetrievalTimings] = None
+    tools: List[ToolCallTiming] = []
 
 
 # ============================================
 # SCHEMAS: DOCUMENT RAG (Ingestão de Documentos)
 # ============================================
 
+class DocumentSearchFilters(BaseModel):
+    """Filtros de metadados da busca (combinados com AND; listas = qualquer um dos valores)"""
+    source_type: Optional[List[str]] = None  # "document" (PDFs), "competitor_intel" (Spy)
+    lead_id: Optional[UUID] = None
+    traffic_tier: Optional[List[str]] = None  # low, medium, high, very_high
+    created_from: Optional[datetime] = None  # created_at >= created_from
+    created_to: Optional[datetime] = None  # created_at < created_to
+    metadata: Optional[dict] = None  # Contenção em metadata_json (@>), ex.: {"ads_platform": "Meta Ads"}
+
+
 class DocumentSearchRequest(BaseModel):
     """Schema para busca semântica em documentos ingeridos"""
     query: str
-    limit: int = 3
+    limit: int = Field(default=3, ge=1, le=100)
     filename: Optional[str] = None  # Filtro opcional por arquivo
+    filters: Optional[DocumentSearchFilters] = None
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)  # hnsw.ef_search (recall × latência)
+    mode: Optional[Literal["hybrid", "vector"]] = None  # None = BRAIN_SEARCH_MODE (padrão: hybrid)
+    rerank: Optional[bool] = None  # None = BRAIN_RERANK (padrão: top-50 reordenado + MMR)
 
 
 class DocumentChunkResult(BaseModel):
@@ -265,6 +303,16 @@ class DocumentChunkResult(BaseModel):
     content: str
     score: float
     metadata: Optional[dict] = None
+    rrf_score: Optional[float] = None  # Só na busca híbrida (ordem do ranking)
+    rerank_score: Optional[float] = None  # Só com rerank (relevância 0..1, antes do MMR)
+
+
+class SearchTimings(BaseModel):
+    """Tempos da busca em documentos (ms)"""
+    embedding_ms: float
+    search_ms: float
+    rerank_ms: Optional[float] = None
+    candidates: int
 
 
 class DocumentSearchResponse(BaseModel):
@@ -272,6 +320,7 @@ class DocumentSearchResponse(BaseModel):
     query: str
     results: List[DocumentChunkResult]
     total: int
+    timings: Optional[SearchTimings] = None
 
 
 class DocumentIngestResponse(BaseModel):
@@ -282,6 +331,33 @@ class DocumentIngestResponse(BaseModel):
     status: str
 
 
+class IngestionJobResponse(BaseModel):
+    """Job de ingestão enfileirado (resposta 202 de /brain/upload e /brain/ingest)"""
+    job_id: UUID
+    filename: str
+    status: str
+    status_url: str
+
+
+class IngestionJobStatusResponse(BaseModel):
+    """Estado e progresso de um job de ingestão"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    filename: str
+    status: str  # queued, running, succeeded, failed
+    total_pages: Optional[int] = None
+    pages_parsed: int = 0
+    chunks_total: Optional[int] = None
+    chunks_embedded: int = 0
+    chunks_persisted: int = 0
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 # ============================================
 # SCHEMAS: MARKETING METRICS
 # ============================================
@@ -390,6 +466,32 @@ class AuditLogResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AuditLogDetailResponse(AuditLogResponse):
+    """Registro de auditoria completo (usado na exportação NDJSON)."""
+    request_body: Optional[Any] = None  # JSON da requisição: objeto, lista ou escalar
+    response_summary: Optional[str] = None
+
+
+class AuditLogPage(BaseModel):
+    """Página de logs de auditoria com cursor para a próxima página."""
+    items: List[AuditLogResponse]
+    next_cursor: Optional[str] = None
+
+
+class AuditLogRollupResponse(BaseModel):
+    """Agregado horário por path (pré-computado) dos logs de auditoria."""
+    bucket: datetime
+    path: str
+    request_count: int
+    client_error_count: int
+    error_count: int
+    error_rate: float
+    p50_duration_ms: Optional[int] = None
+    p95_duration_ms: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # ============================================
 # SCHEMAS: SPY MODULE — Inteligência Competitiva (v1.2)
 # ============================================
@@ -5,27 +5,22 @@ Integração com APIs externas (OpenAI, etc.)
 import os
 import json
 import io
-from typing import List
+import time
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 from dotenv import load_dotenv
 
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
-from openai import AsyncOpenAI
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-# Import de FPDF2 para geração de PDFs
-try:
-    from fpdf import FPDF
-    FPDF_AVAILABLE = True
-    # print("[OK] FPDF2 carregado com sucesso!")
-except ImportError as e:
-    FPDF_AVAILABLE = False
-    import sys
-    print(f"[WARN] FPDF2 não instalado. Python: {sys.executable}")
-    print(f"[WARN] Erro: {e}")
+from app.modules.brain.embedding_cache import embedding_cache
+from app.modules.brain.embedding_provider import EMBEDDING_DIMENSIONS, get_embedding_provider
+from app.modules.brain.response_cache import CacheKey, response_cache
 
 # Import dos models será feito dinamicamente para evitar circular import
 # Mas declaramos aqui para type hints
@@ -33,54 +28,49 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from app import models
 
-# Inicializa cliente OpenAI (apenas se a chave estiver configurada)
-_api_key = os.getenv("OPENAI_API_KEY")
-if _api_key:
-    client = AsyncOpenAI(api_key=_api_key)
-else:
-    client = None
+# openai, fpdf, serpapi e pandas são importados no primeiro uso (accessors
+# abaixo / imports locais) — mantêm o import de main.py e o boot dos workers leves.
+
+@lru_cache(maxsize=1)
+def _get_client():
+    """Cliente AsyncOpenAI (None se OPENAI_API_KEY não estiver configurada)."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key)
 
 
 async def generate_embedding(text: str) -> List[float]:
     """
-    Gera um embedding vetorial usando OpenAI text-embedding-3-small.
-    
-    Modelo: text-embedding-3-small
-    - Custo-benefício ideal
-    - Dimensão: 1536
-    - Mais barato que ada-002
+    Gera um embedding vetorial com o backend configurado (ver
+    embedding_provider — padrão: OpenAI text-embedding-3-small, ou
+    embeddings locais se não houver OPENAI_API_KEY).
     
     Args:
         text: Texto para gerar o embedding
         
     Returns:
-        Lista com 1536 floats representando o embedding vetorial
+        Lista com EMBEDDING_DIMENSIONS (1536) floats representando o embedding vetorial
         
+    Cache:
+        Textos já vetorizados vêm do embedding_cache (memória → tabela)
+        sem chamar o backend.
+
     Fallback:
-        Se a API falhar ou não houver chave configurada, retorna vetor de zeros
+        Se o backend falhar, retorna vetor de zeros
     """
     try:
-        # Verifica se o cliente OpenAI está disponível
-        if not client:
-            print("⚠️ OpenAI API key não configurada. Usando vetor de zeros.")
-            return [0.0] * 1536
-        
-        # Chama a API da OpenAI
-        response = await client.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
-        )
-        
-        # Retorna o vetor de embedding
-        return response.data[0].embedding
+        provider = get_embedding_provider()
+        return (await embedding_cache.get_or_compute([text], provider.embed, model=provider.model))[0]
         
     except Exception as e:
         # Log do erro no console
-        print(f"⚠️ Erro ao gerar embedding com OpenAI: {e}")
+        print(f"⚠️ Erro ao gerar embedding: {e}")
         print("📝 Usando vetor de zeros como fallback")
         
-        # Retorna vetor de zeros (1536 dimensões) para não quebrar a aplicação
-        return [0.0] * 1536
+        # Retorna vetor de zeros para não quebrar a aplicação
+        return [0.0] * EMBEDDING_DIMENSIONS
 
 
 # ============================================
@@ -171,6 +161,36 @@ tools = [
     }
 ]
 
+# Tools que alteram dados / que só leem
+MUTATING_TOOLS = {"create_project", "add_expense"}
+READ_TOOLS = {"list_projects"}
+
+# Ordem das tools de escrita no lote (ver _run_tool_calls): tools que
+# criam entidades referenciadas pelas outras rodam antes
+_TOOL_PHASES = {"create_project": 0}
+
+
+def _project_rag_content(client_name: str, project_name: str, budget: float) -> str:
+    """Texto da memória RAG de um projeto criado."""
+    return (
+        f"SISTEMA: Novo projeto criado. "
+        f"Cliente: {client_name}. "
+        f"Projeto: {project_name}. "
+        f"Orçamento: R$ {budget:,.2f}. "
+        f"Status: Em andamento."
+    )
+
+
+def _expense_rag_content(project_name: str, description: str, amount: float, category: str) -> str:
+    """Texto da memória RAG de uma despesa registrada."""
+    return (
+        f"SISTEMA: Nova despesa registrada. "
+        f"Projeto: {project_name}. "
+        f"Valor: R$ {amount:,.2f}. "
+        f"Descrição: {description}. "
+        f"Categoria: {category}."
+    )
+
 
 async def _execute_create_project(
     db: Session,
@@ -178,7 +198,9 @@ async def _execute_create_project(
     client_name: str,
     budget: float,
     description: str = None,
-    product_price: float = 0.0
+    product_price: float = 0.0,
+    commit: bool = True,
+    content_embedding: List[float] = None
 ) -> str:
     """
     Executa a criação de um projeto no banco de dados COM INTEGRIDADE TOTAL.
@@ -198,6 +220,9 @@ async def _execute_create_project(
         budget: Orçamento do projeto
         description: Descrição do projeto (opcional)
         product_price: Preço do produto/serviço (ticket médio) para cálculo de ROI
+        commit: False = só flush; quem chamou confirma ou desfaz a sessão
+        content_embedding: Embedding de ``_project_rag_content`` já calculado
+            (tool calls do chat — ver _run_write_calls); None = gera aqui
         
     Returns:
         String JSON com o resultado da operação
@@ -268,16 +293,11 @@ async def _execute_create_project(
         # ============================================
         
         # 3.1 Monta o conteúdo para embedding
-        rag_content = (
-            f"SISTEMA: Novo projeto criado. "
-            f"Cliente: {client_name}. "
-            f"Projeto: {project_name}. "
-            f"Orçamento: R$ {budget:,.2f}. "
-            f"Status: Em andamento."
-        )
+        rag_content = _project_rag_content(client_name, project_name, budget)
         
-        # 3.2 Gera o embedding vetorial (RAG)
-        content_embedding = await generate_embedding(rag_content)
+        # 3.2 Gera o embedding vetorial (RAG), se não veio pronto
+        if content_embedding is None:
+            content_embedding = await generate_embedding(rag_content)
         
         # 3.3 Cria o registro de interação com embedding
         interaction = models.Interaction(
@@ -298,12 +318,15 @@ async def _execute_create_project(
         # COMMIT ATÔMICO DE TODAS AS OPERAÇÕES
         # ============================================
         
-        db.commit()
-        
-        # Refresh para obter dados atualizados
-        db.refresh(project)
-        db.refresh(revenue)
-        db.refresh(interaction)
+        if commit:
+            db.commit()
+
+            # Refresh para obter dados atualizados
+            db.refresh(project)
+            db.refresh(revenue)
+            db.refresh(interaction)
+        else:
+            db.flush()
         
         # ============================================
         # RETORNA RESULTADO COMPLETO
@@ -341,7 +364,9 @@ async def _execute_add_expense(
     project_name: str,
     description: str,
     amount: float,
-    category: str = "Operational"
+    category: str = "Operational",
+    commit: bool = True,
+    content_embedding: List[float] = None
 ) -> str:
     """
     Registra uma despesa vinculada a um projeto COM INTEGRIDADE TOTAL.
@@ -356,6 +381,9 @@ async def _execute_add_expense(
         description: Descrição da despesa
         amount: Valor da despesa
         category: Categoria da despesa (Operational, Marketing, Software, Team)
+        commit: False = só flush; quem chamou confirma ou desfaz a sessão
+        content_embedding: Embedding de ``_expense_rag_content`` já calculado
+            (tool calls do chat — ver _run_write_calls); None = gera aqui
         
     Returns:
         String JSON com o resultado da operação
@@ -402,16 +430,11 @@ async def _execute_add_expense(
         # ============================================
         
         # 3.1 Monta o conteúdo para embedding
-        rag_content = (
-            f"SISTEMA: Nova despesa registrada. "
-            f"Projeto: {project_name}. "
-            f"Valor: R$ {amount:,.2f}. "
-            f"Descrição: {description}. "
-            f"Categoria: {category}."
-        )
+        rag_content = _expense_rag_content(project_name, description, amount, category)
         
-        # 3.2 Gera o embedding vetorial (RAG)
-        content_embedding = await generate_embedding(rag_content)
+        # 3.2 Gera o embedding vetorial (RAG), se não veio pronto
+        if content_embedding is None:
+            content_embedding = await generate_embedding(rag_content)
         
         # 3.3 Cria o registro de interação com embedding
         interaction = models.Interaction(
@@ -432,11 +455,14 @@ async def _execute_add_expense(
         # COMMIT ATÔMICO DE TODAS AS OPERAÇÕES
         # ============================================
         
-        db.commit()
-        
-        # Refresh para obter dados atualizados
-        db.refresh(expense)
-        db.refresh(interaction)
+        if commit:
+            db.commit()
+
+            # Refresh para obter dados atualizados
+            db.refresh(expense)
+            db.refresh(interaction)
+        else:
+            db.flush()
         
         # ============================================
         # RETORNA RESULTADO COMPLETO
@@ -683,36 +709,11 @@ def _execute_list_projects(
         return json.dumps(error_result, ensure_ascii=False)
 
 
-async def generate_answer(query: str, context: str, db: Session = None, image_data: str = None) -> str:
-    """
-    Gera uma resposta usando GPT com contexto RAG e Function Calling.
-    Suporta entrada multimodal (texto + imagem).
-    
-    Utiliza gpt-4o-mini para responder perguntas e executar ações no sistema.
-    Suporta Function Calling para operações como criar projetos e registrar despesas.
-    
-    Args:
-        query: Pergunta do usuário
-        context: Contexto relevante recuperado do banco
-        db: Sessão do banco de dados (necessária para Function Calling)
-        image_data: Imagem em Base64 (opcional para visão multimodal)
-        
-    Returns:
-        Resposta gerada pela IA
-        
-    Fallback:
-        Se a API falhar, retorna mensagem de erro amigável
-    """
-    try:
-        # Verifica se o cliente OpenAI está disponível
-        if not client:
-            return "⚠️ OpenAI API não configurada. Por favor, configure a chave OPENAI_API_KEY no arquivo .env"
-        
-        # Monta as mensagens iniciais
-        messages = [
-            {
-                "role": "system",
-                "content": """Você é o Vyron AI — assistente estratégico do Vyron System com capacidade de executar ações e fornecer inteligência competitiva.
+CHAT_MODEL = "gpt-4o-mini"  # ⚠️ TRAVA: Sempre usar gpt-4o-mini (custo otimizado)
+CHAT_MAX_TOKENS = 500         # Limite de tokens de saída para controlar custos
+CHAT_ERROR_MESSAGE = "Desculpe, não consegui processar sua pergunta no momento. Por favor, tente novamente."
+
+_SYSTEM_PROMPT = """Você é o Vyron AI — assistente estratégico do Vyron System com capacidade de executar ações e fornecer inteligência competitiva.
 
 CAPACIDADES DISPONÍVEIS:
 1. Criar projetos: Use create_project quando solicitado
@@ -748,188 +749,513 @@ VISÃO MULTIMODAL:
 - Use os dados extraídos da imagem para preencher os parâmetros das ferramentas automaticamente
 
 Use o contexto fornecido para responder perguntas sobre interações e inteligência competitiva. Para dados de projetos e despesas, use as ferramentas!"""
-            }
-        ]
-        
-        # Constrói a mensagem do usuário (multimodal se houver imagem)
-        if image_data:
-            # Modo multimodal: texto + imagem (otimizado para low detail = 85 tokens)
-            user_message = {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"Contexto:\n{context}\n\nSolicitação: {query}"
-                    },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_data}",
-                            "detail": "low"  # 85 tokens por imagem (vs 765+ no auto)
-                        }
+
+
+def _build_messages(query: str, context: str, image_data: str = None) -> list:
+    """Mensagens iniciais: system + usuário (multimodal se houver imagem)."""
+    if image_data:
+        # Modo multimodal: texto + imagem (otimizado para low detail = 85 tokens)
+        user_message = {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": f"Contexto:\n{context}\n\nSolicitação: {query}"
+                },
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{image_data}",
+                        "detail": "low"  # 85 tokens por imagem (vs 765+ no auto)
                     }
-                ]
-            }
-        else:
-            # Modo texto simples (economiza tokens)
-            user_message = {
-                "role": "user",
-                "content": f"Contexto:\n{context}\n\nSolicitação: {query}"
-            }
-        
-        messages.append(user_message)
-        
-        # Primeira chamada: verifica se precisa executar alguma tool
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",  # ⚠️ TRAVA: Sempre usar gpt-4o-mini (custo otimizado)
-            messages=messages,
-            tools=tools,  # Disponibiliza as ferramentas para a IA
-            tool_choice="auto",  # IA decide quando usar
-            temperature=0.7,
-            max_tokens=500  # Limite de tokens de saída para controlar custos
+                }
+            ]
+        }
+    else:
+        # Modo texto simples (economiza tokens)
+        user_message = {
+            "role": "user",
+            "content": f"Contexto:\n{context}\n\nSolicitação: {query}"
+        }
+    return [{"role": "system", "content": _SYSTEM_PROMPT}, user_message]
+
+
+async def _execute_tool(
+    function_name: str,
+    function_args: dict,
+    db: Session = None,
+    *,
+    commit: bool = True,
+    content_embedding: List[float] = None,
+) -> str:
+    """Executa uma tool solicitada pela IA e retorna o resultado (JSON)."""
+    if function_name not in ("create_project", "list_projects", "add_expense"):
+        return json.dumps({
+            "status": "error",
+            "message": f"Função {function_name} não implementada"
+        })
+    if db is None:
+        return json.dumps({
+            "status": "error",
+            "message": "Sessão do banco de dados não disponível"
+        })
+
+    if function_name == "create_project":
+        return await _execute_create_project(
+            db=db,
+            project_name=function_args.get("project_name"),
+            client_name=function_args.get("client_name"),
+            budget=function_args.get("budget"),
+            description=function_args.get("description"),
+            commit=commit,
+            content_embedding=content_embedding
         )
-        
-        response_message = response.choices[0].message
-        
-        # Verifica se a IA quer executar alguma função
-        if response_message.tool_calls:
+    if function_name == "list_projects":
+        return _execute_list_projects(
+            db=db,
+            search_term=function_args.get("search_term"),
+            limit=function_args.get("limit", 10)
+        )
+    return await _execute_add_expense(
+        db=db,
+        project_name=function_args.get("project_name"),
+        description=function_args.get("description"),
+        amount=function_args.get("amount"),
+        category=function_args.get("category", "Operational"),
+        commit=commit,
+        content_embedding=content_embedding
+    )
+
+
+def _tool_status(content: str):
+    try:
+        return json.loads(content).get("status")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _tool_error(call: dict, e: Exception) -> str:
+    return json.dumps({"status": "error", "message": f"❌ Erro em {call['name']}: {e}"}, ensure_ascii=False)
+
+
+def _tool_rag_content(call: dict) -> Optional[str]:
+    """Texto da memória RAG que a tool de escrita vai gravar (None se não der para montar)."""
+    args = call["args"]
+    try:
+        if call["name"] == "create_project":
+            return _project_rag_content(args.get("client_name"), args.get("project_name"), args.get("budget"))
+        if call["name"] == "add_expense":
+            return _expense_rag_content(
+                args.get("project_name"), args.get("description"), args.get("amount"),
+                args.get("category", "Operational"),
+            )
+    except (TypeError, ValueError):
+        # Argumentos inválidos: a própria tool reporta o erro
+        return None
+    return None
+
+
+async def _timed_embedding(text: Optional[str]) -> tuple:
+    """(embedding ou None, ms)."""
+    if text is None:
+        return None, 0.0
+    start = time.perf_counter()
+    embedding = await generate_embedding(text)
+    return embedding, (time.perf_counter() - start) * 1000
+
+
+def _rolled_back(outcome: dict, message: str) -> dict:
+    outcome["status"] = "rolled_back"
+    outcome["content"] = json.dumps({"status": "rolled_back", "message": message}, ensure_ascii=False)
+    return outcome
+
+
+async def _run_write_calls(calls: list, session_factory: Callable[[], Session] = None) -> list:
+    """
+    Executa as tools de escrita em duas fases:
+
+      1. embeddings da memória RAG de todas as chamadas em paralelo (o I/O
+         que domina — API de embeddings)
+      2. flushes curtos, um após o outro, numa única sessão, e um só
+         commit. Na primeira falha a transação inteira é desfeita: as
+         escritas anteriores voltam como ``rolled_back`` e as seguintes
+         não são executadas
+
+    ``ms`` de cada tool = seu embedding (fase paralela) + seu flush.
+    """
+    if not calls:
+        return []
+    embedded = await asyncio.gather(*(_timed_embedding(_tool_rag_content(c)) for c in calls))
+
+    db = session_factory() if session_factory else None
+    outcomes: list = []
+    try:
+        for call, (embedding, embedding_ms) in zip(calls, embedded):
+            if outcomes and outcomes[-1]["status"] == "error":
+                outcomes.append(_rolled_back(
+                    {**call, "ms": 0.0}, "⚠️ Ação não executada: outra ação do mesmo pedido falhou."
+                ))
+                continue
+            start = time.perf_counter()
+            try:
+                content = await _execute_tool(
+                    call["name"], call["args"], db, commit=False, content_embedding=embedding
+                )
+            except Exception as e:
+                content = _tool_error(call, e)
+            outcomes.append({
+                **call,
+                "content": content,
+                "status": _tool_status(content),
+                "ms": round(embedding_ms + (time.perf_counter() - start) * 1000, 1),
+            })
+
+        failed = any(o["status"] in ("error", "rolled_back") for o in outcomes)
+        if db is not None and not failed:
+            try:
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                for outcome in outcomes:
+                    outcome["status"] = "error"
+                    outcome["content"] = json.dumps({
+                        "status": "error",
+                        "message": f"❌ Erro ao confirmar {outcome['name']}: {e}"
+                    }, ensure_ascii=False)
+        elif db is not None:
+            db.rollback()
+            for outcome in outcomes:
+                if outcome["status"] not in ("error", "rolled_back"):
+                    _rolled_back(outcome, "⚠️ Ação desfeita: outra ação do mesmo pedido falhou.")
+    finally:
+        if db is not None:
+            db.close()
+    return outcomes
+
+
+def _read_tool_sync(call: dict, session_factory: Callable[[], Session]) -> str:
+    """Tool de leitura (psycopg2 síncrono) na sua própria sessão — roda numa thread."""
+    db = session_factory()
+    try:
+        return _execute_list_projects(
+            db=db,
+            search_term=call["args"].get("search_term"),
+            limit=call["args"].get("limit", 10)
+        )
+    finally:
+        db.close()
+
+
+async def _run_read_call(call: dict, session_factory: Callable[[], Session] = None) -> dict:
+    start = time.perf_counter()
+    try:
+        if call["name"] in READ_TOOLS and session_factory is not None:
+            content = await asyncio.to_thread(_read_tool_sync, call, session_factory)
+        else:
+            # Tool desconhecida ou sem sessão: _execute_tool responde com o erro
+            content = await _execute_tool(call["name"], call["args"], None)
+    except Exception as e:
+        content = _tool_error(call, e)
+    return {
+        **call,
+        "content": content,
+        "status": _tool_status(content),
+        "ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+async def _run_tool_calls(calls: list, session_factory: Callable[[], Session] = None) -> list:
+    """
+    Executa as tool calls de uma resposta e devolve os resultados na ordem
+    das chamadas ({id, name, args, content, status, ms}).
+
+    - tools de leitura (READ_TOOLS) rodam em paralelo, cada uma na sua
+      própria sessão, em threads (o psycopg2 é síncrono e travaria o
+      event loop)
+    - tools de escrita (MUTATING_TOOLS): os embeddings da memória RAG de
+      todas são gerados em paralelo; depois os flushes rodam em sequência
+      numa única sessão/transação (create_project antes das demais, para
+      que um add_expense do mesmo pedido encontre o projeto) e o lote é
+      confirmado só se todas as escritas derem certo. Sessões paralelas
+      disputando a mesma chave única (ex.: o e-mail do cliente criado por
+      dois create_project) travariam o event loop — o flush do psycopg2
+      esperaria um commit que nunca chega
+    - as leituras correm em paralelo com o lote de escritas; o tempo total
+      é o da fase mais lenta, não a soma das tools
+    """
+    writes = sorted(
+        (i for i, c in enumerate(calls) if c["name"] in MUTATING_TOOLS),
+        key=lambda i: _TOOL_PHASES.get(calls[i]["name"], 1),
+    )
+    reads = [i for i, c in enumerate(calls) if c["name"] not in MUTATING_TOOLS]
+
+    outcomes = await asyncio.gather(
+        _run_write_calls([calls[i] for i in writes], session_factory),
+        *(_run_read_call(calls[i], session_factory) for i in reads),
+    )
+    results: list = [None] * len(calls)
+    for i, outcome in zip(writes, outcomes[0]):
+        results[i] = outcome
+    for i, outcome in zip(reads, outcomes[1:]):
+        results[i] = outcome
+    return results
+
+
+async def _stream_completion(client, messages: list, **kwargs) -> AsyncIterator[tuple]:
+    """
+    Uma chamada de chat em modo stream.
+
+    Yields:
+        ("token", texto) a cada delta de conteúdo e, no fim, se a IA pediu
+        ferramentas, ("tool_calls", [{"id", "name", "arguments"}, ...]).
+    """
+    stream = await client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        temperature=0.7,
+        max_tokens=CHAT_MAX_TOKENS,
+        stream=True,
+        **kwargs,
+    )
+    calls: dict = {}
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            yield "token", delta.content
+        # Tool calls chegam fragmentadas: id/nome no primeiro delta, argumentos em pedaços
+        for tc in delta.tool_calls or []:
+            call = calls.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function and tc.function.name:
+                call["name"] += tc.function.name
+            if tc.function and tc.function.arguments:
+                call["arguments"] += tc.function.arguments
+    if calls:
+        yield "tool_calls", [calls[i] for i in sorted(calls)]
+
+
+async def stream_answer(
+    query: str,
+    context: str,
+    session_factory: Callable[[], Session] = None,
+    image_data: str = None,
+    *,
+    cache_key: CacheKey = None,
+) -> AsyncIterator[dict]:
+    """
+    Gera a resposta do chat como uma sequência de eventos (tokens à medida
+    que chegam da OpenAI). Mesmo fluxo de ``generate_answer``.
+
+    ``session_factory`` abre as sessões das tool calls (Function Calling;
+    sem ela as tools respondem com erro): uma por leitura, em paralelo, e
+    uma única para o lote de escritas — ver _run_tool_calls.
+
+    Com ``cache_key`` (ver response_cache), uma resposta cacheada para uma
+    pergunta parecida com o mesmo contexto é devolvida sem chamar a OpenAI.
+    Respostas que executaram tools nunca são cacheadas.
+
+    Yields:
+        {"event": ..., "data": {...}} com event em:
+          - token        → {"text"}                 pedaço da resposta
+          - tool_call    → {"name", "arguments"}     antes de executar as tools
+          - tool_result  → {"name", "status", "ms"}  após executar cada tool
+          - done         → {"answer", "cached"}      resposta completa (último evento)
+          - error        → {"message"}               falha (último evento)
+    """
+    client = _get_client()
+    if not client:
+        message = "⚠️ OpenAI API não configurada. Por favor, configure a chave OPENAI_API_KEY no arquivo .env"
+        yield {"event": "token", "data": {"text": message}}
+        yield {"event": "done", "data": {"answer": message, "cached": False}}
+        return
+
+    # Perguntas com imagem nunca passam pelo cache
+    if image_data and cache_key is not None:
+        response_cache.skip()
+        cache_key = None
+    if cache_key is not None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            yield {"event": "token", "data": {"text": cached}}
+            yield {"event": "done", "data": {"answer": cached, "cached": True}}
+            return
+
+    messages = _build_messages(query, context, image_data)
+    parts: list = []
+    try:
+        # Primeira chamada: resposta direta ou pedido de tools
+        tool_calls: list = []
+        async for kind, payload in _stream_completion(client, messages, tools=tools, tool_choice="auto"):
+            if kind == "token":
+                parts.append(payload)
+                yield {"event": "token", "data": {"text": payload}}
+            else:
+                tool_calls = payload
+
+        if tool_calls:
             # Adiciona a resposta da IA ao histórico
-            messages.append(response_message)
-            
-            # Executa cada tool call solicitada
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                
-                print(f"🤖 IA solicitou execução: {function_name}")
+            messages.append({
+                "role": "assistant",
+                "content": "".join(parts) or None,
+                "tool_calls": [
+                    {"id": c["id"], "type": "function",
+                     "function": {"name": c["name"], "arguments": c["arguments"]}}
+                    for c in tool_calls
+                ],
+            })
+
+            # Executa as tool calls solicitadas (leituras em paralelo, escritas em um lote)
+            calls = []
+            for call in tool_calls:
+                try:
+                    function_args = json.loads(call["arguments"] or "{}")
+                except ValueError:
+                    function_args = {}
+                print(f"🤖 IA solicitou execução: {call['name']}")
                 print(f"📋 Argumentos: {function_args}")
-                
-                # Executa a função correspondente
-                if function_name == "create_project":
-                    if db is None:
-                        function_response = json.dumps({
-                            "status": "error",
-                            "message": "Sessão do banco de dados não disponível"
-                        })
-                    else:
-                        function_response = await _execute_create_project(
-                            db=db,
-                            project_name=function_args.get("project_name"),
-                            client_name=function_args.get("client_name"),
-                            budget=function_args.get("budget"),
-                            description=function_args.get("description")
-                        )
-                
-                elif function_name == "list_projects":
-                    if db is None:
-                        function_response = json.dumps({
-                            "status": "error",
-                            "message": "Sessão do banco de dados não disponível"
-                        })
-                    else:
-                        function_response = _execute_list_projects(
-                            db=db,
-                            search_term=function_args.get("search_term"),
-                            limit=function_args.get("limit", 10)
-                        )
-                
-                elif function_name == "add_expense":
-                    if db is None:
-                        function_response = json.dumps({
-                            "status": "error",
-                            "message": "Sessão do banco de dados não disponível"
-                        })
-                    else:
-                        function_response = await _execute_add_expense(
-                            db=db,
-                            project_name=function_args.get("project_name"),
-                            description=function_args.get("description"),
-                            amount=function_args.get("amount"),
-                            category=function_args.get("category", "Operational")
-                        )
-                
-                else:
-                    function_response = json.dumps({
-                        "status": "error",
-                        "message": f"Função {function_name} não implementada"
-                    })
-                
-                print(f"✅ Resultado: {function_response}")
-                
+                calls.append({"id": call["id"], "name": call["name"], "args": function_args})
+                yield {"event": "tool_call", "data": {"name": call["name"], "arguments": function_args}}
+
+            for result in await _run_tool_calls(calls, session_factory):
+                print(f"✅ Resultado ({result['ms']:.0f} ms): {result['content']}")
+                yield {"event": "tool_result", "data": {
+                    "name": result["name"], "status": result["status"], "ms": result["ms"],
+                }}
+
                 # Adiciona o resultado da função ao histórico
                 messages.append({
                     "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "name": function_name,
-                    "content": function_response
+                    "tool_call_id": result["id"],
+                    "name": result["name"],
+                    "content": result["content"]
                 })
-            
+
             # Segunda chamada: IA gera resposta final para o usuário
-            final_response = await client.chat.completions.create(
-                model="gpt-4o-mini",  # ⚠️ TRAVA: Sempre usar gpt-4o-mini (custo otimizado)
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500  # Limite de tokens de saída para controlar custos
-            )
-            
-            return final_response.choices[0].message.content
-        
-        else:
-            # Não há tool calls, retorna resposta normal
-            return response_message.content
-        
+            async for kind, payload in _stream_completion(client, messages):
+                if kind == "token":
+                    parts.append(payload)
+                    yield {"event": "token", "data": {"text": payload}}
+
+        answer = "".join(parts)
+        if cache_key is not None:
+            # Saída de tools não entra no fingerprint do contexto: dados lidos
+            # (list_projects) mudam por outras rotas e outros workers
+            if tool_calls or not answer:
+                response_cache.skip()
+            else:
+                response_cache.put(cache_key, answer)
+
+        yield {"event": "done", "data": {"answer": answer, "cached": False}}
+
     except Exception as e:
         # Log do erro no console
         print(f"⚠️ Erro ao gerar resposta com OpenAI: {e}")
+        if cache_key is not None:
+            response_cache.skip()
+        yield {"event": "error", "data": {"message": CHAT_ERROR_MESSAGE}}
+
+
+async def generate_answer(
+    query: str,
+    context: str,
+    session_factory: Callable[[], Session] = None,
+    image_data: str = None,
+    *,
+    cache_key: CacheKey = None,
+) -> str:
+    """
+    Gera uma resposta usando GPT com contexto RAG e Function Calling.
+    Suporta entrada multimodal (texto + imagem).
+    
+    Utiliza gpt-4o-mini para responder perguntas e executar ações no sistema.
+    Suporta Function Calling para operações como criar projetos e registrar despesas.
+    Versão não-streaming de ``stream_answer`` (aguarda a resposta completa).
+    
+    Args:
+        query: Pergunta do usuário
+        context: Contexto relevante recuperado do banco
+        session_factory: Abre as sessões das tool calls (necessária para Function Calling)
+        image_data: Imagem em Base64 (opcional para visão multimodal)
+        cache_key: Chave do response_cache (opcional — ver response_cache.key)
+        
+    Returns:
+        Resposta gerada pela IA
         
-        # Retorna mensagem de erro amigável
-        return "Desculpe, não consegui processar sua pergunta no momento. Por favor, tente novamente."
+    Fallback:
+        Se a API falhar, retorna mensagem de erro amigável
+    """
+    async for event in stream_answer(
+        query, context, session_factory=session_factory, image_data=image_data, cache_key=cache_key
+    ):
+        if event["event"] == "done":
+            return event["data"]["answer"]
+        if event["event"] == "error":
+            return event["data"]["message"]
+    return CHAT_ERROR_MESSAGE
 
 
 # ============================================
 # GERAÇÃO DE RELATÓRIOS PDF COM FPDF2
 # ============================================
 
-class PDF(FPDF):
+@lru_cache(maxsize=1)
+def _get_pdf_class():
     """
-    Classe customizada para geração de PDFs profissionais.
-    
-    Design Moderno:
-    - Cabeçalho com fundo azul escuro e título branco
-    - Tabelas com headers cinza claro e negrito
-    - Rodapé com linha separadora elegante
+    Classe PDF (subclasse de FPDF), criada no primeiro uso.
+
+    Raises:
+        RuntimeError: Se FPDF2 não estiver instalado
     """
-    
-    def header(self):
-        """Cabeçalho do PDF - aparece em todas as páginas."""
-        # Retângulo de fundo azul escuro no topo
-        self.set_fill_color(20, 30, 70)  # Azul escuro corporativo
-        self.rect(0, 0, 210, 20, 'F')  # Retângulo preenchido (largura A4 = 210mm)
-        
-        # Logo/Título em branco sobre o fundo azul
-        self.set_font('Arial', 'B', 18)
-        self.set_text_color(255, 255, 255)  # Branco
-        self.set_y(7)  # Posiciona verticalmente no centro do retângulo
-        self.cell(0, 10, 'VYRON SYSTEM REPORT', 0, 1, 'C')
-        
-        # Espaço após o header
-        self.ln(5)
-    
-    def footer(self):
-        """Rodapé do PDF - aparece em todas as páginas."""
-        # Linha fina cinza separadora acima do rodapé
-        self.set_y(-20)
-        self.set_draw_color(180, 180, 180)  # Cinza médio
-        self.set_line_width(0.3)
-        self.line(10, self.get_y(), 200, self.get_y())
-        
-        # Posiciona o texto do rodapé
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.set_text_color(128, 128, 128)
-        
-        # Número da página
-        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
+    try:
+        from fpdf import FPDF
+    except ImportError as exc:
+        raise RuntimeError("❌ FPDF2 não está instalado. Execute: pip install fpdf2") from exc
+
+    class PDF(FPDF):
+        """
+        Classe customizada para geração de PDFs profissionais.
+
+        Design Moderno:
+        - Cabeçalho com fundo azul escuro e título branco
+        - Tabelas com headers cinza claro e negrito
+        - Rodapé com linha separadora elegante
+        """
+
+        def header(self):
+            """Cabeçalho do PDF - aparece em todas as páginas."""
+            # Retângulo de fundo azul escuro no topo
+            self.set_fill_color(20, 30, 70)  # Azul escuro corporativo
+            self.rect(0, 0, 210, 20, 'F')  # Retângulo preenchido (largura A4 = 210mm)
+
+            # Logo/Título em branco sobre o fundo azul
+            self.set_font('Arial', 'B', 18)
+            self.set_text_color(255, 255, 255)  # Branco
+            self.set_y(7)  # Posiciona verticalmente no centro do retângulo
+            self.cell(0, 10, 'VYRON SYSTEM REPORT', 0, 1, 'C')
+
+            # Espaço após o header
+            self.ln(5)
+
+        def footer(self):
+            """Rodapé do PDF - aparece em todas as páginas."""
+            # Linha fina cinza separadora acima do rodapé
+            self.set_y(-20)
+            self.set_draw_color(180, 180, 180)  # Cinza médio
+            self.set_line_width(0.3)
+            self.line(10, self.get_y(), 200, self.get_y())
+
+            # Posiciona o texto do rodapé
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.set_text_color(128, 128, 128)
+
+            # Número da página
+            self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
+
+    return PDF
 
 
 def generate_project_pdf(db: Session, project_id: str) -> bytes:
@@ -956,8 +1282,7 @@ def generate_project_pdf(db: Session, project_id: str) -> bytes:
         ValueError: Se o projeto não for encontrado
         RuntimeError: Se FPDF2 não estiver instalado
     """
-    if not FPDF_AVAILABLE:
-        raise RuntimeError("❌ FPDF2 não está instalado. Execute: pip install fpdf2")
+    PDF = _get_pdf_class()
     
     from app import models
     
@@ -147,6 +147,9 @@ def api_expenses(limit=200):
 def api_brain_status():
     return make_request("GET", "/brain/status", timeout=15)
 
+def api_brain_job(job_id):
+    return make_request("GET", f"/brain/jobs/{job_id}", timeout=15)
+
 def api_financial_dashboard(pid):
     return make_request("GET", f"/projects/{pid}/financial-dashboard")
 
@@ -163,6 +166,36 @@ def send_chat(query, image=None):
     return None, err
 
 
+def stream_chat(query, image=None):
+    """
+    Resposta do /ai/chat/stream (Server-Sent Events), pedaço a pedaço —
+    para ``st.write_stream``. Erros viram texto no próprio stream.
+    """
+    payload = {"query": query}
+    if image:
+        payload["image"] = image
+    try:
+        with requests.post(f"{API_BASE_URL}/ai/chat/stream", json=payload, stream=True, timeout=60) as resp:
+            resp.raise_for_status()
+            resp.encoding = "utf-8"
+            event = None
+            for line in resp.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+                    if event == "token":
+                        yield data["text"]
+                    elif event == "error":
+                        yield f"⚠️ {data['message']}"
+    except requests.exceptions.Timeout:
+        yield "⏱️ Timeout: a API demorou mais de 60 s."
+    except requests.exceptions.ConnectionError:
+        yield "❌ Erro de Conexão: API não está respondendo."
+    except requests.exceptions.HTTPError as e:
+        yield f"❌ Status {e.response.status_code}"
+
+
 # ═══════════════════════════════════════════════════════════════
 # SIDEBAR — NAVEGAÇÃO EM BLOCOS
 # ═══════════════════════════════════════════════════════════════
@@ -859,31 +892,63 @@ elif page == "🧠 Vyron Agency Brain":
             if uploaded_pdf:
                 st.info(f"📄 **{uploaded_pdf.name}** ({uploaded_pdf.size / 1024:.1f} KB)")
                 if st.button("🚀 Processar e Indexar", type="primary", use_container_width=True, key="btn_idx"):
-                    with st.spinner("Extraindo texto, gerando embeddings..."):
-                        try:
-                            resp = requests.post(
-                                f"{API_BASE_URL}/brain/upload",
-                                files={"file": (uploaded_pdf.name, uploaded_pdf.getvalue(), "application/pdf")},
-                                timeout=120,
-                            )
-                            resp.raise_for_status()
-                            result = resp.json()
-                        except requests.exceptions.Timeout:
-                            result = None
-                            st.error("⏱️ Timeout")
-                        except requests.exceptions.ConnectionError:
-                            result = None
-                            st.error("❌ API offline.")
-                        except Exception as exc:
-                            result = None
-                            st.error(f"❌ {exc}")
-                    if result:
-                        st.success(
-                            f"✅ **{result['filename']}** indexado! "
-                            f"({result['total_pages']} pág. → {result['total_chunks']} fragmentos)"
+                    job = None
+                    try:
+                        resp = requests.post(
+                            f"{API_BASE_URL}/brain/upload",
+                            files={"file": (uploaded_pdf.name, uploaded_pdf.getvalue(), "application/pdf")},
+                            timeout=60,
                         )
-                        st.balloons()
-                        st.rerun()
+                        resp.raise_for_status()
+                        job = resp.json()
+                    except requests.exceptions.Timeout:
+                        st.error("⏱️ Timeout")
+                    except requests.exceptions.ConnectionError:
+                        st.error("❌ API offline.")
+                    except Exception as exc:
+                        st.error(f"❌ {exc}")
+                    if job:
+                        st.session_state["brain_job_id"] = job["job_id"]
+
+            # ── Acompanhamento do job de ingestão (processado em background) ──
+            job_id = st.session_state.get("brain_job_id")
+            if job_id:
+                status_box = st.empty()
+                progress_bar = st.progress(0.0)
+                while True:
+                    jdata, jerr = api_brain_job(job_id)
+                    if jerr or not jdata:
+                        status_box.error(f"❌ Não foi possível consultar o job: {jerr}")
+                        break
+                    pages = jdata.get("total_pages") or 0
+                    chunks = jdata.get("chunks_total") or 0
+                    # Peso igual para leitura, embeddings e gravação
+                    parts = [
+                        jdata["pages_parsed"] / pages if pages else 0.0,
+                        jdata["chunks_embedded"] / chunks if chunks else 0.0,
+                        jdata["chunks_persisted"] / chunks if chunks else 0.0,
+                    ]
+                    progress_bar.progress(min(1.0, sum(parts) / 3))
+                    status_box.info(
+                        f"⏳ **{jdata['filename']}** — {jdata['status']}: "
+                        f"{jdata['pages_parsed']}/{pages or '?'} pág. lidas · "
+                        f"{jdata['chunks_embedded']}/{chunks or '?'} vetorizados · "
+                        f"{jdata['chunks_persisted']}/{chunks or '?'} gravados"
+                    )
+                    if jdata["status"] in ("succeeded", "failed"):
+                        st.session_state.pop("brain_job_id", None)
+                        if jdata["status"] == "succeeded":
+                            status_box.success(
+                                f"✅ **{jdata['filename']}** indexado! "
+                                f"({pages} pág. → {chunks} fragmentos)"
+                            )
+                            st.balloons()
+                            time.sleep(1.5)
+                            st.rerun()
+                        else:
+                            status_box.error(f"❌ Falha na ingestão: {jdata.get('error')}")
+                        break
+                    time.sleep(2)
 
         with tab_img:
             uploaded_img = st.file_uploader("Anexe recibo, nota fiscal ou imagem", type=["jpg", "jpeg", "png"],
@@ -922,14 +987,15 @@ elif page == "🧠 Vyron Agency Brain":
                 st.markdown(brain_input)
 
         image_b64 = st.session_state.get("brain_image_b64")
+        streamed = False
 
-        # Caminho A: imagem → visão
+        # Caminho A: imagem → visão (resposta em streaming)
         if image_b64:
-            with st.spinner("👁️ Analisando imagem com GPT-4o..."):
-                answer, err = send_chat(brain_input, image_b64)
-            if err:
-                answer = f"⚠️ Erro: {err}"
-            elif not answer:
+            with chat_area:
+                with st.chat_message("assistant"):
+                    answer = st.write_stream(stream_chat(brain_input, image_b64))
+            streamed = True
+            if not answer:
                 answer = "⚠️ Não foi possível analisar."
             st.session_state.pop("brain_image_b64", None)
             st.session_state.pop("brain_image_name", None)
@@ -981,9 +1047,10 @@ elif page == "🧠 Vyron Agency Brain":
                         )
 
         st.session_state.brain_chat_history.append({"role": "assistant", "content": answer})
-        with chat_area:
-            with st.chat_message("assistant"):
-                st.markdown(answer)
+        if not streamed:
+            with chat_area:
+                with st.chat_message("assistant"):
+                    st.markdown(answer)
         st.rerun()
 
     if st.session_state.brain_chat_history:
@@ -4,17 +4,23 @@ Vyron System — Core API (Modular)
 Entry point da aplicação FastAPI.
 Toda lógica de rotas foi movida para app/modules/<domain>/router.py.
 Este arquivo apenas:
-  1. Cria as tabelas
+  1. Verifica a versão do schema (sem criar tabelas — ver scripts/run_migrations.py)
   2. Configura CORS
   3. Registra os routers
   4. Adiciona o middleware de auditoria
+  5. Gerencia o ciclo de vida do writer de auditoria (start/flush), do worker
+     de ingestão e dos pools
 """
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine
-from app import models
+from app.database import engine, async_engine, async_replica_engine
+from app import schema
 
 # ── Routers modulares ────────────────────────────────────────────
 from app.modules.auth.router import router as auth_router
@@ -25,17 +31,57 @@ from app.modules.core.router import router as core_router
 
 # ── Middleware de auditoria ──────────────────────────────────────
 from app.middleware.audit import AuditMiddleware
+from app.middleware.audit_writer import audit_writer
+from app.modules.brain.pdf_extraction import shutdown_pool as shutdown_pdf_pool
+from app.modules.brain.ingestion_jobs import INGESTION_WORKER_ENABLED, ingestion_worker
+
+log = logging.getLogger("vyron.main")
+
 
 # ============================================
-# CRIA AS TABELAS NO BANCO DE DADOS
+# VERIFICAÇÃO DO SCHEMA
 # ============================================
-# print("[INFO] Criando tabelas no banco de dados...")
-try:
-    models.Base.metadata.create_all(bind=engine)
-    # print("[OK] Tabelas criadas/verificadas com sucesso!")
-except Exception as e:
-    print(f"[ERROR] Erro ao criar tabelas: {e}")
-    raise
+def _check_schema() -> None:
+    with engine.connect() as conn:
+        schema.check_schema(conn)
+
+
+async def _verify_schema() -> None:
+    """
+    Uma única query comparando schema_migrations com migrations/.
+
+    Banco lento/inacessível não impede o boot (só registra o aviso);
+    com SCHEMA_CHECK_STRICT=true um schema desatualizado aborta o startup.
+    """
+    try:
+        await asyncio.wait_for(asyncio.to_thread(_check_schema), schema.SCHEMA_CHECK_TIMEOUT)
+    except schema.SchemaOutdatedError:
+        raise
+    except Exception as exc:
+        log.warning("Verificação de schema não concluída: %s", exc)
+
+
+# ============================================
+# CICLO DE VIDA
+# ============================================
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await _verify_schema()
+    audit_writer.start()
+    if INGESTION_WORKER_ENABLED:
+        ingestion_worker.start()
+    try:
+        yield
+    finally:
+        # Jobs de ingestão em andamento voltam para a fila
+        await ingestion_worker.stop()
+        # Grava os registros de auditoria pendentes antes de encerrar
+        await audit_writer.stop()
+        shutdown_pdf_pool()
+        await async_engine.dispose()
+        if async_replica_engine is not None:
+            await async_replica_engine.dispose()
+
 
 # ============================================
 # APP FASTAPI
@@ -44,6 +90,7 @@ app = FastAPI(
     title="Vyron System - Core API",
     description="Enterprise AI ERP — Sistema Inteligente de Gestão Empresarial (Modular)",
     version="1.2.1",
+    lifespan=lifespan,
 )
 
 # ── CORS ─────────────────────────────────────────────────────
@@ -70,4 +117,4 @@ app.include_router(auth_router)      # /login, /db-test
 app.include_router(sales_router)     # /clients/*, /interactions/*, /radar/*
 app.include_router(brain_router)     # /ai/*, /brain/*
 app.include_router(finance_router)   # /projects/*, /revenues/*, /expenses/*, /manual/*
-app.include_router(core_router)      # /audit-logs
+app.include_router(core_router)      # /audit-logs, /system/*
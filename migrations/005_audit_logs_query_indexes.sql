@@ -0,0 +1,7 @@
+CREATE INDEX IF NOT EXISTS idx_audit_logs_ts_id ON audit_logs (timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_path_ts ON audit_logs (path varchar_pattern_ops, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_method_ts ON audit_logs (method, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_status_ts ON audit_logs (status_code, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_client_ip_ts ON audit_logs (client_ip, timestamp, id);
+DROP INDEX IF EXISTS idx_audit_logs_path;
+DROP INDEX IF EXISTS idx_audit_logs_timestamp;
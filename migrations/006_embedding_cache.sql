@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model VARCHAR(100) NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,
+    embedding vector(1536) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    PRIMARY KEY (model, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_created_at ON embedding_cache (created_at);
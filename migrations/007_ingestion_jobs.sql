@@ -0,0 +1,22 @@
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id UUID PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    filename VARCHAR(500) NOT NULL,
+    source_path TEXT,
+    payload BYTEA,
+    total_pages INTEGER,
+    pages_parsed INTEGER NOT NULL DEFAULT 0,
+    chunks_total INTEGER,
+    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+    chunks_persisted INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    locked_by VARCHAR(255),
+    heartbeat_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    CONSTRAINT valid_ingestion_job_status
+        CHECK (status IN ('queued', 'running', 'succeeded', 'failed'))
+);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status_created ON ingestion_jobs (status, created_at);
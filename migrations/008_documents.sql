@@ -0,0 +1,31 @@
+CREATE TABLE IF NOT EXISTS documents (
+    id UUID PRIMARY KEY,
+    filename VARCHAR(500) NOT NULL UNIQUE,
+    file_hash VARCHAR(64),
+    total_pages INTEGER,
+    total_chunks INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+    updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+ALTER TABLE document_chunks
+    ADD COLUMN IF NOT EXISTS document_id UUID REFERENCES documents (id) ON DELETE CASCADE;
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+CREATE INDEX IF NOT EXISTS idx_document_chunks_document ON document_chunks (document_id);
+
+-- Documentos já ingeridos: um registro por filename, sem file_hash (o
+-- primeiro reenvio passa pelo diff de chunks e grava o hash)
+INSERT INTO documents (id, filename, total_chunks)
+SELECT gen_random_uuid(), filename, count(*)
+FROM document_chunks
+GROUP BY filename
+ON CONFLICT (filename) DO NOTHING;
+
+UPDATE document_chunks c
+SET document_id = d.id
+FROM documents d
+WHERE c.document_id IS NULL AND d.filename = c.filename;
+
+UPDATE document_chunks
+SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+WHERE content_hash IS NULL;
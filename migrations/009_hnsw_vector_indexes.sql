@@ -0,0 +1,13 @@
+-- migrate:no-transaction
+-- IVFFlat criado pelo create_all com as tabelas vazias (listas treinadas
+-- sobre nada) → HNSW, que não depende de treino. Requer pgvector >= 0.5.0.
+-- Parâmetros diferentes: scripts/rebuild_vector_indexes.py
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_document_chunks_embedding_hnsw
+    ON document_chunks USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+DROP INDEX CONCURRENTLY IF EXISTS idx_document_chunks_embedding;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_interactions_embedding_hnsw
+    ON interactions USING hnsw (content_embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+DROP INDEX CONCURRENTLY IF EXISTS idx_interactions_embedding;
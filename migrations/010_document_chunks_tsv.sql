@@ -0,0 +1,9 @@
+-- migrate:no-transaction
+-- Coluna tsvector gerada (config portuguese) + GIN para a busca híbrida
+-- (BrainService.semantic_search mode="hybrid"). O ADD COLUMN reescreve a
+-- tabela; o índice é criado sem bloquear escritas.
+ALTER TABLE document_chunks
+    ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('portuguese', content)) STORED;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_document_chunks_content_tsv
+    ON document_chunks USING gin (content_tsv);
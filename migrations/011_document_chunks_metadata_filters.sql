@@ -0,0 +1,24 @@
+-- migrate:no-transaction
+-- Filtros da busca em documentos (/brain/search "filters"): source_type,
+-- lead_id e traffic_tier promovidos do metadata_json para colunas geradas
+-- (btree), created_at indexado para o intervalo de datas e GIN
+-- jsonb_path_ops para filtros de contenção (@>) nas demais chaves.
+-- Chunks de PDF não têm source_type no metadata → 'document'.
+-- Um único ALTER: a tabela é reescrita uma vez só.
+ALTER TABLE document_chunks
+    ADD COLUMN IF NOT EXISTS source_type varchar(50)
+        GENERATED ALWAYS AS (coalesce(metadata_json ->> 'source_type', 'document')) STORED,
+    ADD COLUMN IF NOT EXISTS lead_id uuid
+        GENERATED ALWAYS AS ((metadata_json ->> 'lead_id')::uuid) STORED,
+    ADD COLUMN IF NOT EXISTS traffic_tier varchar(20)
+        GENERATED ALWAYS AS (metadata_json ->> 'traffic_tier') STORED;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_document_chunks_source_type
+    ON document_chunks (source_type);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_document_chunks_lead
+    ON document_chunks (lead_id) WHERE lead_id IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_document_chunks_traffic_tier
+    ON document_chunks (traffic_tier) WHERE traffic_tier IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_document_chunks_created_at
+    ON document_chunks (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_document_chunks_metadata
+    ON document_chunks USING gin (metadata_json jsonb_path_ops);
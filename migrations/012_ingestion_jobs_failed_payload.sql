@@ -0,0 +1,4 @@
+-- Jobs que falharam antes desta versão guardavam o PDF enviado (payload)
+-- para sempre; failed é final, o worker agora apaga o payload também nesse caso.
+UPDATE ingestion_jobs SET payload = NULL
+WHERE status = 'failed' AND payload IS NOT NULL;
@@ -0,0 +1,94 @@
+"""
+audit_maintenance.py — Manutenção da tabela audit_logs (particionada por mês)
+
+Uso:
+    python scripts/audit_maintenance.py all
+    python scripts/audit_maintenance.py partitions --ahead 3
+    python scripts/audit_maintenance.py retention --months 12 --mode archive
+    python scripts/audit_maintenance.py rollup --hours 24
+    python scripts/audit_maintenance.py convert
+
+Comandos:
+    convert     Converte uma audit_logs legada (não particionada)
+    partitions  Cria as partições mensais à frente (+ DEFAULT)
+    retention   Descarta/arquiva partições fora da janela de retenção
+    rollup      Recalcula os agregados horários por path
+    all         partitions + retention + rollup (uso recomendado no cron)
+
+Pensado para rodar em agendador (cron / Render Cron Job), ex. a cada hora.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Garante que o projeto raiz está no sys.path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# Processo pontual: pool mínimo (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "script")
+
+from app.database import engine
+from app.modules.core import audit_maintenance as am
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manutenção de audit_logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("convert", help="Converte audit_logs legada em particionada")
+
+    p_part = sub.add_parser("partitions", help="Cria partições mensais à frente")
+    p_part.add_argument("--ahead", type=int, default=am.AUDIT_PARTITIONS_AHEAD)
+
+    p_ret = sub.add_parser("retention", help="Aplica a política de retenção")
+    p_ret.add_argument("--months", type=int, default=am.AUDIT_RETENTION_MONTHS)
+    p_ret.add_argument("--mode", choices=("drop", "archive"), default=am.AUDIT_RETENTION_MODE)
+
+    p_roll = sub.add_parser("rollup", help="Recalcula rollups horários")
+    p_roll.add_argument("--hours", type=int, default=2, help="Janela a reprocessar (horas)")
+
+    sub.add_parser("all", help="partitions + retention + rollup")
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"🗂️  Vyron System — Audit Maintenance ({args.command})")
+    print("=" * 60)
+
+    # engine.begin(): cada comando roda em uma única transação
+    with engine.begin() as conn:
+        if args.command == "convert":
+            converted = am.convert_to_partitioned(conn)
+            print("✅  Tabela convertida" if converted else "⏭️  Nada a converter")
+
+        if args.command in ("partitions", "all"):
+            ahead = getattr(args, "ahead", am.AUDIT_PARTITIONS_AHEAD)
+            created = am.ensure_partitions(conn, months_ahead=ahead)
+            print(f"📅  Partições criadas: {', '.join(created) if created else 'nenhuma'}")
+
+        if args.command in ("retention", "all"):
+            months = getattr(args, "months", am.AUDIT_RETENTION_MONTHS)
+            mode = getattr(args, "mode", am.AUDIT_RETENTION_MODE)
+            expired = am.enforce_retention(conn, retention_months=months, mode=mode)
+            print(f"🧹  Partições expiradas ({mode}): {', '.join(expired) if expired else 'nenhuma'}")
+
+        if args.command in ("rollup", "all"):
+            hours = getattr(args, "hours", 2)
+            written = am.refresh_rollups(conn, since=datetime.utcnow() - timedelta(hours=hours))
+            print(f"📊  Rollups gravados: {written}")
+
+    print("🏁  Manutenção concluída.\n")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"\n❌  Erro fatal: {exc}")
+        sys.exit(1)
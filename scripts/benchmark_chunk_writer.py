@@ -0,0 +1,126 @@
+"""
+benchmark_chunk_writer.py — COPY binário vs ORM na gravação de document_chunks
+
+Uso:
+    python scripts/benchmark_chunk_writer.py
+    python scripts/benchmark_chunk_writer.py --sizes 10000 100000 --skip-orm-above 100000
+
+Gera N chunks sintéticos (texto de ~1 000 chars + vetor aleatório de 1 536
+dims), grava com cada caminho e mede tempo total e linhas/s. As linhas são
+gravadas com um filename único e apagadas ao final de cada rodada.
+
+Exige o banco configurado em DATABASE_URL (com migrations aplicadas).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+# Garante que o projeto raiz está no sys.path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# Processo pontual: pool mínimo (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "script")
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal, async_engine
+from app.modules.brain.chunk_writer import CHUNK_COPY_BATCH_ROWS, ChunkRow, add_chunks_orm, copy_chunks
+
+_WORDS = "contrato cliente proposta campanha receita projeto entrega prazo valor escopo".split()
+
+
+def make_rows(filename: str, count: int, dims: int = 1536) -> list[ChunkRow]:
+    rng = random.Random(42)
+    rows = []
+    for idx in range(count):
+        content = " ".join(rng.choices(_WORDS, k=130))[:1000]
+        rows.append(ChunkRow(
+            filename=filename,
+            chunk_index=idx,
+            content=content,
+            embedding=[rng.uniform(-1, 1) for _ in range(dims)],
+            metadata_json={"total_chunks": count, "chunk_size": len(content), "benchmark": True},
+        ))
+    return rows
+
+
+async def cleanup(filename: str) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM document_chunks WHERE filename = :f"), {"f": filename})
+
+
+async def run_orm(rows: list[ChunkRow]) -> float:
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await add_chunks_orm(db, rows)
+    return time.perf_counter() - start
+
+
+async def run_copy(rows: list[ChunkRow], batch_rows: int) -> float:
+    start = time.perf_counter()
+    await copy_chunks(iter(rows), batch_rows=batch_rows)
+    return time.perf_counter() - start
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    results = []
+    for size in args.sizes:
+        filename = f"__benchmark_{uuid4().hex[:8]}.pdf"
+        print(f"\n🧪  {size:,} chunks — gerando dados...")
+        rows = make_rows(filename, size)
+
+        for label in ("copy", "orm"):
+            if label == "orm" and size > args.skip_orm_above:
+                print(f"   ⏭️  orm: pulado (> {args.skip_orm_above:,})")
+                continue
+            # ids novos a cada rodada (PK)
+            for row in rows:
+                row.id = uuid4()
+            try:
+                if label == "copy":
+                    elapsed = await run_copy(rows, args.batch_rows)
+                else:
+                    elapsed = await run_orm(rows)
+            finally:
+                await cleanup(filename)
+            rate = size / elapsed if elapsed else 0
+            results.append((size, label, elapsed, rate))
+            print(f"   ⏱️  {label:<4}: {elapsed:8.2f} s  ({rate:,.0f} linhas/s)")
+
+    print("\n📊  Resumo")
+    print(f"   {'chunks':>9}  {'caminho':<7} {'tempo (s)':>10} {'linhas/s':>10}")
+    for size, label, elapsed, rate in results:
+        print(f"   {size:>9,}  {label:<7} {elapsed:>10.2f} {rate:>10,.0f}")
+    for size in args.sizes:
+        by_label = {label: elapsed for s, label, elapsed, _ in results if s == size}
+        if "copy" in by_label and "orm" in by_label:
+            print(f"   🚀  {size:,}: COPY {by_label['orm'] / by_label['copy']:.1f}x mais rápido")
+
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark COPY binário vs ORM em document_chunks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--batch-rows", type=int, default=CHUNK_COPY_BATCH_ROWS)
+    parser.add_argument("--skip-orm-above", type=int, default=10**9,
+                        help="Pula o caminho ORM acima deste tamanho (lento/memória)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("💾  Vyron System — Chunk Writer Benchmark")
+    print("=" * 60)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+benchmark_embeddings.py — Throughput e recuperação dos backends de embeddings (offline)
+
+Uso:
+    python scripts/benchmark_embeddings.py                          # local + deterministic
+    python scripts/benchmark_embeddings.py --providers local --batch-sizes 16 64 256
+    python scripts/benchmark_embeddings.py --pdf docs/contrato.pdf --queries 200
+    python scripts/benchmark_embeddings.py --providers openai      # exige OPENAI_API_KEY
+
+Monta um corpus de chunks (sintético, ou de um PDF com o mesmo chunking da
+ingestão) e mede, para cada backend (ver app/modules/brain/embedding_provider.py):
+
+  - textos/s por tamanho de lote (sem embedding_cache)
+  - recall@k: a query é um trecho de ~25 palavras de um chunk sorteado; acerto
+    se esse chunk está entre os k mais próximos por cosseno
+
+Não usa o banco.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Garante que o projeto raiz está no sys.path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# Processo pontual: pool mínimo (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "script")
+
+import numpy as np
+
+from app.modules.brain.embedding_provider import EMBEDDING_DIMENSIONS, create_provider
+
+_WORDS = (
+    "contrato cliente proposta campanha receita projeto entrega prazo valor escopo "
+    "pizzaria anúncio meta google tráfego orçamento conversão lead concorrente "
+    "instagram promoção cardápio delivery avaliação margem custo reunião relatório"
+).split()
+
+
+def synthetic_corpus(count: int, rng: random.Random) -> list[str]:
+    """Palavras comuns + termos específicos de cada chunk (nomes, cidades, valores)."""
+    vocab = [f"termo{n}" for n in range(5000)]
+    corpus = []
+    for _ in range(count):
+        words = rng.choices(_WORDS, k=120) + rng.choices(vocab, k=30)
+        rng.shuffle(words)
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def pdf_corpus(path: str) -> list[str]:
+    from app.brain_service import BrainService
+    return BrainService.process_pdf(path)["chunks"]
+
+
+def make_queries(corpus: list[str], count: int, rng: random.Random) -> list[tuple[int, str]]:
+    queries = []
+    for _ in range(count):
+        idx = rng.randrange(len(corpus))
+        words = corpus[idx].split()
+        start = rng.randrange(max(1, len(words) - 25))
+        queries.append((idx, " ".join(words[start:start + 25])))
+    return queries
+
+
+async def throughput(provider, corpus: list[str], batch_size: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), batch_size):
+        await provider.embed(corpus[offset:offset + batch_size])
+    return len(corpus) / (time.perf_counter() - start)
+
+
+async def recall(provider, corpus: list[str], queries: list[tuple[int, str]], k: int) -> float:
+    docs = np.asarray(await provider.embed(corpus), dtype=np.float32)
+    qs = np.asarray(await provider.embed([q for _, q in queries]), dtype=np.float32)
+    top = np.argsort(-(qs @ docs.T), axis=1)[:, :k]
+    return float(np.mean([expected in row for (expected, _), row in zip(queries, top)]))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de embeddings")
+    parser.add_argument("--providers", nargs="+", default=["local", "deterministic"],
+                        choices=["openai", "local", "deterministic"])
+    parser.add_argument("--chunks", type=int, default=2000, help="Tamanho do corpus sintético")
+    parser.add_argument("--pdf", default=None, help="Usa os chunks de um PDF em vez do corpus sintético")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 128, 512])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--dims", type=int, default=EMBEDDING_DIMENSIONS)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    corpus = pdf_corpus(args.pdf) if args.pdf else synthetic_corpus(args.chunks, rng)
+    queries = make_queries(corpus, args.queries, rng)
+
+    print("=" * 60)
+    print("🔢  Vyron System — Embedding Provider Benchmark")
+    print(f"    {len(corpus):,} chunks · {args.dims} dims · {len(queries)} queries · recall@{args.k}")
+    print("=" * 60)
+
+    for kind in args.providers:
+        provider = create_provider(kind, dimensions=args.dims)
+        print(f"\n🧪  {provider.name} ({provider.model})")
+        for batch_size in args.batch_sizes:
+            rate = await throughput(provider, corpus, batch_size)
+            print(f"   lote {batch_size:>5}: {rate:>10,.0f} textos/s")
+        print(f"   🎯  recall@{args.k}: {await recall(provider, corpus, queries, args.k):.3f}")
+    print()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except Exception as exc:
+        print(f"\n❌  Erro fatal: {exc}")
+        sys.exit(1)
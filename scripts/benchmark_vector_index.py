@@ -0,0 +1,249 @@
+"""
+benchmark_vector_index.py — Recall × latência × memória: HNSW vs IVFFlat (pgvector)
+
+Uso:
+    python scripts/benchmark_vector_index.py                    # 1M vetores, 1 536 dims
+    python scripts/benchmark_vector_index.py --rows 200000 --dims 256 --queries 50
+    python scripts/benchmark_vector_index.py --ef-search 20 40 80 200 --probes 1 10 40
+    python scripts/benchmark_vector_index.py --precisions binary --rerank-factor 4 10 20
+
+Gera um corpus sintético (mistura de gaussianas normalizadas — parecido com
+embeddings reais, que formam grupos) em uma tabela temporária
+``bench_vectors``, calcula o top-k exato (varredura sequencial) de cada
+query e mede, para cada índice e parâmetro de busca:
+
+  - tempo de construção do índice
+  - tamanho do índice e MB por milhão de vetores
+  - latência p50/p95 por query
+  - recall@k contra o resultado exato (padrão k=3, o limit da busca do Brain)
+
+Além do HNSW float32 e do IVFFlat, mede o HNSW sobre ``embedding::halfvec``
+e sobre ``binary_quantize(embedding)`` (--precisions), com os candidatos
+reordenados pelo vetor completo — o mesmo plano de vector_index.knn.
+
+A tabela é apagada ao final (--keep para manter). Exige pgvector >= 0.7.0
+(halfvec/binary_quantize; com --precisions vazio, >= 0.5.0).
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import math
+import os
+import statistics
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Garante que o projeto raiz está no sys.path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# Processo pontual: pool mínimo (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "script")
+
+import numpy as np
+
+from app.database import engine
+from app.modules.brain.vector_index import (
+    BINARY_RERANK_FACTOR, HALFVEC_RERANK_FACTOR, HNSW_EF_CONSTRUCTION, HNSW_M, index_expression,
+)
+
+TABLE = "bench_vectors"
+
+
+def vec_literal(v: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in v) + "]"
+
+
+def copy_payload(offset: int, vectors: np.ndarray) -> bytes:
+    """Linhas (id, embedding) no formato binário do COPY (vector: dim, 0, float4[])."""
+    count, dims = vectors.shape
+    row = np.dtype([
+        ("fields", ">i2"), ("id_len", ">i4"), ("id", ">i4"),
+        ("vec_len", ">i4"), ("dim", ">i2"), ("unused", ">i2"), ("values", ">f4", (dims,)),
+    ])
+    rows = np.empty(count, dtype=row)
+    rows["fields"], rows["id_len"], rows["vec_len"] = 2, 4, 4 + 4 * dims
+    rows["id"] = np.arange(offset, offset + count)
+    rows["dim"], rows["unused"] = dims, 0
+    rows["values"] = vectors
+    return b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0) + rows.tobytes() + struct.pack(">h", -1)
+
+
+def make_vectors(rng: np.random.Generator, centers: np.ndarray, count: int) -> np.ndarray:
+    labels = rng.integers(0, len(centers), size=count)
+    vectors = centers[labels] + rng.normal(scale=0.35, size=(count, centers.shape[1])).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_corpus(cur, args, rng, centers) -> None:
+    cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cur.execute(f"CREATE TABLE {TABLE} (id integer PRIMARY KEY, embedding vector({args.dims}) NOT NULL)")
+    start = time.perf_counter()
+    for offset in range(0, args.rows, args.load_batch):
+        count = min(args.load_batch, args.rows - offset)
+        payload = copy_payload(offset, make_vectors(rng, centers, count))
+        cur.copy_expert(f"COPY {TABLE} (id, embedding) FROM STDIN (FORMAT binary)", io.BytesIO(payload))
+        print(f"\r   📥  {offset + count:,}/{args.rows:,} vetores", end="", flush=True)
+    cur.execute(f"ANALYZE {TABLE}")
+    print(f"  ({time.perf_counter() - start:.0f} s)")
+
+
+def knn_sql(precision: str, dims: int) -> str:
+    """Top-k (params: query, k) — com precisão reduzida, candidatos + reordenação (params: query, n, query, k)."""
+    if precision == "full":
+        return f"SELECT id FROM {TABLE} ORDER BY embedding <=> %s::vector LIMIT %s"
+    if precision == "halfvec":
+        approx = f"embedding::halfvec({dims}) <=> %s::halfvec({dims})"
+    else:
+        approx = f"binary_quantize(embedding)::bit({dims}) <~> binary_quantize(%s::vector)::bit({dims})"
+    return (
+        f"SELECT id FROM (SELECT id, embedding FROM {TABLE} ORDER BY {approx} LIMIT %s) c "
+        f"ORDER BY embedding <=> %s::vector LIMIT %s"
+    )
+
+
+def top_k(cur, query: str, k: int, sql: str | None = None, candidates: int = 0) -> tuple[list[int], float]:
+    start = time.perf_counter()
+    if candidates:
+        cur.execute(sql, (query, candidates, query, k))
+    else:
+        cur.execute(sql or knn_sql("full", 0), (query, k))
+    ids = [r[0] for r in cur.fetchall()]
+    return ids, (time.perf_counter() - start) * 1000
+
+
+def measure(cur, queries: list[str], truth: list[set[int]], k: int, sql: str | None = None,
+            candidates: int = 0) -> dict:
+    latencies, recalls = [], []
+    for query, exact in zip(queries, truth):
+        ids, ms = top_k(cur, query, k, sql, candidates)
+        latencies.append(ms)
+        recalls.append(len(exact.intersection(ids)) / k)
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)],
+        "recall": statistics.mean(recalls),
+    }
+
+
+def build_index(cur, ddl: str) -> tuple[float, int]:
+    """(segundos de construção, bytes do índice)."""
+    cur.execute(f"DROP INDEX IF EXISTS {TABLE}_embedding_idx")
+    start = time.perf_counter()
+    cur.execute(ddl)
+    seconds = time.perf_counter() - start
+    cur.execute(f"ANALYZE {TABLE}")
+    cur.execute(f"SELECT pg_relation_size('{TABLE}_embedding_idx')")
+    return seconds, cur.fetchone()[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de índices vetoriais (HNSW vs IVFFlat)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--m", type=int, default=HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=HNSW_EF_CONSTRUCTION)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--lists", type=int, default=None, help="IVFFlat (padrão: sqrt(rows) / rows/1000)")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 5, 10, 20, 40])
+    parser.add_argument("--precisions", nargs="*", default=["halfvec", "binary"], choices=["halfvec", "binary"],
+                        help="HNSW quantizados (com reordenação) a medir")
+    parser.add_argument("--rerank-factor", type=int, nargs="+", default=None,
+                        help="Candidatos por resultado (padrão: HALFVEC/BINARY_RERANK_FACTOR)")
+    parser.add_argument("--load-batch", type=int, default=50_000)
+    parser.add_argument("--maintenance-work-mem", default="2GB")
+    parser.add_argument("--keep", action="store_true", help="Não apaga a tabela ao final")
+    args = parser.parse_args()
+
+    lists = args.lists or max(1, args.rows // 1000 if args.rows <= 1_000_000 else int(math.sqrt(args.rows)))
+
+    print("=" * 60)
+    print("🧭  Vyron System — Vector Index Benchmark")
+    print(f"    {args.rows:,} vetores × {args.dims} dims · {args.queries} queries · top-{args.k}")
+    print("=" * 60)
+
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(args.clusters, args.dims)).astype(np.float32)
+    queries = [vec_literal(v) for v in make_vectors(rng, centers, args.queries)]
+
+    raw = engine.raw_connection()
+    raw.autocommit = True
+    cur = raw.cursor()
+    results = []
+    try:
+        print("\n🧪  Carregando corpus sintético...")
+        load_corpus(cur, args, rng, centers)
+        cur.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+        cur.execute(f"SELECT pg_total_relation_size('{TABLE}')")
+        table_bytes = cur.fetchone()[0]
+
+        print("\n🎯  Top-k exato (varredura sequencial)...")
+        truth = [set(top_k(cur, q, args.k)[0]) for q in queries]
+        exact = measure(cur, queries, truth, args.k)
+        results.append(("exato", "-", 0.0, 0, exact))
+
+        print(f"\n🕸️  HNSW (m={args.m}, ef_construction={args.ef_construction})...")
+        build_s, size = build_index(cur, (
+            f"CREATE INDEX {TABLE}_embedding_idx ON {TABLE} USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+        ))
+        print(f"   ⏱️  construído em {build_s:.0f} s")
+        for ef in args.ef_search:
+            cur.execute(f"SET hnsw.ef_search = {max(ef, args.k)}")
+            results.append(("hnsw", f"ef_search={ef}", build_s, size, measure(cur, queries, truth, args.k)))
+
+        print(f"\n🗂️  IVFFlat (lists={lists})...")
+        build_s, size = build_index(cur, (
+            f"CREATE INDEX {TABLE}_embedding_idx ON {TABLE} USING ivfflat (embedding vector_cosine_ops) "
+            f"WITH (lists = {lists})"
+        ))
+        print(f"   ⏱️  construído em {build_s:.0f} s")
+        for probes in args.probes:
+            cur.execute(f"SET ivfflat.probes = {probes}")
+            results.append(("ivfflat", f"probes={probes}", build_s, size, measure(cur, queries, truth, args.k)))
+
+        for precision in args.precisions:
+            expression, opclass = index_expression("embedding", precision, args.dims)
+            print(f"\n🔻  HNSW {precision} ({expression})...")
+            build_s, size = build_index(cur, (
+                f"CREATE INDEX {TABLE}_embedding_idx ON {TABLE} USING hnsw ({expression} {opclass}) "
+                f"WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+            ))
+            print(f"   ⏱️  construído em {build_s:.0f} s")
+            default_factor = HALFVEC_RERANK_FACTOR if precision == "halfvec" else BINARY_RERANK_FACTOR
+            sql = knn_sql(precision, args.dims)
+            for factor in args.rerank_factor or [default_factor]:
+                candidates = args.k * factor
+                for ef in args.ef_search:
+                    cur.execute(f"SET hnsw.ef_search = {max(ef, candidates)}")
+                    results.append((
+                        f"hnsw-{precision}", f"ef={ef},x{factor}", build_s, size,
+                        measure(cur, queries, truth, args.k, sql, candidates),
+                    ))
+    finally:
+        if not args.keep:
+            cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cur.close()
+        raw.close()
+
+    per_million = 1_000_000 / args.rows / 2**20
+    print("\n📊  Resumo")
+    print(f"   tabela (vetores float32): {table_bytes * per_million:,.0f} MB por milhão de vetores")
+    print(f"   {'índice':<14} {'parâmetro':<14} {'build (s)':>9} {'MB/1M':>8} {'p50 (ms)':>9} "
+          f"{'p95 (ms)':>9} {'recall@' + str(args.k):>10}")
+    for index, param, build_s, size, r in results:
+        print(f"   {index:<14} {param:<14} {build_s:>9.0f} {size * per_million:>8,.0f} {r['p50']:>9.2f} "
+              f"{r['p95']:>9.2f} {r['recall']:>10.3f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+check_import_time.py — Orçamento de tempo de import da API
+
+Mede ``import main`` com ``python -X importtime`` em um processo limpo e
+falha (exit 1) se:
+  - o tempo cumulativo passar do orçamento, ou
+  - alguma dependência pesada/opcional for importada no boot.
+
+Uso:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 1500 --runs 5 --top 15
+
+Pensado para rodar no CI antes do deploy (regressões de cold start).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Dependências que só podem ser carregadas no primeiro uso (accessors)
+DEFERRED_MODULES = (
+    "openai",
+    "fpdf",
+    "pypdf",
+    "langchain_text_splitters",
+    "pandas",
+    "serpapi",
+)
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(module: str) -> list[tuple[int, int, str]]:
+    """Executa ``-X importtime`` e retorna (self_us, cumulative_us, nome) top-level."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} falhou:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            rows.append((int(match.group(1)), int(match.group(2)), match.group(4).strip()))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Orçamento de import-time da API")
+    parser.add_argument("--module", default="main", help="Módulo a importar (padrão: main)")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=3, help="Execuções (usa a mais rápida)")
+    parser.add_argument("--top", type=int, default=10, help="Quantos módulos mostrar")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"⏱️  Vyron System — Import-time budget ({args.module})")
+    print("=" * 60)
+
+    best = None
+    for _ in range(args.runs):
+        rows = measure(args.module)
+        total = next((cum for _, cum, name in rows if name == args.module), 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    total_us, rows = best
+    imported = {name.split(".")[0] for _, _, name in rows}
+
+    print(f"\n📦  Módulos mais caros (cumulativo, melhor de {args.runs}):")
+    seen = set()
+    for _, cum, name in sorted(rows, key=lambda r: r[1], reverse=True):
+        root = name.split(".")[0]
+        if root in seen or name == args.module:
+            continue
+        seen.add(root)
+        print(f"   {cum / 1000:8.1f} ms  {name}")
+        if len(seen) >= args.top:
+            break
+
+    failures = []
+    total_ms = total_us / 1000
+    print(f"\n🕒  Total: {total_ms:.1f} ms (orçamento: {args.budget_ms:.0f} ms)")
+    if total_ms > args.budget_ms:
+        failures.append(f"import {args.module} levou {total_ms:.1f} ms (> {args.budget_ms:.0f} ms)")
+
+    eager = [m for m in DEFERRED_MODULES if m in imported]
+    if eager:
+        failures.append(f"importados no boot (deveriam ser lazy): {', '.join(eager)}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌  {failure}")
+        sys.exit(1)
+    print("✅  Dentro do orçamento.\n")
+
+
+if __name__ == "__main__":
+    main()
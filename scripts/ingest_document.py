@@ -14,6 +14,7 @@ O script:
 
 from __future__ import annotations
 
+import os
 import sys
 import asyncio
 from pathlib import Path
@@ -22,7 +23,10 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from app.database import SessionLocal
+# Processo pontual: pool mínimo (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "script")
+
+from app.database import AsyncSessionLocal, async_engine
 from app.brain_service import BrainService
 
 
@@ -45,7 +49,7 @@ async def main(file_path: str) -> None:
     print(f"📄  Arquivo : {path.resolve()}")
     print("=" * 60)
 
-    db = SessionLocal()
+    db = AsyncSessionLocal()
     try:
         result = await BrainService.ingest_pdf(
             file_path=path,
@@ -69,7 +73,8 @@ async def main(file_path: str) -> None:
         print(f"\n❌ Erro inesperado durante ingestão: {exc}")
         sys.exit(1)
     finally:
-        db.close()
+        await db.close()
+        await async_engine.dispose()
 
 
 if __name__ == "__main__":
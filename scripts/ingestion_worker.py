@@ -0,0 +1,62 @@
+"""
+ingestion_worker.py — Worker dedicado da fila de ingestão de PDFs
+
+Uso:
+    python scripts/ingestion_worker.py
+    python scripts/ingestion_worker.py --concurrency 2
+
+Consome ``ingestion_jobs`` (FOR UPDATE SKIP LOCKED) — pode rodar em quantos
+processos/hosts forem necessários, em paralelo com a API. Para deixar a
+ingestão só neste processo, suba a API com INGESTION_WORKER_ENABLED=false.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Garante que o projeto raiz está no sys.path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# Processo de background: pool de worker (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "worker")
+
+from app.database import async_engine
+from app.modules.brain import ingestion_jobs as ij
+from app.modules.brain.pdf_extraction import shutdown_pool
+
+
+async def run(concurrency: int) -> None:
+    worker = ij.IngestionWorker(concurrency=concurrency)
+    print(f"👷  Worker {worker.worker_id} — {worker.concurrency} job(s) simultâneo(s)")
+    try:
+        await worker.run_forever()
+    finally:
+        shutdown_pool()
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker da fila de ingestão de PDFs")
+    parser.add_argument("--concurrency", type=int, default=ij.INGESTION_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    print("=" * 60)
+    print("📥  Vyron System — Ingestion Worker")
+    print("=" * 60)
+
+    try:
+        asyncio.run(run(args.concurrency))
+    except KeyboardInterrupt:
+        print("\n🛑  Worker encerrado (jobs em andamento voltaram para a fila).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+prune_embedding_cache.py — Poda da tabela embedding_cache
+
+Uso:
+    python scripts/prune_embedding_cache.py
+    python scripts/prune_embedding_cache.py --ttl-days 30 --max-rows 200000
+
+Remove entradas mais antigas que o TTL e, acima do teto de linhas, as
+mais antigas restantes. Pensado para rodar em agendador (ex. diário).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Garante que o projeto raiz está no sys.path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# Processo pontual: pool mínimo (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "script")
+
+from app.database import engine
+from app.modules.brain import embedding_cache as ec
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Poda do cache persistente de embeddings")
+    parser.add_argument("--ttl-days", type=int, default=ec.EMBEDDING_CACHE_DB_TTL_DAYS)
+    parser.add_argument("--max-rows", type=int, default=ec.EMBEDDING_CACHE_DB_MAX_ROWS)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧠  Vyron System — Embedding Cache Prune")
+    print("=" * 60)
+
+    with engine.begin() as conn:
+        expired, overflow = ec.prune_persistent(conn, ttl_days=args.ttl_days, max_rows=args.max_rows)
+
+    print(f"🧹  Expiradas (> {args.ttl_days} dias): {expired}")
+    print(f"📦  Excedentes (> {args.max_rows} linhas): {overflow}")
+    print("🏁  Poda concluída.\n")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"\n❌  Erro fatal: {exc}")
+        sys.exit(1)
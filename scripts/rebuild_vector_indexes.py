@@ -0,0 +1,115 @@
+"""
+rebuild_vector_indexes.py — Recria os índices vetoriais com outros parâmetros
+
+Uso:
+    python scripts/rebuild_vector_indexes.py                       # HNSW m=16, ef_construction=64
+    python scripts/rebuild_vector_indexes.py --m 32 --ef-construction 128
+    python scripts/rebuild_vector_indexes.py --table document_chunks --type ivfflat --lists 1000
+    python scripts/rebuild_vector_indexes.py --precision binary     # 1 bit/dim + reordenação
+
+--precision indexa ``embedding::halfvec`` ou ``binary_quantize(embedding)``
+em vez do vetor float32 (ver app/modules/brain/vector_index.py) — defina
+VECTOR_INDEX_PRECISION com o mesmo valor na API para as buscas usarem o
+índice. O tamanho do índice antes/depois é mostrado ao final.
+
+O índice novo é criado com CREATE INDEX CONCURRENTLY (sem bloquear escritas)
+com um nome temporário e só então troca de lugar com o atual (DROP + RENAME
+em uma transação curta). IVFFlat deve ser recriado depois da carga — as
+listas são treinadas com as linhas existentes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+# Garante que o projeto raiz está no sys.path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# Processo pontual: pool mínimo (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "script")
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.modules.brain.vector_index import (
+    HNSW_EF_CONSTRUCTION, HNSW_M, PRECISIONS, VECTOR_INDEX_PRECISION, VECTOR_INDEXES, index_expression,
+)
+
+
+def index_ddl(name: str, table: str, column: str, args: argparse.Namespace, rows: int) -> str:
+    expression, opclass = index_expression(column, args.precision)
+    if args.type == "hnsw":
+        using = f"hnsw ({expression} {opclass}) WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+    else:
+        # Recomendação do pgvector: rows/1000 até 1M linhas, sqrt(rows) acima
+        lists = args.lists or max(1, rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows)))
+        using = f"ivfflat ({expression} {opclass}) WITH (lists = {lists})"
+    return f"CREATE INDEX CONCURRENTLY {name} ON {table} USING {using}"
+
+
+def index_size(conn, name: str) -> int:
+    return conn.execute(text("SELECT coalesce(pg_relation_size(to_regclass(:n)), 0)"), {"n": name}).scalar() or 0
+
+
+def rebuild(table: str, args: argparse.Namespace) -> None:
+    column, name = VECTOR_INDEXES[table]
+    tmp_name = f"{name}_rebuild"
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        rows = conn.execute(text(f"SELECT count(*) FROM {table} WHERE {column} IS NOT NULL")).scalar() or 0
+        old_size = index_size(conn, name)
+        ddl = index_ddl(tmp_name, table, column, args, rows)
+        print(f"\n📐  {table} ({rows:,} vetores)")
+        print(f"   {ddl}")
+
+        if args.maintenance_work_mem:
+            conn.execute(text(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'"))
+        # Sobra de uma execução interrompida (índice INVALID)
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {tmp_name}"))
+
+        start = time.perf_counter()
+        conn.execute(text(ddl))
+        print(f"   ⏱️  construído em {time.perf_counter() - start:.1f} s")
+        new_size = index_size(conn, tmp_name)
+        print(f"   📦  {old_size / 2**20:,.1f} MB → {new_size / 2**20:,.1f} MB")
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text(f"ALTER INDEX {tmp_name} RENAME TO {name}"))
+    print(f"   ✅  {name} substituído")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recria os índices vetoriais (HNSW/IVFFlat)")
+    parser.add_argument("--table", choices=[*VECTOR_INDEXES, "all"], default="all")
+    parser.add_argument("--type", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument("--m", type=int, default=HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=HNSW_EF_CONSTRUCTION)
+    parser.add_argument("--lists", type=int, default=None, help="IVFFlat (padrão: calculado pelas linhas)")
+    parser.add_argument("--precision", choices=PRECISIONS, default=VECTOR_INDEX_PRECISION,
+                        help="Expressão indexada: full (float32), halfvec ou binary")
+    parser.add_argument("--maintenance-work-mem", default=None, help="Ex.: 2GB (acelera o build do HNSW)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧭  Vyron System — Rebuild de índices vetoriais")
+    print("=" * 60)
+
+    tables = list(VECTOR_INDEXES) if args.table == "all" else [args.table]
+    for table in tables:
+        rebuild(table, args)
+    print("\n🏁  Concluído.\n")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"\n❌  Erro fatal: {exc}")
+        sys.exit(1)
@@ -4,17 +4,30 @@ run_migrations.py — Executa migrations SQL via Python (sem acesso ao console S
 Projetado para ambientes como Render Free Tier onde não há acesso direto
 ao psql. Usa o engine SQLAlchemy do projeto para executar DDL.
 
+É o ÚNICO ponto que cria/altera o schema — a API apenas verifica a versão
+no startup (app/schema.py). Rode antes de subir uma nova versão da API.
+
 Uso:
-    python scripts/run_migrations.py
+    python scripts/run_migrations.py            # aplica as pendentes
+    python scripts/run_migrations.py --status   # mostra versões, não altera nada
+    python scripts/run_migrations.py --target 5 # aplica até a versão 5
 
 Pipeline:
     1. Garante extensões (vector, uuid-ossp)
     2. Cria tabelas via SQLAlchemy metadata (models.py)
-    3. Executa migration SQL incremental (004_add_document_chunks.sql)
+    3. Converte/particiona audit_logs e cria as partições mensais à frente
+    4. Aplica as migrations versionadas (migrations/NNN_*.sql) ainda não
+       registradas em schema_migrations — cada arquivo inteiro em uma
+       transação, junto com o registro da versão
+
+Um arquivo cuja primeira linha seja ``-- migrate:no-transaction`` roda em
+autocommit, um comando por vez (necessário para CREATE INDEX CONCURRENTLY).
 """
 
 from __future__ import annotations
 
+import argparse
+import os
 import sys
 from pathlib import Path
 
@@ -22,15 +35,53 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
+# Processo pontual: pool mínimo (ver app/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "script")
+
 from sqlalchemy import text, inspect
 from app.database import engine
 from app import models  # noqa: F401  — registra todos os modelos na metadata
+from app import schema
+from app.modules.core import audit_maintenance
 
+_NO_TRANSACTION = "-- migrate:no-transaction"
 
-MIGRATIONS_DIR = ROOT_DIR / "migrations"
+
+def print_status() -> None:
+    """Mostra a versão do banco, a do código e as migrations pendentes."""
+    with engine.connect() as conn:
+        current = schema.current_version(conn)
+        applied = schema.applied_migrations(conn) if current is not None else {}
+
+    print(f"🗄️  Versão do banco:  {current if current is not None else 'não migrado'}")
+    print(f"📦  Versão do código: {schema.expected_version()}")
+    for migration in schema.list_migrations():
+        if migration.version not in applied:
+            mark = "⏳ pendente"
+        elif applied[migration.version] != migration.checksum:
+            mark = "⚠️  alterada após aplicada"
+        else:
+            mark = "✅ aplicada"
+        print(f"   {migration.version:03d}  {migration.name:<40} {mark}")
 
 
-def run() -> None:
+def apply_migration(migration: schema.Migration) -> None:
+    """Executa o arquivo inteiro e registra a versão (atômico quando possível)."""
+    sql = migration.sql
+    if sql.lstrip().startswith(_NO_TRANSACTION):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # Um comando por vez (CONCURRENTLY não roda em bloco multi-comando)
+            for statement in schema.split_statements(sql):
+                conn.exec_driver_sql(statement)
+            schema.record_migration(conn, migration)
+        return
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(sql)
+        schema.record_migration(conn, migration)
+
+
+def run(target: int | None = None) -> None:
     """Executa todas as migrations pendentes."""
 
     print("=" * 60)
@@ -63,60 +114,51 @@ def run() -> None:
             print(f"   ⚠️  Erro no create_all: {exc}")
 
         # ──────────────────────────────────────────────────
-        # 3. MIGRATION SQL INCREMENTAL
+        # 2b. AUDIT_LOGS PARTICIONADA (conversão + partições)
         # ──────────────────────────────────────────────────
-        inspector = inspect(engine)
-        existing_tables = inspector.get_table_names()
-
-        # Lista de migrations a executar (ordem importa)
-        migration_files = sorted(MIGRATIONS_DIR.glob("*.sql"))
+        print("\n🗂️  Verificando particionamento de audit_logs...")
+        try:
+            if audit_maintenance.convert_to_partitioned(conn):
+                print("   ✅  audit_logs convertida para particionada")
+            created = audit_maintenance.ensure_partitions(conn)
+            conn.commit()
+            print(f"   ✅  {len(created)} partição(ões) criada(s)")
+        except Exception as exc:
+            conn.rollback()
+            print(f"   ⚠️  Erro no particionamento: {exc}")
 
-        if not migration_files:
-            print("\n📂  Nenhum arquivo .sql encontrado em migrations/")
-        else:
-            print(f"\n📂  {len(migration_files)} migration(s) encontrada(s)")
-
-            for sql_file in migration_files:
-                print(f"\n   📄  {sql_file.name}")
-
-                # Heurística simples: se a migration cria uma tabela que já existe,
-                # pula para não gerar conflito de índice IVFFlat em tabela vazia.
-                sql_content = sql_file.read_text(encoding="utf-8")
-
-                # Executa cada statement separado por ";"
-                statements = [
-                    s.strip()
-                    for s in sql_content.split(";")
-                    if s.strip() and not s.strip().startswith("--")
-                ]
-
-                success = 0
-                skipped = 0
-                errors = 0
-
-                for stmt in statements:
-                    # Pula índices IVFFlat — eles falham em tabelas vazias
-                    # e o pgvector faz seq scan automaticamente nesse caso.
-                    if "ivfflat" in stmt.lower():
-                        print(f"      ⏭️  IVFFlat index — adiado (requer dados)")
-                        skipped += 1
-                        continue
-
-                    try:
-                        conn.execute(text(stmt))
-                        conn.commit()
-                        success += 1
-                    except Exception as exc:
-                        conn.rollback()
-                        err_msg = str(exc).split("\n")[0]
-                        # "already exists" é esperado em re-runs
-                        if "already exists" in err_msg.lower():
-                            skipped += 1
-                        else:
-                            print(f"      ⚠️  {err_msg[:120]}")
-                            errors += 1
-
-                print(f"      ✅ {success} executado(s) | ⏭️ {skipped} pulado(s) | ⚠️ {errors} erro(s)")
+        # ──────────────────────────────────────────────────
+        # 3. MIGRATIONS VERSIONADAS
+        # ──────────────────────────────────────────────────
+        schema.ensure_version_table(conn)
+        conn.commit()
+        applied = schema.applied_migrations(conn)
+
+    migrations = [
+        m for m in schema.list_migrations()
+        if target is None or m.version <= target
+    ]
+    pending = [m for m in migrations if m.version not in applied]
+
+    for migration in migrations:
+        recorded = applied.get(migration.version)
+        if recorded and recorded != migration.checksum:
+            print(f"\n   ⚠️  {migration.path.name} foi alterada depois de aplicada — crie uma nova versão")
+
+    if not pending:
+        print("\n📂  Nenhuma migration pendente")
+    else:
+        print(f"\n📂  {len(pending)} migration(s) pendente(s)")
+
+    for migration in pending:
+        print(f"\n   📄  {migration.path.name}")
+        try:
+            apply_migration(migration)
+        except Exception as exc:
+            err_msg = str(exc).split("\n")[0]
+            print(f"      ❌ {err_msg[:200]}")
+            raise RuntimeError(f"Migration {migration.version:03d} falhou — versões seguintes não aplicadas") from exc
+        print(f"      ✅ versão {migration.version:03d} aplicada")
 
     # ──────────────────────────────────────────────────
     # 4. VERIFICAÇÃO FINAL
@@ -128,15 +170,28 @@ def run() -> None:
     for t in sorted(tables):
         print(f"   • {t}")
 
-    has_chunks = "document_chunks" in tables
-    print(f"\n{'✅' if has_chunks else '❌'}  document_chunks: {'OK' if has_chunks else 'NÃO CRIADA'}")
+    with engine.connect() as conn:
+        version = schema.current_version(conn)
+    print(f"\n🔖  Versão do schema: {version} (código: {schema.expected_version()})")
     print("─" * 60)
     print("🏁  Migration concluída.\n")
 
 
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrations versionadas do Vyron System")
+    parser.add_argument("--status", action="store_true", help="Mostra as versões sem alterar nada")
+    parser.add_argument("--target", type=int, default=None, help="Aplica até esta versão (inclusive)")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+    else:
+        run(target=args.target)
+
+
 if __name__ == "__main__":
     try:
-        run()
+        main()
     except Exception as exc:
         print(f"\n❌  Erro fatal: {exc}")
         sys.exit(1)